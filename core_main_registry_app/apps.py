@@ -17,6 +17,12 @@ class InitApp(AppConfig):
         Returns:
 
         """
+        from core_main_registry_app.components.category_closure import (
+            watch as category_closure_watch,
+        )
+
+        # the registry is also initialized after the migrations
+        category_closure_watch.init()
         if "migrate" not in sys.argv:
             from core_main_registry_app.utils.refinement import (
                 watch as refinement_watch,
@@ -7,3 +7,12 @@ class DataStatus:
     ACTIVE = "active"
     INACTIVE = "inactive"
     DELETED = "deleted"
+
+
+class RefinementGenerationStatus:
+    """Refinement Generation Status"""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
@@ -1,9 +1,12 @@
 """Category API"""
 
 from core_main_registry_app.components.category.models import Category
+from core_main_registry_app.utils.refinement import cache as refinement_cache
 
 
-def create_and_save(name, path, value, parent, refinement):
+def create_and_save(
+    name, path, value, parent, refinement, has_attributes=True
+):
     """Create and save a category.
 
     Args:
@@ -12,6 +15,7 @@ def create_and_save(name, path, value, parent, refinement):
         value:
         parent:
         refinement:
+        has_attributes: False if the element at path can not have attributes.
 
     Returns:
 
@@ -19,10 +23,28 @@ def create_and_save(name, path, value, parent, refinement):
 
     # Save category
     return Category.create_and_save(
-        name=name, path=path, value=value, parent=parent, refinement=refinement
+        name=name,
+        path=path,
+        value=value,
+        parent=parent,
+        refinement=refinement,
+        has_attributes=has_attributes,
     )
 
 
+def bulk_create_trees(categories):
+    """Create and save trees of categories at once.
+
+    Args:
+        categories: unsaved categories, parents before their children,
+        siblings in tree order
+
+    Returns:
+
+    """
+    return Category.bulk_create_trees(categories)
+
+
 def get_all_filtered_by_refinement_id(refinement_id):
     """Get all categories by refinement id.
 
@@ -42,10 +64,75 @@ def get_by_id(category_id):
         category_id:
 
     Returns:
-        Category object
+        Category object, built from the values read through the refinement
+        cache: each call returns a new object
+
+    """
+    return Category.from_values(
+        refinement_cache.get_or_load(
+            refinement_cache.ANY_TEMPLATE_HASH,
+            "category",
+            str(category_id),
+            lambda: Category.get_values_by_id(category_id),
+        )
+    )
+
+
+def get_all_values_by_ids(category_ids):
+    """Get the path, value, tree position and refinement id of the categories with the given ids.
+
+    Args:
+        category_ids:
+
+    Returns:
+        list of dict: id, path, value, has_attributes, tree_id, lft, rght and
+        refinement_id of each category
+
+    """
+    return list(Category.get_all_values_by_ids(category_ids))
+
+
+def get_count_and_max_id_by_template_hash(template_hash):
+    """Get the number and the greatest id of the categories of the
+    refinements of a template hash. Always read from the database.
+
+    Args:
+        template_hash:
+
+    Returns:
+        tuple: (count, max id)
+
+    """
+    return Category.get_count_and_max_id_by_template_hash(template_hash)
+
+
+def get_template_hash_by_ids(category_ids):
+    """Get the template hash whose refinements contain the most of the
+    categories with the given ids.
+
+    Args:
+        category_ids:
+
+    Returns:
+        str or None
+
+    """
+    return Category.get_template_hash_by_ids(category_ids)
+
+
+def get_all_values_by_template_hash(template_hash):
+    """Get the values of all the categories of the refinements of a template hash.
+
+    Args:
+        template_hash:
+
+    Returns:
+        list of dict: id, path, value, has_attributes, tree_id, lft, rght,
+        refinement_id, refinement__slug and refinement__name of each category,
+        in tree order
 
     """
-    return Category.get_by_id(category_id)
+    return list(Category.get_all_values_by_template_hash(template_hash))
 
 
 def get_all_categories_ids_by_parent_slug_and_refinement_id(
@@ -92,3 +179,39 @@ def get_all_categories_ids_from_name_and_refinement_id(name, refinement_id):
             name, refinement_id
         ).values_list("id", flat=True)
     )
+
+
+def get_all_subtrees_ids_by_slugs_and_refinement_id(slugs, refinement_id):
+    """Get a list of the ids of the categories with the given slugs and of
+    their descendants, in a single query.
+
+    Args:
+        slugs:
+        refinement_id:
+
+    Returns:
+
+    """
+    return list(
+        Category.get_all_subtrees_ids_by_slugs_and_refinement_id(
+            slugs, refinement_id
+        )
+    )
+
+
+def get_all_subtrees_ids_by_names_and_refinement_id(names, refinement_id):
+    """Get a list of the ids of the categories with the given names and of
+    their descendants, in a single query.
+
+    Args:
+        names:
+        refinement_id:
+
+    Returns:
+
+    """
+    return list(
+        Category.get_all_subtrees_ids_by_names_and_refinement_id(
+            names, refinement_id
+        )
+    )
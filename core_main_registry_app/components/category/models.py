@@ -1,11 +1,40 @@
 """Category model"""
 
-from django.db import models
+from django.db import connection, models, router, transaction
+from django.db.models import Count, Exists, Max, OuterRef, Q, Subquery
 from django.core.exceptions import ObjectDoesNotExist
 from django_extensions.db.fields import AutoSlugField
 from mptt.models import MPTTModel, TreeForeignKey
 
 from core_main_app.commons import exceptions as exceptions
+from core_main_registry_app.components.category_closure.models import (
+    CategoryClosure,
+)
+from core_main_registry_app.utils.refinement import cache as refinement_cache
+
+BULK_CREATE_BATCH_SIZE = 1000
+# slug prefixes looked up in a single query
+SLUG_QUERY_BATCH_SIZE = 100
+# key of the PostgreSQL advisory lock on the tree ids allocation
+TREE_ID_LOCK_KEY = 0x43415447
+
+
+class CategorySlugField(AutoSlugField):
+    """Slug field keeping the slugs computed before a bulk creation"""
+
+    def pre_save(self, model_instance, add):
+        """Get the slug to save.
+
+        Args:
+            model_instance:
+            add:
+
+        Returns:
+
+        """
+        if add and getattr(model_instance, "_slug_computed", False):
+            return getattr(model_instance, self.attname)
+        return super().pre_save(model_instance, add)
 
 
 class Category(MPTTModel):
@@ -19,15 +48,38 @@ class Category(MPTTModel):
         related_name="children",
     )
     name = models.CharField(max_length=50)
-    slug = AutoSlugField(max_length=50, overwrite=True, populate_from="name")
+    slug = CategorySlugField(
+        max_length=50, overwrite=True, populate_from="name"
+    )
     path = models.CharField(max_length=255)
     value = models.CharField(max_length=255)
+    # False if the element at path can not have attributes: its value is never under "#text"
+    has_attributes = models.BooleanField(default=True)
     refinement = models.ForeignKey("Refinement", on_delete=models.CASCADE)
 
     class Meta:
         """Meta"""
 
         verbose_name_plural = "Categories"
+        indexes = [
+            models.Index(
+                fields=["refinement", "slug"],
+                name="registry_category_ref_slug_idx",
+            ),
+            models.Index(
+                fields=["refinement", "name"],
+                name="registry_category_ref_name_idx",
+            ),
+            models.Index(
+                fields=["refinement", "path", "value"],
+                name="registry_category_ref_path_idx",
+            ),
+            # tree order, declared here instead of by django-mptt
+            models.Index(
+                fields=["tree_id", "lft"],
+                name="registry_category_tree_lft_idx",
+            ),
+        ]
 
     class MPTTMeta(object):
         """MPTTMeta"""
@@ -49,7 +101,9 @@ class Category(MPTTModel):
         return Category.objects.all().filter(refinement=refinement_id)
 
     @staticmethod
-    def create_and_save(name, path, value, parent, refinement):
+    def create_and_save(
+        name, path, value, parent, refinement, has_attributes=True
+    ):
         """Create and save a category.
 
         Args:
@@ -58,17 +112,76 @@ class Category(MPTTModel):
             value:
             parent:
             refinement:
+            has_attributes:
 
         Returns:
 
         """
-        return Category.objects.create(
-            name=name,
-            path=path,
-            value=value,
-            parent=parent,
-            refinement=refinement,
+        with transaction.atomic():
+            if parent is None:
+                # a new tree id is allocated for the root
+                _lock_tree_ids()
+            # the ancestors are added on post_save
+            category = Category.objects.create(
+                name=name,
+                path=path,
+                value=value,
+                parent=parent,
+                refinement=refinement,
+                has_attributes=has_attributes,
+            )
+        refinement_cache.invalidate_on_commit(
+            refinement_cache.ANY_TEMPLATE_HASH
         )
+        return category
+
+    @staticmethod
+    def bulk_create_trees(categories, batch_size=BULK_CREATE_BATCH_SIZE):
+        """Create and save trees of categories at once.
+
+        The tree positions and the slugs are computed in memory, then the
+        categories are inserted level by level, in a single transaction.
+
+        Args:
+            categories: unsaved categories, parents before their children,
+            siblings in tree order
+            batch_size:
+
+        Returns:
+            list of categories
+
+        """
+        try:
+            with transaction.atomic():
+                _set_slugs(categories, _get_used_slugs(categories))
+                # other generations allocate tree ids concurrently
+                _lock_tree_ids()
+                _set_tree_positions(
+                    categories,
+                    (
+                        Category.objects.aggregate(Max("tree_id"))[
+                            "tree_id__max"
+                        ]
+                        or 0
+                    )
+                    + 1,
+                )
+                levels = {}
+                for category in categories:
+                    levels.setdefault(category.level, []).append(category)
+                for level in sorted(levels):
+                    # parents are saved: their ids are set on the children
+                    Category.objects.bulk_create(
+                        levels[level], batch_size=batch_size
+                    )
+                # bulk_create does not send post_save
+                CategoryClosure.add_categories(categories, batch_size)
+                refinement_cache.invalidate_on_commit(
+                    refinement_cache.ANY_TEMPLATE_HASH
+                )
+            return categories
+        except Exception as ex:
+            raise exceptions.ModelError(str(ex))
 
     @staticmethod
     def get_by_id(category_id):
@@ -88,6 +201,149 @@ class Category(MPTTModel):
         except Exception as ex:
             raise exceptions.ModelError(str(ex))
 
+    @staticmethod
+    def get_values_by_id(category_id):
+        """Get the values of the fields of a category by its id.
+
+        Args:
+            category_id:
+
+        Returns:
+            dict: {field attname: value}
+
+        """
+        try:
+            return Category.objects.filter(pk=category_id).values(
+                *[field.attname for field in Category._meta.concrete_fields]
+            )[0]
+        except IndexError:
+            raise exceptions.DoesNotExist(
+                f"Category {category_id} does not exist."
+            )
+        except Exception as ex:
+            raise exceptions.ModelError(str(ex))
+
+    @staticmethod
+    def from_values(values):
+        """Get a category from the values of its fields.
+
+        Args:
+            values: {field attname: value}
+
+        Returns:
+            Category object
+
+        """
+        return Category.from_db(
+            router.db_for_read(Category), list(values), list(values.values())
+        )
+
+    @staticmethod
+    def get_all_values_by_ids(category_ids):
+        """Get the path, value, tree position and refinement id of the categories with the given ids.
+
+        Args:
+            category_ids:
+
+        Returns:
+            Category values collection
+
+        """
+        try:
+            return Category.objects.filter(id__in=category_ids).values(
+                "id",
+                "path",
+                "value",
+                "has_attributes",
+                "tree_id",
+                "lft",
+                "rght",
+                "refinement_id",
+            )
+        except Exception as ex:
+            raise exceptions.ModelError(str(ex))
+
+    @staticmethod
+    def get_count_and_max_id_by_template_hash(template_hash):
+        """Get the number and the greatest id of the categories of the
+        refinements of a template hash, in a single query.
+
+        Args:
+            template_hash:
+
+        Returns:
+            tuple: (count, max id), max id is None without categories
+
+        """
+        try:
+            result = Category.objects.filter(
+                refinement__template_hashes__template_hash=template_hash
+            ).aggregate(count=Count("id"), max_id=Max("id"))
+            return result["count"], result["max_id"]
+        except Exception as ex:
+            raise exceptions.ModelError(str(ex))
+
+    @staticmethod
+    def get_template_hash_by_ids(category_ids):
+        """Get the template hash whose refinements contain the most of the
+        categories with the given ids, in a single query.
+
+        Args:
+            category_ids:
+
+        Returns:
+            str or None
+
+        """
+        try:
+            return (
+                Category.objects.filter(
+                    pk__in=category_ids,
+                    refinement__template_hashes__isnull=False,
+                )
+                .values("refinement__template_hashes__template_hash")
+                .annotate(count=Count("id"))
+                .order_by(
+                    "-count", "refinement__template_hashes__template_hash"
+                )
+                .values_list(
+                    "refinement__template_hashes__template_hash", flat=True
+                )
+                .first()
+            )
+        except Exception as ex:
+            raise exceptions.ModelError(str(ex))
+
+    @staticmethod
+    def get_all_values_by_template_hash(template_hash):
+        """Get the values of all the categories of the refinements of a template hash.
+
+        Args:
+            template_hash:
+
+        Returns:
+            Category values collection, in tree order
+
+        """
+        try:
+            return Category.objects.filter(
+                refinement__template_hashes__template_hash=template_hash
+            ).values(
+                "id",
+                "name",
+                "path",
+                "value",
+                "has_attributes",
+                "tree_id",
+                "lft",
+                "rght",
+                "refinement_id",
+                "refinement__slug",
+                "refinement__name",
+            )
+        except Exception as ex:
+            raise exceptions.ModelError(str(ex))
+
     @staticmethod
     def get_all_categories_by_parent_slug_and_refinement_id(
         parent_slug, refinement_id
@@ -102,9 +358,13 @@ class Category(MPTTModel):
 
         """
         try:
-            return Category.objects.get(
-                slug__startswith=parent_slug, refinement_id=refinement_id
-            ).get_family()
+            categories = Category.objects.filter(refinement_id=refinement_id)
+            try:
+                # exact slug first: uses the (refinement, slug) index
+                category = categories.get(slug=parent_slug)
+            except ObjectDoesNotExist:
+                category = categories.get(slug__startswith=parent_slug)
+            return category.get_family()
         except ObjectDoesNotExist as exception:
             raise exceptions.DoesNotExist(str(exception))
         except Exception as ex:
@@ -141,6 +401,65 @@ class Category(MPTTModel):
         except Exception as ex:
             raise exceptions.ModelError(str(ex))
 
+    @staticmethod
+    def get_all_subtrees_ids_by_slugs_and_refinement_id(slugs, refinement_id):
+        """Get the ids of the categories with the given slugs and of their
+        descendants, in a single query.
+
+        Args:
+            slugs:
+            refinement_id:
+
+        Returns:
+            Category ids collection, in tree order
+
+        """
+        return Category._get_all_subtrees_ids(Q(slug__in=slugs), refinement_id)
+
+    @staticmethod
+    def get_all_subtrees_ids_by_names_and_refinement_id(names, refinement_id):
+        """Get the ids of the categories with the given names and of their
+        descendants, in a single query.
+
+        Args:
+            names:
+            refinement_id:
+
+        Returns:
+            Category ids collection, in tree order
+
+        """
+        return Category._get_all_subtrees_ids(Q(name__in=names), refinement_id)
+
+    @staticmethod
+    def _get_all_subtrees_ids(roots_filter, refinement_id):
+        """Get the ids of the categories of a refinement in the (tree_id,
+        lft, rght) range of a category matching the filter.
+
+        Args:
+            roots_filter:
+            refinement_id:
+
+        Returns:
+            Category ids collection, in tree order
+
+        """
+        try:
+            roots = Category.objects.filter(
+                roots_filter,
+                refinement_id=refinement_id,
+                tree_id=OuterRef("tree_id"),
+                lft__lte=OuterRef("lft"),
+                rght__gte=OuterRef("rght"),
+            )
+            return (
+                Category.objects.filter(refinement_id=refinement_id)
+                .filter(Exists(roots))
+                .values_list("id", flat=True)
+            )
+        except Exception as ex:
+            raise exceptions.ModelError(str(ex))
+
     def __str__(self):
         """Category as string
 
@@ -148,3 +467,168 @@ class Category(MPTTModel):
 
         """
         return self.name
+
+
+def _lock_tree_ids():
+    """Lock the allocation of the tree ids until the end of the transaction.
+
+    Returns:
+
+    """
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_advisory_xact_lock(%s)", [TREE_ID_LOCK_KEY]
+            )
+    else:
+        # lock the roots of the last tree (no-op on SQLite, which only
+        # allows a single writer)
+        list(
+            Category.objects.select_for_update()
+            .filter(
+                tree_id=Subquery(
+                    Category.objects.order_by("-tree_id").values("tree_id")[:1]
+                ),
+                parent__isnull=True,
+            )
+            .values_list("pk", flat=True)
+        )
+
+
+def _get_used_slugs(categories):
+    """Get the used slugs that the categories could take.
+
+    Args:
+        categories:
+
+    Returns:
+        set of slugs
+
+    """
+    slug_field = Category._meta.get_field("slug")
+    # shortest start of the candidates of each slug
+    end = f"{slug_field.separator}{slug_field.max_unique_query_attempts}"
+    prefixes = sorted(
+        {
+            slug_field._slug_strip(
+                _get_original_slug(slug_field, category.name)[
+                    : slug_field.max_length - len(end)
+                ]
+            )
+            for category in categories
+        }
+    )
+    used_slugs = set()
+    for start in range(0, len(prefixes), SLUG_QUERY_BATCH_SIZE):
+        slugs_filter = Q()
+        for prefix in prefixes[
+            start : start + SLUG_QUERY_BATCH_SIZE  # noqa: E203
+        ]:
+            slugs_filter |= Q(slug__startswith=prefix)
+        used_slugs.update(
+            Category.objects.filter(slugs_filter).values_list(
+                "slug", flat=True
+            )
+        )
+    return used_slugs
+
+
+def _get_original_slug(slug_field, name):
+    """Get the slug of a name, before deduplication.
+
+    Args:
+        slug_field:
+        name:
+
+    Returns:
+
+    """
+    return slug_field._slug_strip(
+        slug_field.slugify_func(name, slug_field.slugify_function)[
+            : slug_field.max_length
+        ]
+    )
+
+
+def _set_slugs(categories, used_slugs):
+    """Set the slugs of the categories, as the slug field would on save.
+
+    Args:
+        categories:
+        used_slugs: slugs already used, updated with the new slugs
+
+    Returns:
+
+    """
+    slug_field = Category._meta.get_field("slug")
+    for category in categories:
+        original_slug = _get_original_slug(slug_field, category.name)
+        for slug in _get_slug_candidates(slug_field, original_slug):
+            if slug and slug not in used_slugs:
+                break
+        category.slug = slug
+        category._slug_computed = True
+        used_slugs.add(slug)
+
+
+def _get_slug_candidates(slug_field, original_slug):
+    """Generate the slugs tried by the slug field, in the same order.
+
+    Args:
+        slug_field:
+        original_slug:
+
+    Returns:
+
+    """
+    yield original_slug
+    for i in range(2, slug_field.max_unique_query_attempts):
+        slug = original_slug
+        end = f"{slug_field.separator}{i}"
+        if len(slug) + len(end) > slug_field.max_length:
+            slug = slug_field._slug_strip(
+                slug[: slug_field.max_length - len(end)]
+            )
+        yield f"{slug}{end}"
+    raise RuntimeError(
+        f"max slug attempts for {original_slug} exceeded "
+        f"({slug_field.max_unique_query_attempts})"
+    )
+
+
+def _set_tree_positions(categories, tree_id):
+    """Set the tree positions (nested set) of the categories.
+
+    Args:
+        categories: parents before their children, siblings in tree order
+        tree_id: tree id of the first root
+
+    Returns:
+
+    """
+    roots = []
+    children = {}
+    for category in categories:
+        if category.parent is None:
+            roots.append(category)
+        else:
+            children.setdefault(id(category.parent), []).append(category)
+
+    for root in roots:
+        position = 1
+        # iterative depth first traversal: (category, level, entering)
+        stack = [(root, 0, True)]
+        while stack:
+            category, level, entering = stack.pop()
+            if entering:
+                category.tree_id = tree_id
+                category.level = level
+                category.lft = position
+                position += 1
+                stack.append((category, level, False))
+                for child in reversed(children.get(id(category), [])):
+                    stack.append((child, level + 1, True))
+            else:
+                category.rght = position
+                position += 1
+        tree_id += 1
@@ -0,0 +1,171 @@
+"""Category bitmap API"""
+
+from core_main_registry_app.commons.constants import DataStatus
+from core_main_registry_app.components.category_bitmap.models import (
+    CHUNK_BITS,
+    CategoryBitmap,
+)
+from core_main_registry_app.components.data_facet import (
+    api as data_facet_api,
+)
+from core_main_registry_app.constants import PATH_STATUS
+from core_main_registry_app.utils.refinement import cache as refinement_cache
+
+
+def get_bitmaps_by_template_hash(template_hash, chunks=None):
+    """Get the bitmaps of the categories of a template hash.
+
+    Args:
+        template_hash:
+        chunks: only get the bits of the data of these chunks
+
+    Returns:
+        dict: {category id: bitmap (int, bit n set if data n matches)}
+
+    """
+    bitmaps = {}
+    for category_id, chunk, bitmap in CategoryBitmap.get_all_by_template_hash(
+        template_hash, chunks
+    ):
+        bitmaps[category_id] = bitmaps.get(category_id, 0) | (
+            int.from_bytes(bitmap, "little") << (chunk << CHUNK_BITS)
+        )
+    return bitmaps
+
+
+def get_chunks_by_template_hash(template_hash):
+    """Get the chunks of data ids having bitmaps for a template hash.
+
+    Args:
+        template_hash:
+
+    Returns:
+        list of chunks
+
+    """
+    return list(CategoryBitmap.get_all_chunks_by_template_hash(template_hash))
+
+
+def get_data_category_ids(data):
+    """Get the ids of the categories matched by a data. Deleted data match
+    no category.
+
+    Args:
+        data:
+
+    Returns:
+        set of category ids
+
+    """
+    dict_content = data_facet_api.get_data_dict_content(data)
+    if not dict_content or DataStatus.DELETED in (
+        data_facet_api.get_values_at_path(dict_content, PATH_STATUS)
+    ):
+        return set()
+    return data_facet_api.get_data_category_ids(data, dict_content)
+
+
+def update_data_bitmaps(data):
+    """Update the bitmaps of the categories of the template of a data.
+
+    Args:
+        data:
+
+    Returns:
+        set of category ids
+
+    """
+    category_ids = get_data_category_ids(data)
+    _set_data_categories(data.id, category_ids, data.template.hash)
+    return category_ids
+
+
+def delete_data_bitmaps(data):
+    """Remove a data from the bitmaps of its template.
+
+    Args:
+        data:
+
+    Returns:
+
+    """
+    _set_data_categories(data.id, set(), data.template.hash)
+
+
+def rebuild_bitmaps(template_hash, data_list):
+    """Rebuild all the bitmaps of a template hash.
+
+    Args:
+        template_hash:
+        data_list: all the data of the template hash
+
+    Returns:
+        int: number of data matching at least one category
+
+    """
+    bitmaps = {}
+    data_bitmaps = {}
+    data_count = 0
+    for data in data_list:
+        chunk = data.id >> CHUNK_BITS
+        bit = 1 << (data.id - (chunk << CHUNK_BITS))
+        data_bitmaps[chunk] = data_bitmaps.get(chunk, 0) | bit
+        category_ids = get_data_category_ids(data)
+        if len(category_ids) == 0:
+            continue
+        data_count += 1
+        for category_id in category_ids:
+            chunks = bitmaps.setdefault(category_id, {})
+            chunks[chunk] = chunks.get(chunk, 0) | bit
+
+    CategoryBitmap.replace_by_template_hash(
+        template_hash, bitmaps, data_bitmaps
+    )
+    _invalidate(template_hash)
+    return data_count
+
+
+def _set_data_categories(data_id, category_ids, template_hash):
+    """Set the categories of a data in the bitmaps.
+
+    Args:
+        data_id:
+        category_ids:
+        template_hash:
+
+    Returns:
+
+    """
+    if not template_hash:
+        return
+    new_chunk = CategoryBitmap.set_data_categories(
+        data_id, category_ids, template_hash
+    )
+    if new_chunk and len(category_ids) == 0:
+        # no bitmap before and after
+        return
+    # the processes only reload the bitmaps of the chunk of the data, unless
+    # the chunk is new
+    refinement_cache.invalidate_on_commit(
+        template_hash,
+        (
+            refinement_cache.DATA_SCOPE
+            if new_chunk
+            else refinement_cache.get_data_chunk_scope(data_id >> CHUNK_BITS)
+        ),
+    )
+
+
+def _invalidate(template_hash):
+    """Invalidate all the bitmaps loaded for a template hash.
+
+    Args:
+        template_hash:
+
+    Returns:
+
+    """
+    from core_main_registry_app.utils.refinement import bitmap_index
+
+    refinement_cache.invalidate(template_hash, refinement_cache.DATA_SCOPE)
+    bitmap_index.invalidate(template_hash)
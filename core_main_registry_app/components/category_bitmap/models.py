@@ -0,0 +1,196 @@
+"""Category bitmap model"""
+
+from django.db import models, transaction
+
+from core_main_app.commons import exceptions as exceptions
+
+# Number of data ids of a bitmap chunk (2^CHUNK_BITS)
+CHUNK_BITS = 16
+
+
+class CategoryBitmap(models.Model):
+    """Data ids matching a category, for a chunk of data ids (bitmap)"""
+
+    category = models.ForeignKey(
+        "Category", on_delete=models.CASCADE, related_name="bitmaps"
+    )
+    # data ids from chunk << CHUNK_BITS to (chunk + 1) << CHUNK_BITS
+    chunk = models.PositiveIntegerField()
+    # bit n is set if data (chunk << CHUNK_BITS) + n matches the category
+    bitmap = models.BinaryField()
+
+    class Meta:
+        """Meta"""
+
+        unique_together = (("category", "chunk"),)
+
+    @staticmethod
+    def get_all_by_template_hash(template_hash, chunks=None):
+        """Get all the bitmaps of the categories of a template hash.
+
+        Args:
+            template_hash:
+            chunks: only get the bitmaps of these chunks
+
+        Returns: (category id, chunk, bitmap) collection
+
+        """
+        try:
+            category_bitmaps = CategoryBitmap.objects.filter(
+                category__refinement__template_hashes__template_hash=template_hash
+            )
+            if chunks is not None:
+                category_bitmaps = category_bitmaps.filter(chunk__in=chunks)
+            return category_bitmaps.values_list(
+                "category_id", "chunk", "bitmap"
+            )
+        except Exception as ex:
+            raise exceptions.ModelError(str(ex))
+
+    @staticmethod
+    def get_all_chunks_by_template_hash(template_hash):
+        """Get the chunks having bitmaps for a template hash.
+
+        Args:
+            template_hash:
+
+        Returns: chunk collection
+
+        """
+        try:
+            return (
+                CategoryBitmap.objects.filter(
+                    category__refinement__template_hashes__template_hash=template_hash
+                )
+                .order_by("chunk")
+                .values_list("chunk", flat=True)
+                .distinct()
+            )
+        except Exception as ex:
+            raise exceptions.ModelError(str(ex))
+
+    @staticmethod
+    def set_data_categories(data_id, category_ids, template_hash):
+        """Set the bit of a data in the bitmaps of a template hash.
+
+        Args:
+            data_id:
+            category_ids: categories matched by the data
+            template_hash:
+
+        Returns:
+            bool: True if the chunk of the data had no bitmap
+
+        """
+        chunk = data_id >> CHUNK_BITS
+        bit = 1 << (data_id - (chunk << CHUNK_BITS))
+        try:
+            with transaction.atomic():
+                to_update = []
+                to_delete = []
+                missing_category_ids = set(category_ids)
+                new_chunk = True
+                for (
+                    category_bitmap
+                ) in CategoryBitmap.objects.select_for_update().filter(
+                    category__refinement__template_hashes__template_hash=template_hash,
+                    chunk=chunk,
+                ):
+                    new_chunk = False
+                    bitmap = int.from_bytes(category_bitmap.bitmap, "little")
+                    if category_bitmap.category_id in missing_category_ids:
+                        missing_category_ids.remove(
+                            category_bitmap.category_id
+                        )
+                        new_bitmap = bitmap | bit
+                    else:
+                        new_bitmap = bitmap & ~bit
+
+                    if new_bitmap == 0:
+                        to_delete.append(category_bitmap.id)
+                    elif new_bitmap != bitmap:
+                        category_bitmap.bitmap = to_bytes(new_bitmap)
+                        to_update.append(category_bitmap)
+
+                CategoryBitmap.objects.filter(id__in=to_delete).delete()
+                CategoryBitmap.objects.bulk_update(to_update, ["bitmap"])
+                CategoryBitmap.objects.bulk_create(
+                    [
+                        CategoryBitmap(
+                            category_id=category_id,
+                            chunk=chunk,
+                            bitmap=to_bytes(bit),
+                        )
+                        for category_id in missing_category_ids
+                    ]
+                )
+                return new_chunk
+        except Exception as ex:
+            raise exceptions.ModelError(str(ex))
+
+    @staticmethod
+    def replace_by_template_hash(template_hash, bitmaps, data_bitmaps):
+        """Replace the bits of a set of data in the bitmaps of a template
+        hash. The bits of the other data are kept: categories can be shared
+        by several template hashes.
+
+        Args:
+            template_hash:
+            bitmaps: {category id: {chunk: bitmap (int)}}
+            data_bitmaps: data replaced, {chunk: bitmap (int)}
+
+        Returns:
+
+        """
+        try:
+            with transaction.atomic():
+                category_bitmaps = CategoryBitmap.objects.select_for_update().filter(
+                    category__refinement__template_hashes__template_hash=template_hash
+                )
+                new_bitmaps = {}
+                for category_id, chunk, bitmap in category_bitmaps.values_list(
+                    "category_id", "chunk", "bitmap"
+                ):
+                    new_bitmaps[(category_id, chunk)] = int.from_bytes(
+                        bitmap, "little"
+                    ) & ~data_bitmaps.get(chunk, 0)
+                for category_id, chunks in bitmaps.items():
+                    for chunk, bitmap in chunks.items():
+                        key = (category_id, chunk)
+                        new_bitmaps[key] = new_bitmaps.get(key, 0) | bitmap
+
+                category_bitmaps.delete()
+                CategoryBitmap.objects.bulk_create(
+                    [
+                        CategoryBitmap(
+                            category_id=category_id,
+                            chunk=chunk,
+                            bitmap=to_bytes(bitmap),
+                        )
+                        for (category_id, chunk), bitmap in new_bitmaps.items()
+                        if bitmap != 0
+                    ],
+                    batch_size=1000,
+                )
+        except Exception as ex:
+            raise exceptions.ModelError(str(ex))
+
+    def __str__(self):
+        """Category bitmap as string
+
+        Returns:
+
+        """
+        return f"{self.category_id}: {self.chunk}"
+
+
+def to_bytes(bitmap):
+    """Convert a bitmap to bytes (little endian).
+
+    Args:
+        bitmap: int
+
+    Returns:
+
+    """
+    return bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
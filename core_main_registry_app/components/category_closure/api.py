@@ -0,0 +1,47 @@
+"""Category closure API"""
+
+from django.db.models import Q
+
+from core_main_registry_app.components.category_closure.models import (
+    CategoryClosure,
+)
+
+
+def add_categories(categories):
+    """Add the ancestors of saved categories.
+
+    Args:
+        categories: saved categories, parents before their children
+
+    Returns:
+
+    """
+    return CategoryClosure.add_categories(categories)
+
+
+def move_category(category):
+    """Update the ancestors of a moved category and of its descendants.
+
+    Args:
+        category: moved category
+
+    Returns:
+
+    """
+    return CategoryClosure.move_category(category)
+
+
+def get_all_descendant_ids(category_ids):
+    """Expand a selection of categories to the ids of all their descendants,
+    the selected categories included.
+
+    Args:
+        category_ids:
+
+    Returns:
+        Category ids collection, in tree order
+
+    """
+    return CategoryClosure.get_all_descendant_ids(
+        Q(ancestor_id__in=category_ids)
+    )
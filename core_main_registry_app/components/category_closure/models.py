@@ -0,0 +1,154 @@
+"""Category closure model"""
+
+from django.db import models, transaction
+
+from core_main_app.commons import exceptions as exceptions
+
+BULK_CREATE_BATCH_SIZE = 1000
+
+
+class CategoryClosure(models.Model):
+    """Ancestor of a category, at a depth (closure table). Each category is
+    its own ancestor at depth 0."""
+
+    ancestor = models.ForeignKey(
+        "Category", on_delete=models.CASCADE, related_name="descendant_links"
+    )
+    descendant = models.ForeignKey(
+        "Category", on_delete=models.CASCADE, related_name="ancestor_links"
+    )
+    # number of levels between the ancestor and the descendant
+    depth = models.PositiveIntegerField()
+
+    class Meta:
+        """Meta"""
+
+        unique_together = (("ancestor", "descendant"),)
+        indexes = [models.Index(fields=["descendant", "depth"])]
+
+    @staticmethod
+    def add_categories(categories, batch_size=BULK_CREATE_BATCH_SIZE):
+        """Add the ancestors of saved categories.
+
+        Args:
+            categories: saved categories, parents before their children
+            batch_size:
+
+        Returns:
+
+        """
+        try:
+            # (ancestor id, depth) by category id, from self to root
+            ancestors = {}
+            category_ids = {category.pk for category in categories}
+            parent_ids = {
+                category.parent_id
+                for category in categories
+                if category.parent_id is not None
+                and category.parent_id not in category_ids
+            }
+            if parent_ids:
+                # parents saved before: ancestors from the database
+                for descendant_id, ancestor_id, depth in (
+                    CategoryClosure.objects.filter(
+                        descendant_id__in=parent_ids
+                    )
+                    .order_by("descendant_id", "depth")
+                    .values_list("descendant_id", "ancestor_id", "depth")
+                ):
+                    ancestors.setdefault(descendant_id, []).append(
+                        (ancestor_id, depth)
+                    )
+
+            links = []
+            for category in categories:
+                category_ancestors = [(category.pk, 0)] + [
+                    (ancestor_id, depth + 1)
+                    for ancestor_id, depth in ancestors.get(
+                        category.parent_id, []
+                    )
+                ]
+                ancestors[category.pk] = category_ancestors
+                links.extend(
+                    CategoryClosure(
+                        ancestor_id=ancestor_id,
+                        descendant_id=category.pk,
+                        depth=depth,
+                    )
+                    for ancestor_id, depth in category_ancestors
+                )
+            CategoryClosure.objects.bulk_create(links, batch_size=batch_size)
+        except Exception as ex:
+            raise exceptions.ModelError(str(ex))
+
+    @staticmethod
+    def move_category(category):
+        """Replace the ancestors outside of the subtree of a moved category
+        by the ancestors of its new parent.
+
+        Args:
+            category: moved category
+
+        Returns:
+
+        """
+        try:
+            with transaction.atomic():
+                # (descendant id, depth) in the subtree, category included
+                subtree = list(
+                    CategoryClosure.objects.filter(
+                        ancestor_id=category.pk
+                    ).values_list("descendant_id", "depth")
+                )
+                subtree_ids = [descendant_id for descendant_id, _ in subtree]
+                CategoryClosure.objects.filter(
+                    descendant_id__in=subtree_ids
+                ).exclude(ancestor_id__in=subtree_ids).delete()
+                if category.parent_id is None:
+                    return
+                CategoryClosure.objects.bulk_create(
+                    CategoryClosure(
+                        ancestor_id=ancestor_id,
+                        descendant_id=descendant_id,
+                        depth=ancestor_depth + depth + 1,
+                    )
+                    for ancestor_id, ancestor_depth in (
+                        CategoryClosure.objects.filter(
+                            descendant_id=category.parent_id
+                        ).values_list("ancestor_id", "depth")
+                    )
+                    for descendant_id, depth in subtree
+                )
+        except Exception as ex:
+            raise exceptions.ModelError(str(ex))
+
+    @staticmethod
+    def get_all_descendant_ids(ancestors_filter):
+        """Get the ids of the descendants of the categories matching a
+        filter, the categories included, in a single join.
+
+        Args:
+            ancestors_filter: Q object on the ancestor categories, prefixed
+            by "ancestor__"
+
+        Returns:
+            Category ids collection, in tree order
+
+        """
+        try:
+            return (
+                CategoryClosure.objects.filter(ancestors_filter)
+                .order_by("descendant__tree_id", "descendant__lft")
+                .values_list("descendant_id", flat=True)
+                .distinct()
+            )
+        except Exception as ex:
+            raise exceptions.ModelError(str(ex))
+
+    def __str__(self):
+        """Category closure as string
+
+        Returns:
+
+        """
+        return f"{self.ancestor_id} > {self.descendant_id} ({self.depth})"
@@ -0,0 +1,44 @@
+"""Maintain the category closure table on category events"""
+
+from django.db.models.signals import post_save
+from mptt.signals import node_moved
+
+from core_main_registry_app.components.category.models import Category
+from core_main_registry_app.components.category_closure import (
+    api as category_closure_api,
+)
+
+
+def init():
+    """Connect to category object events."""
+    post_save.connect(post_save_category, sender=Category)
+    node_moved.connect(node_moved_category, sender=Category)
+
+
+def post_save_category(sender, instance, created, raw=False, **kwargs):
+    """Method executed after saving of a Category object: add the ancestors
+    of a new category (the rows are deleted with their category).
+
+    Args:
+        sender: Class.
+        instance: Category object.
+        created: True if a new category was saved.
+        raw: True if the category is loaded from a fixture.
+        **kwargs: Args.
+
+    """
+    if created and not raw:
+        category_closure_api.add_categories([instance])
+
+
+def node_moved_category(sender, instance, **kwargs):
+    """Method executed after moving a Category object in the trees: update
+    the ancestors of the category and of its descendants.
+
+    Args:
+        sender: Class.
+        instance: Category object.
+        **kwargs: Args.
+
+    """
+    category_closure_api.move_category(instance)
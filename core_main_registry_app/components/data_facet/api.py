@@ -0,0 +1,168 @@
+"""Data facet value API"""
+
+import logging
+
+from django.db.models import Q
+
+from core_main_app.settings import XML_POST_PROCESSOR, XML_FORCE_LIST
+from core_main_app.utils import xml as xml_utils
+from core_main_registry_app.components.data_facet.models import (
+    DataFacetValue,
+)
+from core_main_registry_app.utils.refinement import category_index
+
+logger = logging.getLogger("core_main_registry_app.components.data_facet.api")
+
+
+def get_all_by_data_id(data_id):
+    """Get all the facet values of a data.
+
+    Args:
+        data_id:
+
+    Returns: DataFacetValue collection
+
+    """
+    return DataFacetValue.get_all_by_data_id(data_id)
+
+
+def get_values_at_path(dict_content, path):
+    """Get the values found at a dot notation path of a dict.
+
+    Lists are traversed. If the element has attributes, its value is read
+    from the '#text' key.
+
+    Args:
+        dict_content:
+        path: dot notation path
+
+    Returns:
+        list of str
+
+    """
+    nodes = [dict_content]
+    for key in path.split("."):
+        next_nodes = []
+        for node in nodes:
+            if isinstance(node, dict) and key in node:
+                child = node[key]
+                if isinstance(child, list):
+                    next_nodes.extend(child)
+                else:
+                    next_nodes.append(child)
+        nodes = next_nodes
+
+    values = []
+    for node in nodes:
+        if isinstance(node, dict):
+            node = node.get("#text")
+        if node is not None and not isinstance(node, (dict, list)):
+            values.append(str(node))
+    return values
+
+
+def get_category_ids(dict_content, template_hash):
+    """Get the ids of the categories matched by a dict content.
+
+    Args:
+        dict_content:
+        template_hash:
+
+    Returns:
+        set of category ids
+
+    """
+    index = category_index.get_index(template_hash)
+    category_ids = set()
+    for path in index.paths:
+        for value in get_values_at_path(dict_content, path):
+            category_ids.update(index.get_ids(path, value))
+    return category_ids
+
+
+def get_data_dict_content(data):
+    """Get the dict content of a data.
+
+    Args:
+        data:
+
+    Returns:
+        dict or None
+
+    """
+    dict_content = data.dict_content
+    if dict_content is None and data.content:
+        # dict content is not stored in the data when indexing with MongoDB
+        dict_content = xml_utils.raw_xml_to_dict(
+            data.content,
+            postprocessor=XML_POST_PROCESSOR,
+            force_list=XML_FORCE_LIST,
+        )
+    return dict_content
+
+
+def get_data_category_ids(data, dict_content=None):
+    """Get the ids of the categories matched by a data.
+
+    Args:
+        data:
+        dict_content: dict content of the data, read from the data if None
+
+    Returns:
+        set of category ids
+
+    """
+    template_hash = data.template.hash
+    if dict_content is None:
+        dict_content = get_data_dict_content(data)
+    return (
+        get_category_ids(dict_content, template_hash)
+        if dict_content and template_hash
+        else set()
+    )
+
+
+def upsert_data_facet_values(data):
+    """Compute and save the facet values of a data.
+
+    Args:
+        data:
+
+    Returns:
+        set of category ids
+
+    """
+    category_ids = get_data_category_ids(data)
+    DataFacetValue.replace_by_data_id(data.id, category_ids)
+    return category_ids
+
+
+def get_data_query_from_refinements(refinements):
+    """Get a query on the data matching the refinements.
+
+    Categories of a same refinement are OR-ed, refinements are AND-ed.
+
+    Args:
+        refinements: list of list of category ids
+
+    Returns:
+        Q object on Data
+
+    """
+    query = Q()
+    for refinement in refinements:
+        category_ids = []
+        for category_id in refinement:
+            try:
+                category_ids.append(int(category_id))
+            except (TypeError, ValueError):
+                logger.warning(
+                    "Invalid category id (%s) ignored.", str(category_id)
+                )
+        if len(category_ids) > 0:
+            query &= Q(
+                id__in=DataFacetValue.get_data_ids_by_category_ids(
+                    category_ids
+                )
+            )
+    return query
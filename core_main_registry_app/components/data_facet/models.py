@@ -0,0 +1,82 @@
+"""Data facet value model"""
+
+from django.db import models, transaction
+
+from core_main_app.commons import exceptions as exceptions
+from core_main_app.components.data.models import Data
+
+
+class DataFacetValue(models.Model):
+    """Category matched by a data (materialized refinement value)"""
+
+    data = models.ForeignKey(
+        Data, on_delete=models.CASCADE, related_name="facet_values"
+    )
+    category = models.ForeignKey(
+        "Category", on_delete=models.CASCADE, related_name="facet_values"
+    )
+
+    class Meta:
+        """Meta"""
+
+        unique_together = (("data", "category"),)
+        indexes = [models.Index(fields=["category", "data"])]
+
+    @staticmethod
+    def get_all_by_data_id(data_id):
+        """Get all the facet values of a data.
+
+        Args:
+            data_id:
+
+        Returns: DataFacetValue collection
+
+        """
+        return DataFacetValue.objects.filter(data_id=data_id)
+
+    @staticmethod
+    def get_data_ids_by_category_ids(category_ids):
+        """Get the ids of the data matching at least one of the categories.
+
+        Args:
+            category_ids:
+
+        Returns: data id collection
+
+        """
+        return DataFacetValue.objects.filter(
+            category_id__in=category_ids
+        ).values("data_id")
+
+    @staticmethod
+    def replace_by_data_id(data_id, category_ids):
+        """Replace the facet values of a data.
+
+        Args:
+            data_id:
+            category_ids:
+
+        Returns:
+
+        """
+        try:
+            with transaction.atomic():
+                DataFacetValue.objects.filter(data_id=data_id).delete()
+                DataFacetValue.objects.bulk_create(
+                    [
+                        DataFacetValue(
+                            data_id=data_id, category_id=category_id
+                        )
+                        for category_id in category_ids
+                    ]
+                )
+        except Exception as ex:
+            raise exceptions.ModelError(str(ex))
+
+    def __str__(self):
+        """Data facet value as string
+
+        Returns:
+
+        """
+        return f"{self.data_id}: {self.category_id}"
@@ -0,0 +1,67 @@
+"""Flattened schema API"""
+
+import logging
+
+from core_main_app.commons import exceptions as exceptions
+from core_main_app.utils.xsd_flattener.xsd_flattener_database_url import (
+    XSDFlattenerDatabaseOrURL,
+)
+from core_main_registry_app.components.flattened_schema.models import (
+    FlattenedSchema,
+)
+
+logger = logging.getLogger(
+    "core_main_registry_app.components.flattened_schema.api"
+)
+
+
+def get_flat(template):
+    """Get the flattened content of a template. The flattened content is
+    computed once per template hash, then read from the database.
+
+    Args:
+        template:
+
+    Returns:
+        str
+
+    """
+    template_hash = template.hash
+    if template_hash:
+        try:
+            return FlattenedSchema.get_by_template_hash(template_hash).content
+        except exceptions.DoesNotExist:
+            pass
+        except Exception as exception:
+            logger.warning(
+                "Unable to read the flattened schema (%s): %s.",
+                template_hash,
+                str(exception),
+            )
+
+    content = XSDFlattenerDatabaseOrURL(
+        template.content, request=None
+    ).get_flat()
+
+    if template_hash:
+        try:
+            FlattenedSchema.upsert(template_hash, content)
+        except Exception as exception:
+            logger.warning(
+                "Unable to save the flattened schema (%s): %s.",
+                template_hash,
+                str(exception),
+            )
+    return content
+
+
+def delete_all(template_hash=None):
+    """Delete the flattened schemas, so they are computed again.
+
+    Args:
+        template_hash: only delete the flattened schema of this hash
+
+    Returns:
+
+    """
+    FlattenedSchema.delete_all(template_hash)
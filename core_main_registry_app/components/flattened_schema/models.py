@@ -0,0 +1,81 @@
+"""Flattened schema model"""
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import models
+
+from core_main_app.commons import exceptions as exceptions
+
+
+class FlattenedSchema(models.Model):
+    """Flattened content (includes and imports resolved) of a template"""
+
+    # Cannot use a ReferenceField to template: not same database. Use the template hash instead.
+    template_hash = models.CharField(max_length=255, unique=True)
+    content = models.TextField()
+    creation_date = models.DateTimeField(auto_now_add=True)
+
+    @staticmethod
+    def get_by_template_hash(template_hash):
+        """Get the flattened schema of a template hash.
+
+        Args:
+            template_hash:
+
+        Returns:
+            FlattenedSchema object
+
+        """
+        try:
+            return FlattenedSchema.objects.get(template_hash=template_hash)
+        except ObjectDoesNotExist as exception:
+            raise exceptions.DoesNotExist(str(exception))
+        except Exception as ex:
+            raise exceptions.ModelError(str(ex))
+
+    @staticmethod
+    def upsert(template_hash, content):
+        """Save the flattened schema of a template hash.
+
+        Args:
+            template_hash:
+            content:
+
+        Returns:
+            FlattenedSchema object
+
+        """
+        try:
+            flattened_schema, _ = FlattenedSchema.objects.update_or_create(
+                template_hash=template_hash, defaults={"content": content}
+            )
+            return flattened_schema
+        except Exception as ex:
+            raise exceptions.ModelError(str(ex))
+
+    @staticmethod
+    def delete_all(template_hash=None):
+        """Delete the flattened schemas.
+
+        Args:
+            template_hash: only delete the flattened schema of this hash
+
+        Returns:
+
+        """
+        try:
+            flattened_schemas = FlattenedSchema.objects.all()
+            if template_hash:
+                flattened_schemas = flattened_schemas.filter(
+                    template_hash=template_hash
+                )
+            flattened_schemas.delete()
+        except Exception as ex:
+            raise exceptions.ModelError(str(ex))
+
+    def __str__(self):
+        """Flattened schema as string
+
+        Returns:
+
+        """
+        return self.template_hash
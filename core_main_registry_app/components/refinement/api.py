@@ -1,15 +1,17 @@
 """Refinement API"""
 
 from core_main_registry_app.components.refinement.models import Refinement
+from core_main_registry_app.utils.refinement import cache as refinement_cache
 
 
-def create_and_save(name, xsd_name, template_hash):
+def create_and_save(name, xsd_name, template_hash, fingerprint=""):
     """Create and save a refinement.
 
     Args:
         name:
         xsd_name:
         template_hash:
+        fingerprint: hash of the name and of the categories tree
 
     Returns:
 
@@ -17,10 +19,60 @@ def create_and_save(name, xsd_name, template_hash):
 
     # Save refinement
     return Refinement.create_and_save(
-        name=name, xsd_name=xsd_name, template_hash=template_hash
+        name=name,
+        xsd_name=xsd_name,
+        template_hash=template_hash,
+        fingerprint=fingerprint,
     )
 
 
+def get_last_by_fingerprint(fingerprint):
+    """Get the last refinement created with a fingerprint.
+
+    Args:
+        fingerprint:
+
+    Returns: Refinement
+
+    """
+    return Refinement.get_last_by_fingerprint(fingerprint)
+
+
+def add_template_hash(refinement, template_hash):
+    """Share a refinement with a template hash.
+
+    Args:
+        refinement:
+        template_hash:
+
+    Returns:
+
+    """
+    return Refinement.add_template_hash(refinement, template_hash)
+
+
+def delete_by_template_hash(template_hash):
+    """Delete the refinements of a template hash. The refinements shared with
+    other template hashes are kept for them.
+
+    Args:
+        template_hash:
+
+    Returns:
+
+    """
+    return Refinement.delete_by_template_hash(template_hash)
+
+
+def get_all_template_hashes():
+    """Get the template hashes having refinements.
+
+    Returns: set of template hashes
+
+    """
+    return Refinement.get_all_template_hashes()
+
+
 def get_all():
     """Get all refinements.
 
@@ -44,6 +96,31 @@ def get_all_filtered_by_template_hash(template_hash):
     )
 
 
+def get_all_values_by_template_hash(template_hash):
+    """Get the values of all the refinements of a template hash.
+
+    Args:
+        template_hash:
+
+    Returns:
+        list of dict: id, name, xsd_name, slug and template_hash of each
+        refinement, read through the refinement cache
+
+    """
+    return [
+        dict(refinement)
+        for refinement in refinement_cache.get_or_load(
+            template_hash,
+            "refinements",
+            "",
+            lambda: list(
+                Refinement.get_all_values_by_template_hash(template_hash)
+            ),
+            cache_empty=False,
+        )
+    ]
+
+
 def check_refinements_already_exist_by_template_hash(template_hash):
     """Check if the refinements have already been generated for the template.
 
@@ -54,8 +131,14 @@ def check_refinements_already_exist_by_template_hash(template_hash):
         Boolean: True/False
 
     """
-    return Refinement.check_refinements_already_exist_by_template_hash(
-        template_hash
+    return refinement_cache.get_or_load(
+        template_hash,
+        "refinements_exist",
+        "",
+        lambda: Refinement.check_refinements_already_exist_by_template_hash(
+            template_hash
+        ),
+        cache_empty=False,
     )
 
 
@@ -1,9 +1,10 @@
 """Refinement model"""
 
-from django.db import models
+from django.db import models, transaction
 from django_extensions.db.fields import AutoSlugField
 
 from core_main_app.commons import exceptions as exceptions
+from core_main_registry_app.utils.refinement import cache as refinement_cache
 
 
 class Refinement(models.Model):
@@ -11,7 +12,13 @@ class Refinement(models.Model):
     xsd_name = models.CharField(max_length=50, default="")
     slug = AutoSlugField(max_length=50, overwrite=True, populate_from="name")
     # Cannot use a ReferenceField to template: not same database. Use the template hash instead.
+    # Template hash the refinement was created for. The refinement can be
+    # shared with other template hashes, see RefinementTemplateHash.
     template_hash = models.CharField(max_length=255)
+    # Hash of the name and of the categories tree, empty if unknown
+    fingerprint = models.CharField(
+        max_length=64, default="", blank=True, db_index=True
+    )
 
     def __unicode__(self):
         return self.name
@@ -35,24 +42,136 @@ class Refinement(models.Model):
         Returns: Refinement collection
 
         """
-        return Refinement.objects.all().filter(template_hash=template_hash)
+        return (
+            Refinement.objects.all()
+            .filter(template_hashes__template_hash=template_hash)
+            .order_by("template_hashes__id")
+        )
+
+    @staticmethod
+    def get_all_values_by_template_hash(template_hash):
+        """Get the values of all the refinements of a template hash.
+
+        Args:
+            template_hash:
+
+        Returns: Refinement values collection
+
+        """
+        return Refinement.get_all_filtered_by_template_hash(
+            template_hash
+        ).values("id", "name", "xsd_name", "slug", "template_hash")
 
     @staticmethod
-    def create_and_save(name, xsd_name, template_hash):
+    def create_and_save(name, xsd_name, template_hash, fingerprint=""):
         """Create and save a refinement.
 
         Args:
             name:
             xsd_name:
             template_hash:
+            fingerprint:
+
+        Returns:
+
+        """
+        with transaction.atomic():
+            refinement = Refinement.objects.create(
+                name=name,
+                xsd_name=xsd_name,
+                template_hash=template_hash,
+                fingerprint=fingerprint,
+            )
+            RefinementTemplateHash.objects.create(
+                refinement=refinement, template_hash=template_hash
+            )
+            refinement_cache.invalidate_on_commit(template_hash)
+        return refinement
+
+    @staticmethod
+    def add_template_hash(refinement, template_hash):
+        """Share a refinement with a template hash.
+
+        Args:
+            refinement:
+            template_hash:
+
+        Returns:
+
+        """
+        try:
+            RefinementTemplateHash.objects.get_or_create(
+                refinement=refinement, template_hash=template_hash
+            )
+            refinement_cache.invalidate_on_commit(template_hash)
+        except Exception as ex:
+            raise exceptions.ModelError(str(ex))
+
+    @staticmethod
+    def delete_by_template_hash(template_hash):
+        """Delete the refinements of a template hash. The refinements shared
+        with other template hashes are kept for them.
+
+        Args:
+            template_hash:
 
         Returns:
 
         """
-        return Refinement.objects.create(
-            name=name, xsd_name=xsd_name, template_hash=template_hash
+        try:
+            with transaction.atomic():
+                template_hashes = RefinementTemplateHash.objects.filter(
+                    template_hash=template_hash
+                )
+                refinement_ids = list(
+                    template_hashes.values_list("refinement_id", flat=True)
+                )
+                template_hashes.delete()
+                Refinement.objects.filter(
+                    pk__in=refinement_ids, template_hashes__isnull=True
+                ).delete()
+                refinement_cache.invalidate_on_commit(template_hash)
+        except Exception as ex:
+            raise exceptions.ModelError(str(ex))
+
+    @staticmethod
+    def get_all_template_hashes():
+        """Get the template hashes having refinements.
+
+        Returns: set of template hashes
+
+        """
+        return set(
+            RefinementTemplateHash.objects.values_list(
+                "template_hash", flat=True
+            )
         )
 
+    @staticmethod
+    def get_last_by_fingerprint(fingerprint):
+        """Get the last refinement created with a fingerprint.
+
+        Args:
+            fingerprint:
+
+        Returns: Refinement
+
+        """
+        try:
+            refinement = (
+                Refinement.objects.filter(fingerprint=fingerprint)
+                .exclude(fingerprint="")
+                .order_by("-id")
+                .first()
+            )
+        except Exception as ex:
+            raise exceptions.ModelError(str(ex))
+        if refinement is None:
+            raise exceptions.DoesNotExist(
+                f"No refinement found with fingerprint {fingerprint}."
+            )
+        return refinement
+
     @staticmethod
     def check_refinements_already_exist_by_template_hash(template_hash):
         """Check if the refinements have already been generated for the template.
@@ -64,10 +183,9 @@ class Refinement(models.Model):
             Boolean: True/False
 
         """
-        return (
-            len(Refinement.get_all_filtered_by_template_hash(template_hash))
-            > 0
-        )
+        return Refinement.objects.filter(
+            template_hashes__template_hash=template_hash
+        ).exists()
 
     @staticmethod
     def get_by_template_hash_and_by_slug(template_hash, slug):
@@ -81,9 +199,14 @@ class Refinement(models.Model):
 
         """
         try:
-            return Refinement.objects.get(
-                template_hash=template_hash, slug__startswith=slug
+            refinements = Refinement.objects.filter(
+                template_hashes__template_hash=template_hash
             )
+            try:
+                # exact slug first: uses the slug index
+                return refinements.get(slug=slug)
+            except Refinement.DoesNotExist:
+                return refinements.get(slug__startswith=slug)
         except Refinement.DoesNotExist as exception:
             raise exceptions.DoesNotExist(str(exception))
         except Exception as ex:
@@ -96,3 +219,32 @@ class Refinement(models.Model):
 
         """
         return self.name
+
+
+class RefinementTemplateHash(models.Model):
+    """Template hash using a refinement"""
+
+    refinement = models.ForeignKey(
+        Refinement, on_delete=models.CASCADE, related_name="template_hashes"
+    )
+    # Cannot use a ReferenceField to template: not same database. Use the template hash instead.
+    template_hash = models.CharField(max_length=255)
+
+    class Meta:
+        """Meta"""
+
+        unique_together = (("refinement", "template_hash"),)
+        indexes = [
+            models.Index(
+                fields=["template_hash", "refinement"],
+                name="registry_refinement_hash_idx",
+            )
+        ]
+
+    def __str__(self):
+        """Refinement template hash as string
+
+        Returns:
+
+        """
+        return f"{self.template_hash}: {self.refinement_id}"
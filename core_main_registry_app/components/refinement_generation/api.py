@@ -0,0 +1,85 @@
+"""Refinement generation API"""
+
+from core_main_registry_app.commons.constants import (
+    RefinementGenerationStatus,
+)
+from core_main_registry_app.components.refinement_generation.models import (
+    RefinementGeneration,
+)
+from core_main_registry_app.settings import REFINEMENT_GENERATION_TIMEOUT
+
+
+def get_by_template_hash(template_hash):
+    """Get the generation of the refinements of a template hash.
+
+    Args:
+        template_hash:
+
+    Returns:
+
+    """
+    return RefinementGeneration.get_by_template_hash(template_hash)
+
+
+def enqueue(template_hash, task_id=""):
+    """Mark the generation of the refinements of a template hash as pending.
+
+    Args:
+        template_hash:
+        task_id: id of the task that will generate the refinements
+
+    Returns:
+        bool: False if the generation is already pending, running or done
+
+    """
+    return RefinementGeneration.claim(
+        template_hash,
+        RefinementGenerationStatus.PENDING,
+        task_id,
+        (RefinementGenerationStatus.FAILED,),
+        REFINEMENT_GENERATION_TIMEOUT,
+    )
+
+
+def start(template_hash, task_id=""):
+    """Start the generation of the refinements of a template hash.
+
+    Args:
+        template_hash:
+        task_id: id of the task generating the refinements
+
+    Returns:
+        bool: False if the generation is already running
+
+    """
+    return RefinementGeneration.claim(
+        template_hash,
+        RefinementGenerationStatus.RUNNING,
+        task_id,
+        (
+            RefinementGenerationStatus.PENDING,
+            RefinementGenerationStatus.FAILED,
+            RefinementGenerationStatus.DONE,
+        ),
+        REFINEMENT_GENERATION_TIMEOUT,
+    )
+
+
+def finish(template_hash, success=True):
+    """Finish the generation of the refinements of a template hash.
+
+    Args:
+        template_hash:
+        success:
+
+    Returns:
+
+    """
+    RefinementGeneration.set_status(
+        template_hash,
+        (
+            RefinementGenerationStatus.DONE
+            if success
+            else RefinementGenerationStatus.FAILED
+        ),
+    )
@@ -0,0 +1,124 @@
+"""Refinement generation model"""
+
+from datetime import timedelta
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core_main_app.commons import exceptions as exceptions
+from core_main_registry_app.commons.constants import (
+    RefinementGenerationStatus,
+)
+
+
+class RefinementGeneration(models.Model):
+    """Generation of the refinements of a template hash. The unique template
+    hash makes a single generation run at a time for a template hash."""
+
+    # Cannot use a ReferenceField to template: not same database. Use the template hash instead.
+    template_hash = models.CharField(max_length=255, unique=True)
+    status = models.CharField(
+        max_length=20, default=RefinementGenerationStatus.PENDING
+    )
+    # Id of the celery task generating the refinements
+    task_id = models.CharField(max_length=255, blank=True, default="")
+    update_date = models.DateTimeField(default=timezone.now)
+
+    @staticmethod
+    def get_by_template_hash(template_hash):
+        """Get the generation of the refinements of a template hash.
+
+        Args:
+            template_hash:
+
+        Returns:
+            RefinementGeneration object
+
+        """
+        try:
+            return RefinementGeneration.objects.get(
+                template_hash=template_hash
+            )
+        except RefinementGeneration.DoesNotExist as exception:
+            raise exceptions.DoesNotExist(str(exception))
+        except Exception as ex:
+            raise exceptions.ModelError(str(ex))
+
+    @staticmethod
+    def claim(template_hash, status, task_id, from_statuses, timeout):
+        """Set the status of a generation, if it does not exist or has one
+        of the given statuses. Generations pending or running for more than
+        the timeout are abandoned and can be claimed.
+
+        Args:
+            template_hash:
+            status: new status
+            task_id:
+            from_statuses: statuses that can be replaced
+            timeout: in seconds
+
+        Returns:
+            bool: True if the generation was claimed
+
+        """
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                RefinementGeneration.objects.create(
+                    template_hash=template_hash,
+                    status=status,
+                    task_id=task_id,
+                    update_date=now,
+                )
+            return True
+        except IntegrityError:
+            pass
+
+        try:
+            # conditional update: a single process can claim the generation
+            return (
+                RefinementGeneration.objects.filter(
+                    template_hash=template_hash
+                )
+                .filter(
+                    Q(status__in=from_statuses)
+                    | Q(
+                        status__in=(
+                            RefinementGenerationStatus.PENDING,
+                            RefinementGenerationStatus.RUNNING,
+                        ),
+                        update_date__lt=now - timedelta(seconds=timeout),
+                    )
+                )
+                .update(status=status, task_id=task_id, update_date=now)
+                > 0
+            )
+        except Exception as ex:
+            raise exceptions.ModelError(str(ex))
+
+    @staticmethod
+    def set_status(template_hash, status):
+        """Set the status of the generation of a template hash.
+
+        Args:
+            template_hash:
+            status:
+
+        Returns:
+
+        """
+        try:
+            RefinementGeneration.objects.filter(
+                template_hash=template_hash
+            ).update(status=status, update_date=timezone.now())
+        except Exception as ex:
+            raise exceptions.ModelError(str(ex))
+
+    def __str__(self):
+        """Refinement generation as string
+
+        Returns:
+
+        """
+        return f"{self.template_hash}: {self.status}"
@@ -5,7 +5,10 @@ import logging
 from os.path import join
 
 from django.contrib.staticfiles import finders
+from django.db import connection
 from django.db.migrations.exceptions import BadMigrationError
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models.signals import post_migrate
 
 from core_main_app.components.template_version_manager.models import (
     TemplateVersionManager,
@@ -33,13 +36,26 @@ from core_main_registry_app.utils.refinement import refinement
 
 logger = logging.getLogger(__name__)
 
+INIT_REGISTRY_DISPATCH_UID = "core_main_registry_app_init_registry"
+
 
 def init_registry():
     """Initialize the registry.
        Add the registry template, refinements, and resources.
 
+       The registry is initialized with the current models: while migrations
+       are pending, it is done once they are applied.
+
     Returns:
     """
+    if _has_pending_migrations():
+        post_migrate.connect(
+            _init_registry_after_migrate,
+            weak=False,
+            dispatch_uid=INIT_REGISTRY_DISPATCH_UID,
+        )
+        return
+
     # Check if data were previously inserted
     if (
         TemplateVersionManager.objects.count() > 0
@@ -145,3 +161,27 @@ def init_registry():
         default_detail_xslt=detail_xslt,
         list_detail_xslt=[detail_xslt],
     )
+
+
+def _init_registry_after_migrate(sender, **kwargs):
+    """Initialize the registry after the migrations, once.
+
+    Args:
+        sender:
+        kwargs:
+
+    Returns:
+
+    """
+    post_migrate.disconnect(dispatch_uid=INIT_REGISTRY_DISPATCH_UID)
+    init_registry()
+
+
+def _has_pending_migrations():
+    """Check if some migrations are not applied to the database.
+
+    Returns:
+
+    """
+    executor = MigrationExecutor(connection)
+    return len(executor.migration_plan(executor.loader.graph.leaf_nodes())) > 0
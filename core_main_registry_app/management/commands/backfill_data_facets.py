@@ -0,0 +1,108 @@
+"""Backfill data facet values command"""
+
+import logging
+from argparse import BooleanOptionalAction
+
+from django.core.management import BaseCommand, CommandError
+from django.db.models import Q
+
+from core_main_app.components.data.models import Data
+from core_main_registry_app.components.data_facet import (
+    api as data_facet_api,
+)
+from core_main_registry_app.components.refinement.models import Refinement
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """Compute the facet values of existing data command"""
+
+    help = "Compute the refinement facet values of existing data"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--template-hash",
+            default=None,
+            type=str,
+            help="Only process the data of templates with this hash",
+        )
+        parser.add_argument(
+            "--batch-size",
+            default=500,
+            type=int,
+            help="Number of data loaded from the database at once",
+        )
+        parser.add_argument(
+            "--dry-run",
+            default=False,
+            action=BooleanOptionalAction,
+            help="Dry run",
+        )
+
+    def handle(self, *args, **options):
+        """Compute the facet values of existing data.
+
+        Parameters:
+            "template-hash": string,
+            "batch-size": integer,
+            "dry-run": boolean
+
+        Examples:
+            backfill_data_facets
+            backfill_data_facets --template-hash <hash>
+            backfill_data_facets --batch-size 1000 --dry-run
+
+        Args:
+            args:
+            options:
+
+        """
+        try:
+            template_hash = options["template_hash"]
+            batch_size = options["batch_size"]
+            dry_run = options["dry_run"]
+
+            if dry_run:
+                self.stdout.write("Dry run: no facet values will be saved.")
+
+            if batch_size < 1:
+                raise CommandError("--batch-size should be positive.")
+
+            # only data of templates with refinements can have facet values
+            template_hashes = Refinement.get_all_template_hashes()
+            if template_hash:
+                template_hashes &= {template_hash}
+
+            data_list = (
+                Data.objects.filter(
+                    Q(template___hash__in=template_hashes)
+                    | Q(template__checksum__in=template_hashes)
+                )
+                .select_related("template")
+                .order_by("pk")
+            )
+            self.stdout.write(f"{data_list.count()} data will be processed.")
+
+            processed = errors = 0
+            for data in data_list.iterator(chunk_size=batch_size):
+                try:
+                    if dry_run:
+                        data_facet_api.get_data_category_ids(data)
+                    else:
+                        data_facet_api.upsert_data_facet_values(data)
+                    processed += 1
+                except Exception as exception:
+                    errors += 1
+                    self.stderr.write(
+                        f"ERROR: Unable to process data {data.pk}: {str(exception)}"
+                    )
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Command completed: {processed} data processed, {errors} errors."
+                )
+            )
+        except CommandError:
+            raise
+        except Exception as api_exception:
+            raise CommandError(f"{str(api_exception)}")
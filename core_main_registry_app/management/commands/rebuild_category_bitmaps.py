@@ -0,0 +1,86 @@
+"""Rebuild category bitmaps command"""
+
+import logging
+
+from django.core.management import BaseCommand, CommandError
+from django.db.models import Q
+
+from core_main_app.components.data.models import Data
+from core_main_registry_app.components.category_bitmap import (
+    api as category_bitmap_api,
+)
+from core_main_registry_app.components.refinement.models import Refinement
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """Rebuild the category bitmaps from existing data command"""
+
+    help = (
+        "Rebuild the bitmaps of the refinement categories from existing data"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--template-hash",
+            default=None,
+            type=str,
+            help="Only rebuild the bitmaps of the templates with this hash",
+        )
+        parser.add_argument(
+            "--batch-size",
+            default=500,
+            type=int,
+            help="Number of data loaded from the database at once",
+        )
+
+    def handle(self, *args, **options):
+        """Rebuild the category bitmaps from existing data.
+
+        Parameters:
+            "template-hash": string,
+            "batch-size": integer
+
+        Examples:
+            rebuild_category_bitmaps
+            rebuild_category_bitmaps --template-hash <hash>
+            rebuild_category_bitmaps --batch-size 1000
+
+        Args:
+            args:
+            options:
+
+        """
+        try:
+            template_hash = options["template_hash"]
+            batch_size = options["batch_size"]
+
+            if batch_size < 1:
+                raise CommandError("--batch-size should be positive.")
+
+            # only templates with refinements have categories
+            template_hashes = Refinement.get_all_template_hashes()
+            if template_hash:
+                template_hashes &= {template_hash}
+
+            for current_hash in sorted(template_hashes):
+                data_list = (
+                    Data.objects.filter(
+                        Q(template___hash=current_hash)
+                        | Q(template__checksum=current_hash)
+                    )
+                    .select_related("template")
+                    .order_by("pk")
+                )
+                data_count = category_bitmap_api.rebuild_bitmaps(
+                    current_hash, data_list.iterator(chunk_size=batch_size)
+                )
+                self.stdout.write(
+                    f"{current_hash}: {data_count} data matching a category."
+                )
+            self.stdout.write(self.style.SUCCESS("Command completed."))
+        except CommandError:
+            raise
+        except Exception as api_exception:
+            raise CommandError(f"{str(api_exception)}")
@@ -0,0 +1,177 @@
+"""Rebuild refinements command"""
+
+import logging
+import time
+from argparse import BooleanOptionalAction
+
+from django.core.management import BaseCommand, CommandError
+
+from core_main_app.system import api as system_api
+from core_main_registry_app.settings import (
+    ENABLE_CATEGORY_BITMAPS,
+    ENABLE_DATA_FACETS,
+)
+from core_main_registry_app.utils.refinement import refinement
+from core_main_registry_app.utils.refinement.tools import xsd_refinements
+
+logger = logging.getLogger(__name__)
+
+STAGES = (
+    xsd_refinements.FLATTEN_STAGE,
+    xsd_refinements.PARSE_STAGE,
+    xsd_refinements.EXTRACT_STAGE,
+    xsd_refinements.TREE_BUILD_STAGE,
+    refinement.DB_WRITE_STAGE,
+)
+
+
+class Command(BaseCommand):
+    """Rebuild or verify the refinements of the templates command"""
+
+    help = "Rebuild or verify the refinements of the templates and time each stage of their generation"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--template-hash",
+            default=None,
+            type=str,
+            help="Only process the templates with this hash",
+        )
+        parser.add_argument(
+            "--template-id",
+            default=None,
+            type=str,
+            help="Only process the template with this id",
+        )
+        parser.add_argument(
+            "--verify",
+            default=False,
+            action=BooleanOptionalAction,
+            help="Only check that the refinements are up to date",
+        )
+        parser.add_argument(
+            "--workers",
+            default=None,
+            type=int,
+            help="Number of processes extracting the refinements (the "
+            "generation task always extracts them in the current process)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            default=False,
+            action=BooleanOptionalAction,
+            help="Dry run",
+        )
+
+    def handle(self, *args, **options):
+        """Rebuild or verify the refinements of the templates.
+
+        Parameters:
+            "template-hash": string,
+            "template-id": string,
+            "verify": boolean,
+            "workers": integer,
+            "dry-run": boolean
+
+        Examples:
+            rebuild_refinements
+            rebuild_refinements --template-hash <hash> --workers 4
+            rebuild_refinements --verify
+            rebuild_refinements --dry-run
+
+        Args:
+            args:
+            options:
+
+        """
+        try:
+            template_hash = options["template_hash"]
+            template_id = options["template_id"]
+            verify = options["verify"]
+            workers = options["workers"]
+            dry_run = options["dry_run"]
+
+            if dry_run:
+                self.stdout.write("Dry run: no refinement will be saved.")
+
+            if workers is not None and workers < 0:
+                raise CommandError("--workers should be positive.")
+
+            templates = system_api.get_all_templates().order_by("pk")
+            if template_id:
+                templates = templates.filter(pk=template_id)
+
+            processed = stale = errors = 0
+            template_hashes = set()
+            for template in templates:
+                # the templates with the same hash share their refinements
+                if not template.hash or template.hash in template_hashes:
+                    continue
+                if template_hash and template.hash != template_hash:
+                    continue
+                template_hashes.add(template.hash)
+
+                timings = {}
+                start = time.perf_counter()
+                try:
+                    if verify:
+                        status = (
+                            "up to date"
+                            if refinement.verify_refinements(
+                                template, timings=timings, workers=workers
+                            )
+                            else "stale"
+                        )
+                    elif dry_run:
+                        refinements_trees = (
+                            xsd_refinements.loads_refinements_trees(
+                                template, workers=workers, timings=timings
+                            )
+                        )
+                        status = f"{len(refinements_trees)} refinements"
+                    else:
+                        refinement.init_refinements(
+                            template,
+                            timings=timings,
+                            workers=workers,
+                            rebuild=True,
+                        )
+                        status = "rebuilt"
+                    processed += 1
+                    stale += status == "stale"
+                except Exception as exception:
+                    errors += 1
+                    self.stderr.write(
+                        f"ERROR: Unable to process template {template.pk}: {str(exception)}"
+                    )
+                    continue
+                self.stdout.write(
+                    f"{template.hash} (template {template.pk}): {status}, "
+                    f"{time.perf_counter() - start:.3f}s ("
+                    + ", ".join(
+                        f"{stage}: {timings[stage]:.3f}s"
+                        for stage in STAGES
+                        if stage in timings
+                    )
+                    + ")"
+                )
+
+            if not verify and not dry_run and processed:
+                if ENABLE_DATA_FACETS:
+                    self.stdout.write(
+                        "Run backfill_data_facets to update the facet values."
+                    )
+                if ENABLE_CATEGORY_BITMAPS:
+                    self.stdout.write(
+                        "Run rebuild_category_bitmaps to update the bitmaps."
+                    )
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Command completed: {processed} templates processed, "
+                    f"{stale} stale, {errors} errors."
+                )
+            )
+        except CommandError:
+            raise
+        except Exception as api_exception:
+            raise CommandError(f"{str(api_exception)}")
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core_main_app", "0014_data_processing_module"),
+        ("core_main_registry_app", "0002_init_data"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DataFacetValue",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "category",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="facet_values",
+                        to="core_main_registry_app.category",
+                    ),
+                ),
+                (
+                    "data",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="facet_values",
+                        to="core_main_app.data",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["category", "data"],
+                        name="core_main_r_categor_a3237d_idx",
+                    )
+                ],
+                "unique_together": {("data", "category")},
+            },
+        ),
+    ]
@@ -0,0 +1,99 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:10
+
+import hashlib
+
+from django.db import migrations
+
+PATH_INDEX_PREFIX = "core_main_registry_app_rfx_"
+TEXT_KEY = "#text"
+
+
+def _get_indexed_paths(apps):
+    """Get the paths of all the categories, and their '#text' twin.
+
+    Args:
+        apps:
+
+    Returns:
+
+    """
+    category_model = apps.get_model("core_main_registry_app", "Category")
+    indexed_paths = []
+    for path in (
+        category_model.objects.order_by("path")
+        .values_list("path", flat=True)
+        .distinct()
+    ):
+        indexed_paths.extend([path, f"{path}.{TEXT_KEY}"])
+    return indexed_paths
+
+
+def _get_index_name(schema_editor, path):
+    """Get the quoted name of the index of a refinement path.
+
+    Args:
+        schema_editor:
+        path:
+
+    Returns:
+
+    """
+    return schema_editor.quote_name(
+        PATH_INDEX_PREFIX + hashlib.sha1(path.encode("utf-8")).hexdigest()[:20]
+    )
+
+
+def forwards_func(apps, schema_editor):
+    """Create the GIN indexes of the refinement paths on the data (PostgreSQL only).
+
+    Returns:
+
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    data_model = apps.get_model("core_main_app", "Data")
+    for path in _get_indexed_paths(apps):
+        keys = ",".join(
+            '"{0}"'.format(key.replace("\\", "\\\\").replace('"', '\\"'))
+            for key in path.split(".")
+        )
+        schema_editor.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} "
+            "USING gin (({column} #> '{{{keys}}}'::text[]))".format(
+                name=_get_index_name(schema_editor, path),
+                table=schema_editor.quote_name(data_model._meta.db_table),
+                column=schema_editor.quote_name("dict_content"),
+                keys=keys.replace("'", "''"),
+            )
+        )
+
+
+def reverse_func(apps, schema_editor):
+    """Drop the GIN indexes of the refinement paths (PostgreSQL only).
+
+    Returns:
+
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for path in _get_indexed_paths(apps):
+        schema_editor.execute(
+            "DROP INDEX CONCURRENTLY IF EXISTS {name}".format(
+                name=_get_index_name(schema_editor, path)
+            )
+        )
+
+
+class Migration(migrations.Migration):
+    # indexes are created concurrently, outside of a transaction
+    atomic = False
+
+    dependencies = [
+        ("core_main_registry_app", "0003_datafacetvalue"),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards_func, reverse_func, atomic=False)
+    ]
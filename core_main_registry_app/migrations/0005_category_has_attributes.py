@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core_main_registry_app", "0004_refinement_path_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="category",
+            name="has_attributes",
+            field=models.BooleanField(default=True),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core_main_registry_app", "0005_category_has_attributes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CategoryBitmap",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("chunk", models.PositiveIntegerField()),
+                ("bitmap", models.BinaryField()),
+                (
+                    "category",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="bitmaps",
+                        to="core_main_registry_app.category",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("category", "chunk")},
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core_main_registry_app", "0006_categorybitmap"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FlattenedSchema",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "template_hash",
+                    models.CharField(max_length=255, unique=True),
+                ),
+                ("content", models.TextField()),
+                ("creation_date", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
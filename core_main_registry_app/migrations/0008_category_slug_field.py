@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:27
+
+import core_main_registry_app.components.category.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core_main_registry_app", "0007_flattenedschema"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="category",
+            name="slug",
+            field=core_main_registry_app.components.category.models.CategorySlugField(
+                blank=True,
+                editable=False,
+                overwrite=True,
+                populate_from="name",
+            ),
+        ),
+    ]
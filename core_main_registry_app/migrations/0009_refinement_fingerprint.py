@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core_main_registry_app", "0008_category_slug_field"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="refinement",
+            name="fingerprint",
+            field=models.CharField(
+                blank=True, db_index=True, default="", max_length=64
+            ),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def forwards_func(apps, schema_editor):
+    """Map the existing refinements to the template hash they were created for.
+
+    Returns:
+
+    """
+    refinement_model = apps.get_model("core_main_registry_app", "Refinement")
+    refinement_template_hash_model = apps.get_model(
+        "core_main_registry_app", "RefinementTemplateHash"
+    )
+    refinement_template_hash_model.objects.bulk_create(
+        [
+            refinement_template_hash_model(
+                refinement_id=refinement_id, template_hash=template_hash
+            )
+            for refinement_id, template_hash in refinement_model.objects.order_by(
+                "id"
+            ).values_list(
+                "id", "template_hash"
+            )
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core_main_registry_app", "0009_refinement_fingerprint"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RefinementTemplateHash",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "template_hash",
+                    models.CharField(db_index=True, max_length=255),
+                ),
+                (
+                    "refinement",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="template_hashes",
+                        to="core_main_registry_app.refinement",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("refinement", "template_hash")},
+            },
+        ),
+        migrations.RunPython(forwards_func, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:35
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core_main_registry_app", "0010_refinementtemplatehash"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RefinementGeneration",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "template_hash",
+                    models.CharField(max_length=255, unique=True),
+                ),
+                ("status", models.CharField(default="pending", max_length=20)),
+                (
+                    "task_id",
+                    models.CharField(blank=True, default="", max_length=255),
+                ),
+                (
+                    "update_date",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+            ],
+        ),
+    ]
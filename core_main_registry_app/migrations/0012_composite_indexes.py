@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core_main_registry_app", "0011_refinementgeneration"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="refinementtemplatehash",
+            name="template_hash",
+            field=models.CharField(max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name="category",
+            index=models.Index(
+                fields=["refinement", "slug"],
+                name="registry_category_ref_slug_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="category",
+            index=models.Index(
+                fields=["refinement", "name"],
+                name="registry_category_ref_name_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="category",
+            index=models.Index(
+                fields=["refinement", "path", "value"],
+                name="registry_category_ref_path_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="category",
+            index=models.Index(
+                fields=["tree_id", "lft"],
+                name="registry_category_tree_lft_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="refinementtemplatehash",
+            index=models.Index(
+                fields=["template_hash", "refinement"],
+                name="registry_refinement_hash_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def forwards_func(apps, schema_editor):
+    """Add the ancestors of the existing categories.
+
+    Returns:
+
+    """
+    category_model = apps.get_model("core_main_registry_app", "Category")
+    category_closure_model = apps.get_model(
+        "core_main_registry_app", "CategoryClosure"
+    )
+    # (ancestor id, depth) by category id, from self to root
+    ancestors = {}
+    links = []
+    # parents before their children
+    for category_id, parent_id in (
+        category_model.objects.order_by("tree_id", "lft")
+        .values_list("id", "parent_id")
+        .iterator(chunk_size=1000)
+    ):
+        category_ancestors = [(category_id, 0)] + [
+            (ancestor_id, depth + 1)
+            for ancestor_id, depth in ancestors.get(parent_id, [])
+        ]
+        ancestors[category_id] = category_ancestors
+        links.extend(
+            category_closure_model(
+                ancestor_id=ancestor_id, descendant_id=category_id, depth=depth
+            )
+            for ancestor_id, depth in category_ancestors
+        )
+        if len(links) >= 1000:
+            category_closure_model.objects.bulk_create(links)
+            links = []
+    category_closure_model.objects.bulk_create(links)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core_main_registry_app", "0012_composite_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CategoryClosure",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("depth", models.PositiveIntegerField()),
+                (
+                    "ancestor",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="descendant_links",
+                        to="core_main_registry_app.category",
+                    ),
+                ),
+                (
+                    "descendant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ancestor_links",
+                        to="core_main_registry_app.category",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["descendant", "depth"],
+                        name="core_main_r_descend_5161d3_idx",
+                    )
+                ],
+                "unique_together": {("ancestor", "descendant")},
+            },
+        ),
+        migrations.RunPython(forwards_func, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,81 @@
+"""REST views for the registry refinement API"""
+
+import json
+
+from drf_spectacular.utils import extend_schema, OpenApiResponse
+from rest_framework import status
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+
+from core_main_app.access_control.exceptions import AccessControlError
+from core_main_app.commons import exceptions
+from core_main_registry_app.components.template import (
+    api as template_registry_api,
+)
+from core_main_registry_app.utils.refinement import facet_count
+
+
+@extend_schema(
+    tags=["Refinement"],
+    description="Count the data matching each category of the refinements",
+    responses={
+        200: OpenApiResponse(description="{category id: count}"),
+        400: OpenApiResponse(description="Validation Error / Bad Request"),
+        403: OpenApiResponse(description="Access Forbidden"),
+        500: OpenApiResponse(description="Internal server error"),
+    },
+)
+@api_view(["POST"])
+def facet_counts(request):
+    """Count the data matching each category of the refinements of the
+    current registry template, among the results of a query.
+
+    Parameters:
+
+        {
+            "query": "{}"
+        }
+
+    Args:
+
+        request: HTTP request
+
+    Returns:
+
+        - code: 200
+          content: {category id: count}
+        - code: 400
+          content: Validation error
+        - code: 403
+          content: Authentication error
+        - code: 500
+          content: Internal server error
+    """
+    try:
+        query = request.data.get("query", {})
+        if isinstance(query, str):
+            query = json.loads(query)
+        if not isinstance(query, dict):
+            content = {"message": "The query should be a JSON object."}
+            return Response(content, status=status.HTTP_400_BAD_REQUEST)
+
+        # Get current registry template
+        template = template_registry_api.get_current_registry_template(
+            request=request
+        )
+        # Count the data of each category
+        counts = facet_count.get_facet_counts(
+            query, template.hash, request.user
+        )
+
+        # Return response
+        return Response(counts, status=status.HTTP_200_OK)
+    except (json.JSONDecodeError, exceptions.QueryError) as query_error:
+        content = {"message": str(query_error)}
+        return Response(content, status=status.HTTP_400_BAD_REQUEST)
+    except AccessControlError as ace:
+        content = {"message": str(ace)}
+        return Response(content, status=status.HTTP_403_FORBIDDEN)
+    except Exception as api_exception:
+        content = {"message": str(api_exception)}
+        return Response(content, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -24,6 +24,9 @@ from core_main_registry_app.settings import (
     ENABLE_BLOB_ENDPOINTS,
 )
 from core_main_registry_app.rest.data import views as registry_data_views
+from core_main_registry_app.rest.refinement import (
+    views as registry_refinement_views,
+)
 from core_main_registry_app.rest.template_version_manager import (
     views as registry_template_version_manager_views,
 )
@@ -147,6 +150,11 @@ urlpatterns = [
         registry_data_views.publish_data,
         name="core_main_app_rest_publish_data",
     ),
+    re_path(
+        r"^refinement/facet-counts/$",
+        registry_refinement_views.facet_counts,
+        name="core_main_registry_app_rest_refinement_facet_counts",
+    ),
     re_path(
         r"^data/(?P<pk>\w+)/assign/(?P<workspace_id>\w+)$",
         data_views.DataAssign.as_view(),
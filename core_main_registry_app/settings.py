@@ -54,3 +54,49 @@ ENABLE_BLOB_ENDPOINTS = getattr(settings, "ENABLE_BLOB_ENDPOINTS", False)
 ALLOW_MULTIPLE_SCHEMAS = getattr(settings, "ALLOW_MULTIPLE_SCHEMAS", False)
 """ bool: Enable the use of multiple schemas in the registry.
 """
+
+REFINEMENT_CACHE = getattr(settings, "REFINEMENT_CACHE", None)
+""" str: Name of the Django cache of the refinement queries and lookups, shared by all the processes (see README).
+"""
+
+REFINEMENT_QUERY_CACHE_TIMEOUT = getattr(
+    settings, "REFINEMENT_QUERY_CACHE_TIMEOUT", 3600
+)
+""" int: Time (in seconds) a compiled refinement query is kept in cache.
+"""
+
+REFINEMENT_LOCAL_CACHE_SIZE = getattr(
+    settings, "REFINEMENT_LOCAL_CACHE_SIZE", 1000
+)
+""" int: Number of refinement and category lookups kept in the memory of each process (0 to disable).
+"""
+
+REFINEMENT_INDEX_SIZE = getattr(settings, "REFINEMENT_INDEX_SIZE", 4)
+""" int: Number of category indexes (one per template hash) kept in the memory of each process.
+"""
+
+REFINEMENT_INDEX_CHECK_INTERVAL = getattr(
+    settings, "REFINEMENT_INDEX_CHECK_INTERVAL", 10
+)
+""" int: Time (in seconds) an in-memory category index is used before being checked against the database.
+"""
+
+REFINEMENT_STREAMING_EXTRACTION = getattr(
+    settings, "REFINEMENT_STREAMING_EXTRACTION", False
+)
+""" bool: Parse the schema in a single streaming pass when extracting the refinements.
+"""
+
+REFINEMENT_GENERATION_TIMEOUT = getattr(
+    settings, "REFINEMENT_GENERATION_TIMEOUT", 3600
+)
+""" int: Time (in seconds) after which an unfinished refinement generation can be started again.
+"""
+
+ENABLE_DATA_FACETS = getattr(settings, "ENABLE_DATA_FACETS", False)
+""" bool: Save the refinement categories matched by each data (see README).
+"""
+
+ENABLE_CATEGORY_BITMAPS = getattr(settings, "ENABLE_CATEGORY_BITMAPS", False)
+""" bool: Maintain a bitmap of the matching data for each refinement category (see README).
+"""
@@ -1,13 +1,17 @@
 """Registry tasks"""
 
+import logging
+
 from celery import shared_task
 
 from core_main_app.system import api as system_api
 from core_main_registry_app.utils.refinement.refinement import init_refinements
 
+logger = logging.getLogger(__name__)
+
 
-@shared_task
-def init_refinement_task(template_id):
+@shared_task(bind=True)
+def init_refinement_task(self, template_id):
     """Asynchronous tasks init refinement
 
     Args:
@@ -17,4 +21,27 @@ def init_refinement_task(template_id):
 
     """
     template = system_api.get_template_by_id(template_id)
-    init_refinements(template)
+    init_refinements(
+        template,
+        task_id=self.request.id or "",
+        progress=lambda current, total: _update_progress(self, current, total),
+    )
+
+
+def _update_progress(task, current, total):
+    """Report the progress of the generation of the refinements.
+
+    Args:
+        task:
+        current: number of refinements created
+        total: number of refinements
+
+    Returns:
+
+    """
+    try:
+        task.update_state(
+            state="PROGRESS", meta={"current": current, "total": total}
+        )
+    except Exception as exception:
+        logger.debug("Unable to report the progress: %s", str(exception))
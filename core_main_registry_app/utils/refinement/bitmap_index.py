@@ -0,0 +1,392 @@
+"""
+In-memory bitmap index of the data matching each category of a template.
+
+Bitmaps are Python integers (bit n set if data n matches the category):
+OR, AND and popcount run in C on the whole bitmap. The bitmaps are loaded
+from the CategoryBitmap table once per template hash, then shared by all
+the threads of the process.
+
+Each chunk of data ids has its own version stamp in the refinement cache:
+when a data is saved, only the bits of its chunk are reloaded and patched
+into a new index, which replaces the previous one. The whole index is
+loaded again when the refinements change, the bitmaps are rebuilt or a data
+is added to a new chunk. Without refinement cache, the changes are not
+known: the index is loaded for each use.
+"""
+
+import logging
+import threading
+from types import MappingProxyType
+
+from core_main_registry_app.components.category_bitmap import (
+    api as category_bitmap_api,
+)
+from core_main_registry_app.components.category_bitmap.models import (
+    CHUNK_BITS,
+)
+from core_main_registry_app.utils.refinement import cache as refinement_cache
+
+logger = logging.getLogger(
+    "core_main_registry_app.utils.refinement.bitmap_index"
+)
+
+# bits of the data ids of a chunk
+CHUNK_MASK = (1 << (1 << CHUNK_BITS)) - 1
+
+_current_index = None
+_build_lock = threading.Lock()
+
+
+def count_bits(bitmap):
+    """Count the bits set in a bitmap (int.bit_count before Python 3.10).
+
+    Args:
+        bitmap: int
+
+    Returns:
+        int
+
+    """
+    return bin(bitmap).count("1")
+
+
+# int.bit_count counts in C (Python 3.10+)
+bit_count = getattr(int, "bit_count", count_bits)
+
+
+class BitmapIndex(object):
+    """
+    Immutable bitmaps of the categories of a template hash.
+    """
+
+    def __init__(self, template_hash, version, bitmaps, chunk_versions=None):
+        """
+
+        Args:
+            template_hash:
+            version: version stamps of the refinements and data
+            bitmaps: {category id: bitmap}
+            chunk_versions: {chunk: version stamp of the data of the chunk}
+        """
+        self.template_hash = template_hash
+        self.version = version
+        self.bitmaps = MappingProxyType(dict(bitmaps))
+        self.chunk_versions = MappingProxyType(dict(chunk_versions or {}))
+
+    def get(self, category_id):
+        """Get the bitmap of a category.
+
+        Args:
+            category_id: int or str
+
+        Returns:
+            int: empty bitmap if the category is unknown
+
+        """
+        try:
+            return self.bitmaps.get(int(category_id), 0)
+        except (TypeError, ValueError):
+            return 0
+
+
+def get_index(template_hash):
+    """Get the bitmap index of a template hash, load it if needed.
+
+    Args:
+        template_hash:
+
+    Returns:
+        BitmapIndex
+
+    """
+    global _current_index
+
+    version = _get_version(template_hash)
+    index = _current_index
+    if _is_valid(index, template_hash, version):
+        chunk_versions = _get_chunk_versions(
+            template_hash, index.chunk_versions
+        )
+        if chunk_versions == index.chunk_versions:
+            return index
+
+    with _build_lock:
+        # another thread may have loaded the index in the meantime
+        index = _current_index
+        if not _is_valid(index, template_hash, version):
+            index = _load_index(template_hash, version)
+        else:
+            index = _update_index(
+                index,
+                _get_chunk_versions(template_hash, index.chunk_versions),
+            )
+        _current_index = index
+    return index
+
+
+def get_refinements_bitmap(refinements, template_hash):
+    """Get the bitmap of the data matching the refinements.
+
+    Categories of a same refinement are OR-ed, refinements are AND-ed.
+
+    Args:
+        refinements: list of list of category ids
+        template_hash:
+
+    Returns:
+        int: bitmap or None if no category is selected
+
+    """
+    index = get_index(template_hash)
+    result = None
+    for refinement in refinements:
+        if len(refinement) == 0:
+            continue
+        refinement_bitmap = 0
+        for category_id in refinement:
+            refinement_bitmap |= index.get(category_id)
+        result = (
+            refinement_bitmap if result is None else result & refinement_bitmap
+        )
+    return result
+
+
+def get_data_ids(refinements, template_hash):
+    """Get the ids of the data matching the refinements.
+
+    Args:
+        refinements: list of list of category ids
+        template_hash:
+
+    Returns:
+        list of data ids or None if no category is selected
+
+    """
+    bitmap = get_refinements_bitmap(refinements, template_hash)
+    return None if bitmap is None else get_ids_from_bitmap(bitmap)
+
+
+def get_facet_counts(data_ids, template_hash, trees=()):
+    """Count the data matching each category among a set of data.
+
+    Args:
+        data_ids: ids of the data
+        template_hash:
+        trees: CategoryTree whose categories count the data matching them or
+            one of their descendants
+
+    Returns:
+        dict: {category id: count}, categories without match are omitted
+
+    """
+    index = get_index(template_hash)
+    data_bitmap = get_bitmap_from_ids(data_ids)
+    bitmaps = {
+        category_id: bitmap & data_bitmap
+        for category_id, bitmap in index.bitmaps.items()
+    }
+    for tree in trees:
+        # descendants follow their ancestors in the tree
+        for position in range(len(tree) - 1, -1, -1):
+            parent = tree.parents[position]
+            bitmap = bitmaps.get(tree.ids[position], 0)
+            if parent != -1 and bitmap:
+                parent_id = tree.ids[parent]
+                bitmaps[parent_id] = bitmaps.get(parent_id, 0) | bitmap
+    counts = {}
+    for category_id, bitmap in bitmaps.items():
+        count = bit_count(bitmap)
+        if count > 0:
+            counts[category_id] = count
+    return counts
+
+
+def get_bitmap_from_ids(ids):
+    """Get the bitmap of a list of ids.
+
+    Args:
+        ids: iterable of positive int
+
+    Returns:
+        int
+
+    """
+    bitmap = bytearray()
+    for value in ids:
+        byte_index = value >> 3
+        if byte_index >= len(bitmap):
+            bitmap.extend(bytes(byte_index - len(bitmap) + 1))
+        bitmap[byte_index] |= 1 << (value & 7)
+    return int.from_bytes(bitmap, "little")
+
+
+def get_ids_from_bitmap(bitmap):
+    """Get the ids set in a bitmap.
+
+    Args:
+        bitmap: int
+
+    Returns:
+        list of int, sorted
+
+    """
+    ids = []
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+    for byte_index, byte in enumerate(data):
+        # skip empty bytes
+        if byte == 0:
+            continue
+        for bit_index in range(8):
+            if byte & (1 << bit_index):
+                ids.append((byte_index << 3) + bit_index)
+    return ids
+
+
+def invalidate(template_hash=None):
+    """Drop the bitmap index of the process.
+
+    Args:
+        template_hash: only drop the index if loaded for this template hash
+
+    Returns:
+
+    """
+    global _current_index
+
+    index = _current_index
+    if index is not None and (
+        template_hash is None or index.template_hash == template_hash
+    ):
+        _current_index = None
+
+
+def _get_version(template_hash):
+    """Get the version stamps of the refinements and data of a template hash.
+
+    Args:
+        template_hash:
+
+    Returns:
+
+    """
+    return (
+        refinement_cache.get_version(template_hash),
+        refinement_cache.get_version(
+            template_hash, refinement_cache.DATA_SCOPE
+        ),
+    )
+
+
+def _get_chunk_versions(template_hash, chunks):
+    """Get the version stamps of the data of chunks of data ids.
+
+    Args:
+        template_hash:
+        chunks:
+
+    Returns:
+        dict: {chunk: version stamp}
+
+    """
+    scopes = {
+        chunk: refinement_cache.get_data_chunk_scope(chunk) for chunk in chunks
+    }
+    versions = refinement_cache.get_versions(
+        template_hash, list(scopes.values())
+    )
+    return {chunk: versions[scope] for chunk, scope in scopes.items()}
+
+
+def _load_index(template_hash, version):
+    """Load all the bitmaps of a template hash.
+
+    Args:
+        template_hash:
+        version:
+
+    Returns:
+        BitmapIndex
+
+    """
+    logger.debug("Loading the bitmap index (%s).", template_hash)
+    # read before the bitmaps: changes in between trigger a new load
+    chunk_versions = _get_chunk_versions(
+        template_hash,
+        category_bitmap_api.get_chunks_by_template_hash(template_hash),
+    )
+    return BitmapIndex(
+        template_hash,
+        version,
+        category_bitmap_api.get_bitmaps_by_template_hash(template_hash),
+        chunk_versions,
+    )
+
+
+def _update_index(index, chunk_versions):
+    """Reload the bits of the chunks whose data changed.
+
+    Args:
+        index:
+        chunk_versions: current version stamps of the chunks of the index
+
+    Returns:
+        BitmapIndex
+
+    """
+    chunks = [
+        chunk
+        for chunk, version in chunk_versions.items()
+        if version != index.chunk_versions.get(chunk)
+    ]
+    if len(chunks) == 0:
+        return index
+
+    logger.debug(
+        "Updating %d chunks of the bitmap index (%s).",
+        len(chunks),
+        index.template_hash,
+    )
+    chunks_mask = 0
+    for chunk in chunks:
+        chunks_mask |= CHUNK_MASK << (chunk << CHUNK_BITS)
+    bitmaps = {
+        category_id: bitmap & ~chunks_mask
+        for category_id, bitmap in index.bitmaps.items()
+    }
+    for (
+        category_id,
+        bitmap,
+    ) in category_bitmap_api.get_bitmaps_by_template_hash(
+        index.template_hash, chunks
+    ).items():
+        bitmaps[category_id] = bitmaps.get(category_id, 0) | bitmap
+    return BitmapIndex(
+        index.template_hash,
+        index.version,
+        {
+            category_id: bitmap
+            for category_id, bitmap in bitmaps.items()
+            if bitmap != 0
+        },
+        chunk_versions,
+    )
+
+
+def _is_valid(index, template_hash, version):
+    """Check if an index can be used for a template hash.
+
+    Args:
+        index:
+        template_hash:
+        version:
+
+    Returns:
+
+    """
+    return (
+        index is not None
+        and index.template_hash == template_hash
+        and index.version == version
+        # without cache, the changes of the data are not known
+        and None not in version
+    )
@@ -0,0 +1,375 @@
+"""
+Cache for the refinements.
+
+Entries are stored in the Django cache framework, so they can be shared
+between processes. Each key embeds a version stamp of the template hash:
+regenerating the refinements of a template changes the stamp, which makes
+all entries built for the previous refinements unreachable. Unreachable
+entries are evicted by the cache backend (LRU for local memory and
+memcached backends).
+
+The model lookups read through the cache are also kept in a bounded local
+LRU tier, in front of the Django cache: only the version stamp is read from
+the Django cache when the value is in the local tier.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.db import transaction
+
+from core_main_registry_app.settings import (
+    REFINEMENT_CACHE,
+    REFINEMENT_LOCAL_CACHE_SIZE,
+    REFINEMENT_QUERY_CACHE_TIMEOUT,
+)
+
+logger = logging.getLogger("core_main_registry_app.utils.refinement.cache")
+
+CACHE_KEY_PREFIX = "core_main_registry_app:refinement"
+# version stamps: refinements (categories) and data of a template hash
+REFINEMENTS_SCOPE = "version"
+DATA_SCOPE = "data_version"
+# version stamp of the data of a chunk of data ids (see get_data_chunk_scope)
+DATA_CHUNK_SCOPE = "data_chunk_version"
+# template hash of the lookups not bound to a template hash (e.g. category by
+# id): its version changes with the refinements of any template hash
+ANY_TEMPLATE_HASH = "*"
+
+_MISSING = object()
+_local_cache = OrderedDict()
+_local_cache_lock = threading.Lock()
+
+
+def _get_cache():
+    """Get the cache used for the refinements.
+
+    Returns:
+        Django cache or None if disabled
+
+    """
+    return caches[REFINEMENT_CACHE] if REFINEMENT_CACHE else None
+
+
+def _get_version_key(template_hash, scope=REFINEMENTS_SCOPE):
+    """Get the key storing the version stamp of a template hash.
+
+    Args:
+        template_hash:
+        scope:
+
+    Returns:
+
+    """
+    return f"{CACHE_KEY_PREFIX}:{scope}:{template_hash}"
+
+
+def get_version(template_hash, scope=REFINEMENTS_SCOPE):
+    """Get the version stamp of the refinements of a template hash.
+
+    Args:
+        template_hash:
+        scope: REFINEMENTS_SCOPE or DATA_SCOPE
+
+    Returns:
+        str: version stamp or None if the cache is disabled
+
+    """
+    cache = _get_cache()
+    if cache is None:
+        return None
+    version_key = _get_version_key(template_hash, scope)
+    version = cache.get(version_key)
+    if version is None:
+        # add does nothing if another process initialized the version
+        cache.add(version_key, uuid.uuid4().hex, timeout=None)
+        version = cache.get(version_key)
+    return version
+
+
+def get_data_chunk_scope(chunk):
+    """Get the scope of the version stamp of a chunk of data ids.
+
+    Args:
+        chunk:
+
+    Returns:
+        str
+
+    """
+    return f"{DATA_CHUNK_SCOPE}:{chunk}"
+
+
+def get_versions(template_hash, scopes):
+    """Get the version stamps of several scopes of a template hash, in a
+    single cache read.
+
+    Args:
+        template_hash:
+        scopes: list of scopes
+
+    Returns:
+        dict: {scope: version stamp or None if the cache is disabled}
+
+    """
+    cache = _get_cache()
+    if cache is None:
+        return {scope: None for scope in scopes}
+    version_keys = {
+        scope: _get_version_key(template_hash, scope) for scope in scopes
+    }
+    cached_versions = cache.get_many(list(version_keys.values()))
+    versions = {}
+    for scope, version_key in version_keys.items():
+        version = cached_versions.get(version_key)
+        if version is None:
+            version = get_version(template_hash, scope)
+        versions[scope] = version
+    return versions
+
+
+def invalidate(template_hash, scope=REFINEMENTS_SCOPE):
+    """Invalidate all cached entries of a template hash.
+
+    Args:
+        template_hash:
+        scope: REFINEMENTS_SCOPE, DATA_SCOPE or scope of a chunk of data ids
+
+    Returns:
+
+    """
+    cache = _get_cache()
+    if cache is None:
+        return
+    try:
+        cache.set(
+            _get_version_key(template_hash, scope),
+            uuid.uuid4().hex,
+            timeout=None,
+        )
+        if scope == REFINEMENTS_SCOPE and template_hash != ANY_TEMPLATE_HASH:
+            cache.set(
+                _get_version_key(ANY_TEMPLATE_HASH, scope),
+                uuid.uuid4().hex,
+                timeout=None,
+            )
+    except Exception as exception:
+        logger.warning(
+            "Unable to invalidate the refinement cache (%s): %s.",
+            template_hash,
+            str(exception),
+        )
+
+
+def invalidate_on_commit(template_hash, scope=REFINEMENTS_SCOPE):
+    """Invalidate all cached entries of a template hash, now and once the
+    current transaction is committed: entries read in the meantime by other
+    processes may not see the changes.
+
+    Args:
+        template_hash:
+        scope:
+
+    Returns:
+
+    """
+    invalidate(template_hash, scope)
+    transaction.on_commit(lambda: invalidate(template_hash, scope))
+
+
+def get_or_load(template_hash, name, key, loader, cache_empty=True):
+    """Get a model lookup of a template hash from the cache, or load it and
+    store it in the cache.
+
+    Args:
+        template_hash: template hash of the lookup, or ANY_TEMPLATE_HASH
+        name: name of the lookup
+        key: key of the lookup arguments (str)
+        loader: function loading the value from the database
+        cache_empty: False to load again empty values (e.g. refinements not
+        generated yet)
+
+    Returns:
+        value, shared with the other callers: must not be modified
+
+    """
+    cache = _get_cache()
+    # values read in a transaction may be rolled back
+    if cache is None or _in_transaction():
+        return loader()
+    try:
+        cache_key = (
+            f"{CACHE_KEY_PREFIX}:{name}:{template_hash}:"
+            f"{get_version(template_hash)}:"
+            f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}"
+        )
+        value = _get_local(cache_key)
+        if value is _MISSING:
+            value = cache.get(cache_key, _MISSING)
+            if value is not _MISSING:
+                _set_local(cache_key, value)
+    except Exception as exception:
+        logger.warning(
+            "Unable to read the refinement cache: %s.", str(exception)
+        )
+        return loader()
+    if value is not _MISSING:
+        return value
+
+    value = loader()
+    if not value and not cache_empty:
+        return value
+    try:
+        cache.set(cache_key, value, timeout=REFINEMENT_QUERY_CACHE_TIMEOUT)
+    except Exception as exception:
+        logger.warning(
+            "Unable to write the refinement cache: %s.", str(exception)
+        )
+    _set_local(cache_key, value)
+    return value
+
+
+def clear_local_cache():
+    """Clear the local tier of the cache.
+
+    Returns:
+
+    """
+    with _local_cache_lock:
+        _local_cache.clear()
+
+
+def _in_transaction():
+    """Check if the default database connection is in a transaction.
+
+    Returns:
+
+    """
+    return transaction.get_connection().in_atomic_block
+
+
+def _get_local(cache_key):
+    """Get a value from the local tier of the cache.
+
+    Args:
+        cache_key:
+
+    Returns:
+        value or _MISSING
+
+    """
+    with _local_cache_lock:
+        value = _local_cache.get(cache_key, _MISSING)
+        if value is not _MISSING:
+            _local_cache.move_to_end(cache_key)
+        return value
+
+
+def _set_local(cache_key, value):
+    """Store a value in the local tier of the cache, evicting the least
+    recently used values.
+
+    Args:
+        cache_key:
+        value:
+
+    Returns:
+
+    """
+    if REFINEMENT_LOCAL_CACHE_SIZE <= 0:
+        return
+    with _local_cache_lock:
+        _local_cache[cache_key] = value
+        _local_cache.move_to_end(cache_key)
+        while len(_local_cache) > REFINEMENT_LOCAL_CACHE_SIZE:
+            _local_cache.popitem(last=False)
+
+
+def normalize_selection(refinements):
+    """Normalize a selection of categories.
+
+    Args:
+        refinements: list of list of category ids
+
+    Returns:
+        list: sorted list of sorted category ids (as str)
+
+    """
+    return sorted(
+        sorted({str(category_id) for category_id in refinement})
+        for refinement in refinements
+        if len(refinement) > 0
+    )
+
+
+def _get_query_key(template_hash, refinements):
+    """Get the cache key of a refinement query.
+
+    Args:
+        template_hash:
+        refinements:
+
+    Returns:
+
+    """
+    selection_hash = hashlib.sha1(
+        json.dumps(normalize_selection(refinements)).encode("utf-8")
+    ).hexdigest()
+    return (
+        f"{CACHE_KEY_PREFIX}:query:{template_hash}:"
+        f"{get_version(template_hash)}:{selection_hash}"
+    )
+
+
+def get_query(template_hash, refinements):
+    """Get a compiled refinement query from the cache.
+
+    Args:
+        template_hash:
+        refinements:
+
+    Returns:
+        dict: query or None if not in cache
+
+    """
+    cache = _get_cache()
+    if cache is None:
+        return None
+    try:
+        return cache.get(_get_query_key(template_hash, refinements))
+    except Exception as exception:
+        logger.warning(
+            "Unable to read the refinement query cache: %s.", str(exception)
+        )
+        return None
+
+
+def set_query(template_hash, refinements, query):
+    """Store a compiled refinement query in the cache.
+
+    Args:
+        template_hash:
+        refinements:
+        query:
+
+    Returns:
+
+    """
+    cache = _get_cache()
+    if cache is None:
+        return
+    try:
+        cache.set(
+            _get_query_key(template_hash, refinements),
+            query,
+            timeout=REFINEMENT_QUERY_CACHE_TIMEOUT,
+        )
+    except Exception as exception:
+        logger.warning(
+            "Unable to write the refinement query cache: %s.", str(exception)
+        )
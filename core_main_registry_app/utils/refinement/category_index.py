@@ -0,0 +1,532 @@
+"""
+In-memory index of the categories of a template.
+
+The index is built once per template hash from the Category and Refinement
+tables, then shared by all the threads of the process. It is never modified:
+when the refinements of the template hash change, a new index is built and
+replaces the previous one in a single assignment.
+
+The refinements version stamp only reaches the other processes through a
+shared cache: the index is also checked against the database (number and
+greatest id of the categories) every REFINEMENT_INDEX_CHECK_INTERVAL
+seconds, and when a selected category is missing from it. The indexes of the
+REFINEMENT_INDEX_SIZE most recently used template hashes are kept.
+"""
+
+import bisect
+import logging
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from types import MappingProxyType
+
+from core_main_registry_app.components.category import api as category_api
+from core_main_registry_app.constants import CATEGORY_SUFFIX
+from core_main_registry_app.settings import (
+    REFINEMENT_INDEX_CHECK_INTERVAL,
+    REFINEMENT_INDEX_SIZE,
+)
+from core_main_registry_app.utils.refinement import cache as refinement_cache
+from core_main_registry_app.utils.refinement import category_tree
+
+logger = logging.getLogger(
+    "core_main_registry_app.utils.refinement.category_index"
+)
+
+CategoryEntry = namedtuple(
+    "CategoryEntry",
+    [
+        "id",
+        "path",
+        "value",
+        "refinement_id",
+        "refinement_slug",
+        "refinement_name",
+        "has_attributes",
+        "tree_id",
+        "lft",
+        "rght",
+        "name",
+    ],
+    defaults=(True, None, None, None, None),
+)
+
+# Values selected for a path: list of values and list of (prefix,
+# include_prefix) matching the values of fully selected subtrees.
+SelectedValues = namedtuple("SelectedValues", ["values", "prefixes"])
+
+# indexes by template hash, least recently used first
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+_build_lock = threading.Lock()
+
+
+class CategoryIndex(object):
+    """
+    Immutable index of the categories of a template hash.
+    """
+
+    def __init__(self, template_hash, version, entries, stamp=None):
+        """
+
+        Args:
+            template_hash:
+            version: version stamp of the refinements of the template hash
+            entries: list of CategoryEntry, in tree order
+            stamp: (count, max id) of the categories in the database
+        """
+        by_id = {}
+        by_path_and_value = {}
+        for entry in entries:
+            by_id[entry.id] = entry
+            key = (entry.path, entry.value)
+            by_path_and_value[key] = by_path_and_value.get(key, ()) + (
+                entry.id,
+            )
+
+        self.template_hash = template_hash
+        self.version = version
+        self.stamp = stamp
+        # time of the last check against the database
+        self.checked_at = time.monotonic()
+        self.entries = tuple(entries)
+        self.paths = tuple(dict.fromkeys(entry.path for entry in entries))
+        # paths of the elements that can have attributes
+        self.text_paths = frozenset(
+            entry.path for entry in entries if entry.has_attributes
+        )
+        self.by_id = MappingProxyType(by_id)
+        self.by_path_and_value = MappingProxyType(by_path_and_value)
+        # category trees by refinement id, built on first use
+        self._trees = None
+
+    def get(self, category_id):
+        """Get a category entry by id.
+
+        Args:
+            category_id: int or str
+
+        Returns:
+            CategoryEntry or None
+
+        """
+        try:
+            return self.by_id.get(int(category_id))
+        except (TypeError, ValueError):
+            return None
+
+    def get_ids(self, path, value):
+        """Get the ids of the categories with the given path and value.
+
+        Args:
+            path:
+            value:
+
+        Returns:
+            tuple of ids
+
+        """
+        return self.by_path_and_value.get((path, value), ())
+
+    def get_trees(self):
+        """Get the category trees of all the refinements.
+
+        Returns:
+            list of CategoryTree
+
+        """
+        return list(self._get_trees().values())
+
+    def _get_trees(self):
+        """Get the category trees by refinement id, build them on first use.
+
+        Returns:
+            dict: {refinement id: CategoryTree}
+
+        """
+        trees = self._trees
+        if trees is None:
+            # built once: concurrent builds give the same trees
+            trees = MappingProxyType(category_tree.build_trees(self.entries))
+            self._trees = trees
+        return trees
+
+
+def build_index(template_hash, version=None, stamp=None):
+    """Build the category index of a template hash from the database.
+
+    Args:
+        template_hash:
+        version:
+        stamp: (count, max id) of the categories, read if None
+
+    Returns:
+        CategoryIndex
+
+    """
+    if stamp is None:
+        # read before the categories: changes in between trigger a new build
+        stamp = category_api.get_count_and_max_id_by_template_hash(
+            template_hash
+        )
+    entries = [
+        CategoryEntry(
+            id=category["id"],
+            path=category["path"],
+            value=category["value"],
+            refinement_id=category["refinement_id"],
+            refinement_slug=category["refinement__slug"],
+            refinement_name=category["refinement__name"],
+            has_attributes=category["has_attributes"],
+            tree_id=category["tree_id"],
+            lft=category["lft"],
+            rght=category["rght"],
+            name=category["name"],
+        )
+        for category in category_api.get_all_values_by_template_hash(
+            template_hash
+        )
+    ]
+    return CategoryIndex(template_hash, version, entries, stamp)
+
+
+def get_index(template_hash, check=False):
+    """Get the category index of a template hash, build it if needed.
+
+    Args:
+        template_hash:
+        check: if True, check the index against the database now
+
+    Returns:
+        CategoryIndex
+
+    """
+    version = refinement_cache.get_version(template_hash)
+    index = _get(template_hash)
+    if _is_valid(index, version, check):
+        return index
+
+    with _build_lock:
+        # another thread may have built or checked the index in the meantime
+        index = _get(template_hash)
+        if _is_valid(index, version, check):
+            return index
+        stamp = category_api.get_count_and_max_id_by_template_hash(
+            template_hash
+        )
+        if (
+            index is not None
+            and index.version == version
+            and index.stamp == stamp
+        ):
+            index.checked_at = time.monotonic()
+            return index
+        logger.debug("Building the category index (%s).", template_hash)
+        index = build_index(template_hash, version, stamp)
+        _set(template_hash, index)
+    return index
+
+
+def get_selection_index(refinements, template_hash=None):
+    """Get an index containing the categories selected in the refinements.
+
+    Args:
+        refinements: list of list of category ids
+        template_hash: if set, use the index of the template hash. Otherwise,
+            only the selected categories are loaded from the database.
+
+    Returns:
+        CategoryIndex
+
+    """
+    category_ids = _get_category_ids(refinements)
+
+    if template_hash is not None:
+        try:
+            index = get_index(template_hash)
+            if any(
+                index.get(category_id) is None for category_id in category_ids
+            ):
+                # categories created since the index was last checked
+                index = get_index(template_hash, check=True)
+            if all(
+                index.get(category_id) is not None
+                for category_id in category_ids
+            ):
+                return index
+            logger.warning(
+                "Selected categories missing from the category index (%s).",
+                template_hash,
+            )
+        except Exception as exception:
+            logger.warning(
+                "Unable to get the category index (%s): %s.",
+                template_hash,
+                str(exception),
+            )
+
+    if len(category_ids) == 0:
+        return CategoryIndex(None, None, [])
+
+    # get all selected categories in a single query
+    return CategoryIndex(
+        None,
+        None,
+        [
+            CategoryEntry(
+                id=category["id"],
+                path=category["path"],
+                value=category["value"],
+                refinement_id=category["refinement_id"],
+                refinement_slug=None,
+                refinement_name=None,
+                has_attributes=category["has_attributes"],
+                tree_id=category["tree_id"],
+                lft=category["lft"],
+                rght=category["rght"],
+            )
+            for category in category_api.get_all_values_by_ids(category_ids)
+        ],
+    )
+
+
+def get_template_hash(refinements):
+    """Get the template hash of the categories selected in the refinements:
+    the one whose refinements contain the most of them.
+
+    Args:
+        refinements: list of list of category ids
+
+    Returns:
+        str or None
+
+    """
+    category_ids = _get_category_ids(refinements)
+    if len(category_ids) == 0:
+        return None
+    try:
+        return category_api.get_template_hash_by_ids(category_ids)
+    except Exception as exception:
+        logger.warning(
+            "Unable to get the template hash of the categories: %s.",
+            str(exception),
+        )
+        return None
+
+
+def _get_category_ids(refinements):
+    """Get the ids of the categories selected in the refinements.
+
+    Args:
+        refinements: list of list of category ids
+
+    Returns:
+        set of int, invalid ids are ignored
+
+    """
+    category_ids = set()
+    for refinement in refinements:
+        for category_id in refinement:
+            try:
+                category_ids.add(int(category_id))
+            except (TypeError, ValueError):
+                logger.warning(
+                    "Invalid category id (%s) ignored.", str(category_id)
+                )
+    return category_ids
+
+
+def get_selected_values_by_path(refinements, template_hash=None):
+    """Get the values selected in each refinement, grouped by path.
+
+    Args:
+        refinements: list of list of category ids
+        template_hash:
+
+    Returns:
+        list of dict: {(path, has_attributes): [value, value, ...]} for each
+        refinement
+
+    """
+    index = get_selection_index(refinements, template_hash)
+    selected_values = []
+    for refinement in refinements:
+        values_by_path = {}
+        # For each category in the refinement
+        for category_id in refinement:
+            category = index.get(category_id)
+            if category is None:
+                logger.warning(
+                    "Impossible to find the category (%s).", str(category_id)
+                )
+                continue
+            # If dot notation already exists, append to the dict
+            # Create a dict with the dot notation as the key otherwise
+            values_by_path.setdefault(
+                (category.path, category.has_attributes), []
+            ).append(category.value)
+        selected_values.append(values_by_path)
+    return selected_values
+
+
+def get_selected_prefixes_by_path(refinements, template_hash=None):
+    """Get the values selected in each refinement, grouped by path. The
+    values of a fully selected subtree are replaced by their common prefix.
+
+    Args:
+        refinements: list of list of category ids
+        template_hash:
+
+    Returns:
+        list of dict: {(path, has_attributes): SelectedValues} for each
+        refinement
+
+    """
+    index = get_selection_index(refinements, template_hash)
+    selected_values = []
+    for refinement in refinements:
+        categories = {}
+        for category_id in refinement:
+            category = index.get(category_id)
+            if category is None:
+                logger.warning(
+                    "Impossible to find the category (%s).", str(category_id)
+                )
+                continue
+            categories[category.id] = category
+
+        covered_ids, prefixes = _get_selected_subtrees(categories.values())
+
+        values_by_path = {}
+        for category in categories.values():
+            if category.id in covered_ids:
+                continue
+            values_by_path.setdefault(
+                (category.path, category.has_attributes),
+                SelectedValues([], []),
+            ).values.append(category.value)
+        for category, prefix in prefixes:
+            values_by_path.setdefault(
+                (category.path, category.has_attributes),
+                SelectedValues([], []),
+            ).prefixes.append(prefix)
+        selected_values.append(values_by_path)
+    return selected_values
+
+
+def _get_selected_subtrees(categories):
+    """Find the largest subtrees whose categories are all selected.
+
+    Args:
+        categories: selected CategoryEntry
+
+    Returns:
+        tuple: ids of the categories of the subtrees, list of
+        (root category, (prefix, include_prefix)) for each subtree
+
+    """
+    # categories of a subtree follow their root in tree order
+    categories = sorted(
+        (category for category in categories if category.lft is not None),
+        key=lambda category: (category.tree_id, category.lft),
+    )
+    positions = [(category.tree_id, category.lft) for category in categories]
+
+    covered_ids = set()
+    prefixes = []
+    for position, category in enumerate(categories):
+        descendant_count = (category.rght - category.lft - 1) // 2
+        if category.id in covered_ids or descendant_count == 0:
+            continue
+        end = bisect.bisect_left(
+            positions, (category.tree_id, category.rght), lo=position
+        )
+        if end - position - 1 != descendant_count:
+            continue
+
+        subtree = categories[position:end]
+        prefix = category.value
+        if prefix.endswith(CATEGORY_SUFFIX):
+            prefix = prefix[: -len(CATEGORY_SUFFIX)]
+        descendant_values = [descendant.value for descendant in subtree[1:]]
+        if not all(
+            value == prefix or value.startswith(f"{prefix}:")
+            for value in descendant_values
+        ):
+            continue
+        include_prefix = prefix in descendant_values
+        covered_ids.update(descendant.id for descendant in subtree)
+        prefixes.append((category, (prefix, include_prefix)))
+    return covered_ids, prefixes
+
+
+def invalidate(template_hash=None):
+    """Drop the category indexes of the process.
+
+    Args:
+        template_hash: only drop the index of this template hash
+
+    Returns:
+
+    """
+    with _indexes_lock:
+        if template_hash is None:
+            _indexes.clear()
+        else:
+            _indexes.pop(template_hash, None)
+
+
+def _get(template_hash):
+    """Get the index of a template hash and mark it as the most recently
+    used.
+
+    Args:
+        template_hash:
+
+    Returns:
+        CategoryIndex or None
+
+    """
+    with _indexes_lock:
+        index = _indexes.get(template_hash)
+        if index is not None:
+            _indexes.move_to_end(template_hash)
+        return index
+
+
+def _set(template_hash, index):
+    """Store the index of a template hash, dropping the least recently used
+    indexes.
+
+    Args:
+        template_hash:
+        index:
+
+    Returns:
+
+    """
+    with _indexes_lock:
+        _indexes[template_hash] = index
+        _indexes.move_to_end(template_hash)
+        while len(_indexes) > max(REFINEMENT_INDEX_SIZE, 1):
+            _indexes.popitem(last=False)
+
+
+def _is_valid(index, version, check=False):
+    """Check if an index can be used without reading the database.
+
+    Args:
+        index:
+        version: current version stamp of the refinements
+        check: if True, the index has to be checked against the database
+
+    Returns:
+
+    """
+    return (
+        index is not None
+        and index.version == version
+        and not check
+        and time.monotonic() - index.checked_at
+        < REFINEMENT_INDEX_CHECK_INTERVAL
+    )
@@ -0,0 +1,138 @@
+"""
+Compact snapshot of the category tree of a refinement.
+
+The categories are stored in pre-order in parallel arrays: walking the tree
+does not instantiate any model or entry object. The snapshots are built from
+the category index of a template hash, and are rebuilt with it when the
+refinements version changes.
+"""
+
+from array import array
+
+
+class CategoryTree(object):
+    """
+    Immutable category tree of a refinement, in pre-order.
+    """
+
+    __slots__ = (
+        "refinement_id",
+        "ids",
+        "parents",
+        "depths",
+        "ends",
+        "names",
+        "paths",
+        "values",
+        "_positions",
+    )
+
+    def __init__(self, refinement_id, entries):
+        """
+
+        Args:
+            refinement_id:
+            entries: CategoryEntry of the refinement, in tree order
+        """
+        ids = array("q")
+        # position of the parent, -1 for the roots
+        parents = array("l")
+        depths = array("l")
+        # position following the last descendant
+        ends = array("l")
+        # positions of the categories whose subtree is not closed yet
+        ancestors = []
+        for position, entry in enumerate(entries):
+            while ancestors and ends[ancestors[-1]] <= position:
+                ancestors.pop()
+            ids.append(entry.id)
+            parents.append(ancestors[-1] if ancestors else -1)
+            depths.append(len(ancestors))
+            ends.append(position + 1 + (entry.rght - entry.lft - 1) // 2)
+            ancestors.append(position)
+
+        self.refinement_id = refinement_id
+        self.ids = ids
+        self.parents = parents
+        self.depths = depths
+        self.ends = ends
+        self.names = tuple(entry.name for entry in entries)
+        self.paths = tuple(entry.path for entry in entries)
+        self.values = tuple(entry.value for entry in entries)
+        self._positions = {
+            category_id: position for position, category_id in enumerate(ids)
+        }
+
+    def __len__(self):
+        return len(self.ids)
+
+    def get_position(self, category_id):
+        """Get the position of a category in the tree.
+
+        Args:
+            category_id: int or str
+
+        Returns:
+            int or None
+
+        """
+        try:
+            return self._positions.get(int(category_id))
+        except (TypeError, ValueError):
+            return None
+
+    def get_roots(self):
+        """Get the positions of the root categories.
+
+        Returns:
+            iterator of positions
+
+        """
+        return self.get_children(-1)
+
+    def get_children(self, position):
+        """Get the positions of the children of a category.
+
+        Args:
+            position: position of the category, -1 for the roots
+
+        Returns:
+            iterator of positions
+
+        """
+        end = len(self.ids) if position == -1 else self.ends[position]
+        child = position + 1
+        while child < end:
+            yield child
+            child = self.ends[child]
+
+    def get_subtree_ids(self, position):
+        """Get the ids of a category and of its descendants.
+
+        Args:
+            position:
+
+        Returns:
+            array of ids, in pre-order
+
+        """
+        return self.ids[position : self.ends[position]]  # noqa: E203
+
+
+def build_trees(entries):
+    """Build the category tree of each refinement.
+
+    Args:
+        entries: CategoryEntry, in tree order
+
+    Returns:
+        dict: {refinement id: CategoryTree}
+
+    """
+    entries_by_refinement = {}
+    for entry in entries:
+        entries_by_refinement.setdefault(entry.refinement_id, []).append(entry)
+    return {
+        refinement_id: CategoryTree(refinement_id, refinement_entries)
+        for refinement_id, refinement_entries in entries_by_refinement.items()
+    }
@@ -0,0 +1,392 @@
+"""
+Facet counts of the refinements.
+
+Counts the data matching each category of the refinements of a template,
+or one of its descendants, for the data returned by a search query, in a
+single pass:
+    - with the category bitmaps: one popcount per category, on the union of
+      the bitmaps of its subtree,
+    - MongoDB: one aggregation grouping the data by values of the refinement
+      paths,
+    - SQL with the data facet values table: one GROUP BY on the table,
+      joined with the category closure table,
+    - PostgreSQL without the table: one GROUP BY on the values of the
+      refinement paths, read from the dict content with jsonpath,
+    - other SQL backends without the table (fallback): one scan of the dict
+      content of the results, in Python.
+
+A data matching several categories of a subtree is counted once by the
+ancestors of these categories.
+"""
+
+from collections import Counter
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Count, F
+
+from core_main_app.components.data import api as data_api
+from core_main_registry_app import settings as registry_settings
+from core_main_registry_app.components.data_facet import (
+    api as data_facet_api,
+)
+from core_main_registry_app.components.data_facet.models import (
+    DataFacetValue,
+)
+from core_main_registry_app.utils.refinement import bitmap_index
+from core_main_registry_app.utils.refinement import category_index
+
+TEXT_KEY = "#text"
+# items of the array (or the value itself) that are strings or numbers
+JSONPATH_SCALAR_FILTER = '[*] ? (@.type() == "string" || @.type() == "number")'
+
+
+def get_facet_counts(query, template_hash, user):
+    """Count the data matching each category of the refinements of a
+    template, or one of its descendants.
+
+    Args:
+        query: search query (JSON)
+        template_hash:
+        user:
+
+    Returns:
+        dict: {category id (str): count}, categories without match are omitted
+
+    """
+    index = category_index.get_index(template_hash)
+    if len(index.entries) == 0:
+        return {}
+
+    data_list = data_api.execute_json_query(query, user)
+    if registry_settings.ENABLE_CATEGORY_BITMAPS:
+        counts = _count_with_bitmaps(data_list, index)
+    elif settings.MONGODB_INDEXING:
+        counts = _count_with_aggregation(data_list, index)
+    elif registry_settings.ENABLE_DATA_FACETS:
+        counts = _count_with_facet_values(data_list, index)
+    elif connections[data_list.db].vendor == "postgresql":
+        counts = _count_with_group_by(data_list, index)
+    else:
+        counts = _count_with_scan(data_list, index)
+
+    return {
+        str(category_id): count
+        for category_id, count in counts.items()
+        if count > 0
+    }
+
+
+def get_ancestor_ids(index):
+    """Get the ids of the ancestors of each category of an index.
+
+    Args:
+        index: CategoryIndex
+
+    Returns:
+        dict: {category id: ids of the category and its ancestors}
+
+    """
+    ancestor_ids = {}
+    for tree in index.get_trees():
+        # ancestors precede their descendants in the tree
+        for position, category_id in enumerate(tree.ids):
+            parent = tree.parents[position]
+            ancestor_ids[category_id] = (category_id,) + (
+                ancestor_ids[tree.ids[parent]] if parent != -1 else ()
+            )
+    return ancestor_ids
+
+
+def count_matches(matches, index):
+    """Count the data matching each category or one of its descendants.
+
+    Args:
+        matches: iterable of (ids of the categories matched by some data,
+            number of these data)
+        index: CategoryIndex
+
+    Returns:
+        Counter: {category id: count}
+
+    """
+    ancestor_ids = get_ancestor_ids(index)
+    counts = Counter()
+    for category_ids, count in matches:
+        matched_ids = set()
+        for category_id in category_ids:
+            matched_ids.update(ancestor_ids.get(category_id, ()))
+        for category_id in matched_ids:
+            counts[category_id] += count
+    return counts
+
+
+def get_jsonpath(path, text=False):
+    """Get the jsonpath of the scalar values at a dot notation path of the
+    dict content, as read by data_facet_api.get_values_at_path. Arrays are
+    traversed (lax mode).
+
+    Args:
+        path: dot notation path
+        text: if True, read the value from the '#text' key
+
+    Returns:
+        str
+
+    """
+    keys = path.split(".") + ([TEXT_KEY] if text else [])
+    return (
+        "$"
+        + "".join(
+            '."{0}"'.format(key.replace("\\", "\\\\").replace('"', '\\"'))
+            for key in keys
+        )
+        + JSONPATH_SCALAR_FILTER
+    )
+
+
+def get_group_by_sql(data_list, index):
+    """Get the PostgreSQL query counting the data with the same values of
+    the refinement paths.
+
+    Args:
+        data_list: Data queryset
+        index: CategoryIndex
+
+    Returns:
+        tuple: SQL, params. Rows are (list of [path number, value], count).
+
+    """
+    values_queries = []
+    values_params = []
+    for path_number, path in enumerate(index.paths):
+        texts = [False, True] if path in index.text_paths else [False]
+        for text in texts:
+            values_queries.append(
+                "SELECT %s AS path_number, value #>> '{}' AS value "
+                "FROM jsonb_path_query(data.dict_content, %s::jsonpath) value"
+            )
+            values_params.extend([path_number, get_jsonpath(path, text)])
+    data_ids_sql, data_ids_params = (
+        data_list.order_by().values("id").query.sql_with_params()
+    )
+    connection = connections[data_list.db]
+    # DISTINCT sorts the values: same values, same list
+    sql = (
+        "SELECT data_values.facet_values, COUNT(*) FROM ("
+        "SELECT (SELECT jsonb_agg(DISTINCT "
+        "jsonb_build_array(facets.path_number, facets.value)) "
+        "FROM ({values}) facets) AS facet_values "
+        "FROM {table} data WHERE data.id IN ({data_ids})"
+        ") data_values "
+        "GROUP BY data_values.facet_values"
+    ).format(
+        table=connection.ops.quote_name(data_list.model._meta.db_table),
+        values=" UNION ALL ".join(values_queries),
+        data_ids=data_ids_sql,
+    )
+    return sql, tuple(values_params) + tuple(data_ids_params)
+
+
+def get_aggregation_pipeline(index):
+    """Get the pipeline counting the data with the same values of the
+    refinement paths.
+
+    Args:
+        index: CategoryIndex
+
+    Returns:
+        tuple: pipeline, {field name: path}
+
+    """
+    field_paths = {
+        f"p{path_number}": path for path_number, path in enumerate(index.paths)
+    }
+    return [
+        {
+            "$group": {
+                "_id": {
+                    field: f"$dict_content.{path}"
+                    for field, path in field_paths.items()
+                },
+                "count": {"$sum": 1},
+            }
+        }
+    ], field_paths
+
+
+def get_scalar_values(value):
+    """Get the scalar values of a value read from the dict content. Arrays
+    are traversed and the value of an element with attributes is read from
+    the '#text' key, as in data_facet_api.get_values_at_path.
+
+    Args:
+        value:
+
+    Returns:
+        list of str
+
+    """
+    if isinstance(value, list):
+        return [
+            scalar_value
+            for item in value
+            for scalar_value in get_scalar_values(item)
+        ]
+    if isinstance(value, dict):
+        value = value.get(TEXT_KEY)
+    if value is None or isinstance(value, (dict, list)):
+        return []
+    return [str(value)]
+
+
+def _count_with_aggregation(data_list, index):
+    """Count the categories with a MongoDB aggregation.
+
+    Args:
+        data_list: MongoData queryset
+        index: CategoryIndex
+
+    Returns:
+        Counter
+
+    """
+    pipeline, field_paths = get_aggregation_pipeline(index)
+    return count_matches(
+        (
+            (
+                [
+                    category_id
+                    for field, value in result["_id"].items()
+                    for scalar_value in get_scalar_values(value)
+                    for category_id in index.get_ids(
+                        field_paths[field], scalar_value
+                    )
+                ],
+                result["count"],
+            )
+            for result in data_list.aggregate(pipeline)
+        ),
+        index,
+    )
+
+
+def _count_with_bitmaps(data_list, index):
+    """Count the categories with the category bitmaps.
+
+    Args:
+        data_list: Data or MongoData queryset
+        index: CategoryIndex
+
+    Returns:
+        dict
+
+    """
+    if settings.MONGODB_INDEXING:
+        data_ids = data_list.order_by().scalar("data_id")
+    else:
+        data_ids = data_list.order_by().values_list("id", flat=True)
+    return {
+        category_id: count
+        for category_id, count in bitmap_index.get_facet_counts(
+            data_ids, index.template_hash, index.get_trees()
+        ).items()
+        if index.get(category_id) is not None
+    }
+
+
+def _count_with_facet_values(data_list, index):
+    """Count the categories with a GROUP BY on the data facet values of
+    their descendants.
+
+    Args:
+        data_list: Data queryset
+        index: CategoryIndex
+
+    Returns:
+        Counter
+
+    """
+    category_counts = (
+        DataFacetValue.objects.filter(
+            data_id__in=data_list.order_by().values("id")
+        )
+        .values(ancestor_id=F("category__ancestor_links__ancestor_id"))
+        .annotate(count=Count("data_id", distinct=True))
+        .order_by()
+    )
+    return Counter(
+        {
+            category_count["ancestor_id"]: category_count["count"]
+            for category_count in category_counts
+            if index.get(category_count["ancestor_id"]) is not None
+        }
+    )
+
+
+def _count_with_group_by(data_list, index):
+    """Count the categories with a GROUP BY on the values of the refinement
+    paths (PostgreSQL).
+
+    Args:
+        data_list: Data queryset
+        index: CategoryIndex
+
+    Returns:
+        Counter
+
+    """
+    if len(index.paths) == 0:
+        return Counter()
+    with connections[data_list.db].cursor() as cursor:
+        cursor.execute(*get_group_by_sql(data_list, index))
+        return count_matches(
+            (
+                (
+                    [
+                        category_id
+                        for path_number, value in facet_values or []
+                        for category_id in index.get_ids(
+                            index.paths[path_number], value
+                        )
+                    ],
+                    count,
+                )
+                for facet_values, count in cursor.fetchall()
+            ),
+            index,
+        )
+
+
+def _count_with_scan(data_list, index):
+    """Count the categories by scanning the dict content of the data, in
+    Python. Fallback of the SQL backends without jsonpath.
+
+    Args:
+        data_list: Data queryset
+        index: CategoryIndex
+
+    Returns:
+        Counter
+
+    """
+    return count_matches(
+        (
+            (
+                [
+                    category_id
+                    for path in index.paths
+                    for value in data_facet_api.get_values_at_path(
+                        dict_content, path
+                    )
+                    for category_id in index.get_ids(path, value)
+                ],
+                1,
+            )
+            for dict_content in data_list.order_by()
+            .values_list("dict_content", flat=True)
+            .iterator(chunk_size=1000)
+            if dict_content
+        ),
+        index,
+    )
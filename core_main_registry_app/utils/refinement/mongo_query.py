@@ -3,30 +3,63 @@ Mongo query creation for the refinements.
 """
 
 import logging
-import operator
-from functools import reduce
+import re
 
-from django.db.models import Q
-
-from core_main_app.commons import exceptions as exceptions
 from core_main_registry_app.commons.constants import DataStatus
-from core_main_registry_app.components.category import api as category_api
-from core_main_registry_app.components.refinement import api as refinement_api
+from core_main_registry_app.components.category_closure import (
+    api as category_closure_api,
+)
 from core_main_registry_app.components.template import (
     api as template_registry_api,
 )
-from core_main_registry_app.constants import PATH_STATUS
+from core_main_registry_app.constants import CATEGORY_SUFFIX, PATH_STATUS
+from core_main_registry_app.utils.refinement import cache as refinement_cache
+from core_main_registry_app.utils.refinement import category_index
 
 logger = logging.getLogger(
     "core_main_registry_app.utils.refinement.mongo_query"
 )
 
+# end of the regex matching the values of a subtree, with or without the
+# value of its root
+PREFIX_REGEX_END = ":"
+PREFIX_REGEX_END_WITH_ROOT = "(:|$)"
 
-def build_refinements_query(refinements):
+
+def build_refinements_query(refinements, template_hash=None):
     """Build the refinements query.
 
     Args:
-        refinements:
+        refinements: list of list of category ids
+        template_hash: hash of the template the refinements belong to, read
+            from the selected categories if None. The compiled query is
+            cached for this template hash.
+
+    Returns:
+
+    """
+    if template_hash is None:
+        template_hash = category_index.get_template_hash(refinements)
+    if template_hash is not None:
+        query = refinement_cache.get_query(template_hash, refinements)
+        if query is not None:
+            return query
+
+    query = _build_refinements_query(refinements, template_hash)
+
+    if template_hash is not None and len(query) > 0:
+        refinement_cache.set_query(template_hash, refinements, query)
+
+    return query
+
+
+def _build_refinements_query(refinements, template_hash=None):
+    """Build the refinements query.
+
+    Args:
+        refinements: list of list of category ids
+        template_hash: if set, categories are read from the category index
+            of the template hash instead of the database.
 
     Returns:
 
@@ -36,41 +69,41 @@ def build_refinements_query(refinements):
 
     try:
         # transform the refinement in mongo query
-        for refinement in refinements:
-            queries = dict()
+        for queries in category_index.get_selected_prefixes_by_path(
+            refinements, template_hash
+        ):
             in_queries = {}
-            # For each category in the refinement
-            for category_id in refinement:
-                try:
-                    # Get category
-                    category = category_api.get_by_id(category_id)
-                    dot_notation = category.path
-                    value = category.value
-                    # If dot notation already exists, append to the dict
-                    if dot_notation in queries:
-                        queries[dot_notation].append(value)
-                    # Create a dict with the dot notation as the key
-                    else:
-                        queries[dot_notation] = [value]
-                except (exceptions.DoesNotExist, Exception) as exception:
-                    logger.warning(
-                        "Impossible to find the category (%s): %s.",
-                        str(len(category_id)),
-                        str(exception),
-                    )
-
-            for query in queries:
-                # Create the query with $in
-                key = query
-                values = {"$in": queries[query]}
-                in_queries[key] = values
+            prefix_queries = []
+            for (key, has_attributes), selected in queries.items():
+                keys = [key]
                 # Case of the element has attributes
-                in_queries[key + ".#text"] = values
+                if has_attributes:
+                    keys.append(key + ".#text")
+                for field in keys:
+                    # Create the query with $in
+                    if len(selected.values) > 0:
+                        in_queries.setdefault(field, {"$in": []})[
+                            "$in"
+                        ].extend(selected.values)
+                    # Fully selected subtrees: anchored prefix, can use index
+                    for prefix, include_prefix in selected.prefixes:
+                        prefix_queries.append(
+                            {
+                                field: {
+                                    "$regex": get_prefix_regex(
+                                        prefix, include_prefix
+                                    )
+                                }
+                            }
+                        )
 
-            if len(in_queries) > 0:
+            if len(in_queries) > 0 or len(prefix_queries) > 0:
                 # $or between categories belonging to the same refinement
                 or_queries.append(
-                    {"$or": [{x: in_queries[x]} for x in in_queries]}
+                    {
+                        "$or": [{x: in_queries[x]} for x in in_queries]
+                        + prefix_queries
+                    }
                 )
 
         if len(or_queries) > 0:
@@ -87,6 +120,43 @@ def build_refinements_query(refinements):
         return {}
 
 
+def get_prefix_regex(prefix, include_prefix):
+    """Get the anchored regex matching the values of a category subtree.
+
+    Args:
+        prefix: value shared by the categories of the subtree (a:b)
+        include_prefix: if True, also match the prefix itself
+
+    Returns:
+        str: regex matching a:b:... (and a:b)
+
+    """
+    return "^{0}{1}".format(
+        re.escape(prefix),
+        PREFIX_REGEX_END_WITH_ROOT if include_prefix else PREFIX_REGEX_END,
+    )
+
+
+def _get_prefix_from_regex(regex):
+    """Get the prefix of a regex built by get_prefix_regex.
+
+    Args:
+        regex:
+
+    Returns:
+        str: prefix or None if the regex was not built by get_prefix_regex
+
+    """
+    if not isinstance(regex, str) or not regex.startswith("^"):
+        return None
+    for regex_end in (PREFIX_REGEX_END_WITH_ROOT, PREFIX_REGEX_END):
+        if regex.endswith(regex_end):
+            return re.sub(
+                r"\\(.)", r"\1", regex[1 : -len(regex_end)]  # noqa: E203
+            )
+    return None
+
+
 def get_refinement_selected_values_from_query(query, request):
     """get the refinement selected values from a json query
 
@@ -104,6 +174,7 @@ def get_refinement_selected_values_from_query(query, request):
     """
     # create a list of key (category), value_list (selected values)
     category_values_list = {}
+    category_prefixes_list = {}
     return_value = {}
 
     # No "$and" means no refinement selected
@@ -117,8 +188,21 @@ def get_refinement_selected_values_from_query(query, request):
         # Go through all '$or' => where refinement are
         for element in element_or["$or"]:
             for key, value in list(element.items()):
-                # Do not parse path ending with "#text" and parse only "$in"
-                if key.endswith("#text") or "$in" not in value:
+                # Do not parse path ending with "#text"
+                if key.endswith("#text"):
+                    continue
+
+                # Fully selected subtree
+                if "$regex" in value:
+                    prefix = _get_prefix_from_regex(value["$regex"])
+                    if prefix is not None:
+                        category_prefixes_list.setdefault(key, []).append(
+                            prefix
+                        )
+                    continue
+
+                # Parse only "$in"
+                if "$in" not in value:
                     continue
 
                 for selected_value in value["$in"]:
@@ -132,51 +216,46 @@ def get_refinement_selected_values_from_query(query, request):
                     else:
                         category_values_list.update({key: [selected_value]})
 
+    # No refinement found
+    if len(category_values_list) == 0 and len(category_prefixes_list) == 0:
+        return return_value
+
     # get global template.
     template = template_registry_api.get_current_registry_template(
         request=request
     )
-    # get refinements.
-    refinements = refinement_api.get_all_filtered_by_template_hash(
-        template.hash
-    )
-    refinements_ids = [x.id for x in refinements]
-    # get all category.
-    q_list = []
+    # get the categories of the template.
+    index = category_index.get_index(template.hash)
+    selected_ids = set()
     for key, values in list(category_values_list.items()):
-        # prepare the query
-        q_list.append(
-            Q(path=key)
-            & Q(refinement_id__in=refinements_ids)
-            & Q(value__in=values)
-        )
-
-    if len(q_list) == 0:  # No refinement found
-        return return_value
+        for value in values:
+            selected_ids.update(index.get_ids(key, value))
+    if len(category_prefixes_list) > 0:
+        # roots of the fully selected subtrees
+        root_ids = set()
+        for key, prefixes in list(category_prefixes_list.items()):
+            for prefix in prefixes:
+                root_ids.update(index.get_ids(key, prefix + CATEGORY_SUFFIX))
+                root_ids.update(index.get_ids(key, prefix))
+        # expand the subtrees in a single join on the closure table
+        for category_id in category_closure_api.get_all_descendant_ids(
+            root_ids
+        ):
+            category = index.get(category_id)
+            # Do not select categories ending with '__category'
+            if category is None or category.value.endswith(CATEGORY_SUFFIX):
+                continue
+            selected_ids.add(category.id)
 
-    # if refinement are found, we build the structure
-    categories = category_api.get_all().filter((reduce(operator.or_, q_list)))
-    # now we have to build a list of {refinement name: category ids, }
-    for category in categories:
-        key = category.refinement.slug
-        display_name = category.refinement.name
-        if key in return_value:
-            return_value[key][display_name].append(
-                {"id": category.id, "value": category.value.split(":")[0]}
-            )
-        else:
-            return_value.update(
-                {
-                    key: {
-                        display_name: [
-                            {
-                                "id": category.id,
-                                "value": category.value.split(":")[0],
-                            }
-                        ]
-                    }
-                }
-            )
+    # now we have to build a list of {refinement name: category ids, } (in tree order)
+    selected_categories = sorted(
+        (index.get(category_id) for category_id in selected_ids),
+        key=lambda category: (category.tree_id, category.lft),
+    )
+    for category in selected_categories:
+        return_value.setdefault(category.refinement_slug, {}).setdefault(
+            category.refinement_name, []
+        ).append({"id": category.id, "value": category.value.split(":")[0]})
     # return the structure
     return return_value
 
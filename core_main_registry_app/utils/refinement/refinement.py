@@ -2,45 +2,277 @@
 Refinements creation.
 """
 
+import hashlib
+import logging
+import time
+
+from django.db import transaction
+
+from core_main_app.commons import exceptions
+from core_main_app.settings import MONGODB_INDEXING
 from core_main_registry_app.constants import UNSPECIFIED_LABEL
+from core_main_registry_app.utils.refinement import cache as refinement_cache
+from core_main_registry_app.utils.refinement import category_index
+from core_main_registry_app.utils.refinement import sql_query
 from core_main_registry_app.utils.refinement.tools import xsd_refinements
 
+logger = logging.getLogger(
+    "core_main_registry_app.utils.refinement.refinement"
+)
+
+# Stage of the creation of the refinements, see init_refinements
+DB_WRITE_STAGE = "db write"
 
-def init_refinements(template):
+
+def init_refinements(
+    template,
+    task_id="",
+    progress=None,
+    timings=None,
+    workers=None,
+    rebuild=False,
+):
     """Init the refinements for the given template. Categories used as refinement (search page...).
 
+    A single generation runs at a time for a template hash: the call returns
+    without doing anything if the refinements of the template hash already
+    exist or are being generated.
+
     Args:
         template:
+        task_id: id of the task generating the refinements
+        progress: function called with the number of refinements created and
+        the total number of refinements
+        timings: dict completed with the duration (in seconds) of each stage
+        workers: number of processes extracting the refinements
+        rebuild: replace the existing refinements of the template hash
 
     Returns:
 
     """
-    from core_main_registry_app.components.refinement import (
-        api as refinement_api,
+    from core_main_registry_app.components.refinement.models import (
+        Refinement,
+    )
+    from core_main_registry_app.components.refinement_generation import (
+        api as refinement_generation_api,
     )
 
-    try:
-        # Check if refinements already exist.
-        if not refinement_api.check_refinements_already_exist_by_template_hash(
+    # Check if refinements already exist (not cached: they may have been
+    # deleted since).
+    if not rebuild and (
+        Refinement.check_refinements_already_exist_by_template_hash(
             template.hash
-        ):
-            refinements_trees = xsd_refinements.loads_refinements_trees(
-                template
+        )
+    ):
+        return
+
+    if template.hash and not refinement_generation_api.start(
+        template.hash, task_id
+    ):
+        logger.info("Refinements already being generated (%s).", template.hash)
+        if rebuild:
+            raise Exception(
+                f"Refinements already being generated ({template.hash})."
             )
-            # Create refinements.
-            for root, tree in list(refinements_trees.items()):
-                refinement = refinement_api.create_and_save(
-                    name=root.title,
-                    xsd_name=root.xsd_name,
-                    template_hash=template.hash,
-                )
-                # Create categories.
-                create_categories(tree, refinement)
+        return
+
+    try:
+        _init_refinements(template, progress, timings, workers, rebuild)
     except Exception as exception:
+        if template.hash:
+            refinement_generation_api.finish(template.hash, success=False)
         raise Exception(
             f"Impossible to init the refinements. An error occurred while retrieving "
             f"the template: {str(exception)}"
         )
+    if template.hash:
+        refinement_generation_api.finish(template.hash)
+
+
+def _init_refinements(
+    template, progress=None, timings=None, workers=None, rebuild=False
+):
+    """Create the refinements and categories of a template, if missing.
+
+    Args:
+        template:
+        progress:
+        timings:
+        workers:
+        rebuild:
+
+    Returns:
+
+    """
+    from core_main_registry_app.components.flattened_schema import (
+        api as flattened_schema_api,
+    )
+    from core_main_registry_app.components.refinement import (
+        api as refinement_api,
+    )
+    from core_main_registry_app.components.refinement.models import (
+        Refinement,
+    )
+
+    if rebuild:
+        if template.hash:
+            # Flatten the schema again
+            flattened_schema_api.delete_all(template.hash)
+    # Check again: generated by a concurrent task before being claimed.
+    elif Refinement.check_refinements_already_exist_by_template_hash(
+        template.hash
+    ):
+        return
+
+    if timings is None:
+        timings = {}
+    refinements_trees = xsd_refinements.loads_refinements_trees(
+        template, workers=workers, timings=timings
+    )
+    total = len(refinements_trees)
+    if progress is not None:
+        progress(0, total)
+    start = time.perf_counter()
+    # All the refinements of the template hash or none
+    with transaction.atomic():
+        if rebuild:
+            refinement_api.delete_by_template_hash(template.hash)
+        # Create refinements.
+        for current, (root, tree) in enumerate(
+            list(refinements_trees.items()), start=1
+        ):
+            # rebuilt refinements are not shared: they replace stale ones
+            _create_refinement(template, root, tree, share=not rebuild)
+            if progress is not None:
+                progress(current, total)
+    timings[DB_WRITE_STAGE] = time.perf_counter() - start
+    # Invalidate the queries and index cached for this template hash.
+    refinement_cache.invalidate(template.hash)
+    category_index.invalidate(template.hash)
+    # Index the refinement paths of the data.
+    if not MONGODB_INDEXING:
+        _create_path_indexes(refinements_trees)
+
+
+def verify_refinements(template, timings=None, workers=None):
+    """Check that the refinements of a template are the ones generated from
+    its current schema.
+
+    Args:
+        template:
+        timings: dict completed with the duration (in seconds) of each stage
+        workers: number of processes extracting the refinements
+
+    Returns:
+        bool: True if the refinements are up to date
+
+    """
+    from core_main_registry_app.components.refinement.models import (
+        Refinement,
+    )
+
+    refinements_trees = xsd_refinements.loads_refinements_trees(
+        template, workers=workers, timings=timings
+    )
+    expected_fingerprints = [
+        get_fingerprint(root, tree) for root, tree in refinements_trees.items()
+    ]
+    fingerprints = list(
+        Refinement.get_all_filtered_by_template_hash(
+            template.hash
+        ).values_list("fingerprint", flat=True)
+    )
+    return fingerprints == expected_fingerprints
+
+
+def _create_refinement(template, root, tree, share=True):
+    """Create a refinement of a template, or share the same refinement of
+    another template version.
+
+    Args:
+        template:
+        root: Refinement tree info.
+        tree: Tree of categories.
+        share: share the refinement with the same fingerprint, if any
+
+    Returns:
+
+    """
+    from core_main_registry_app.components.refinement import (
+        api as refinement_api,
+    )
+
+    fingerprint = get_fingerprint(root, tree)
+    shared_refinement = None
+    if share:
+        try:
+            shared_refinement = refinement_api.get_last_by_fingerprint(
+                fingerprint
+            )
+        except exceptions.DoesNotExist:
+            pass
+
+    if shared_refinement is not None:
+        # Same refinement in another template version: share it
+        refinement_api.add_template_hash(shared_refinement, template.hash)
+        return
+
+    refinement = refinement_api.create_and_save(
+        name=root.title,
+        xsd_name=root.xsd_name,
+        template_hash=template.hash,
+        fingerprint=fingerprint,
+    )
+    # Create categories.
+    create_categories(tree, refinement)
+
+
+def _create_path_indexes(refinements_trees):
+    """Create the database indexes of the refinement paths.
+
+    Args:
+        refinements_trees:
+
+    """
+    keys = [key for tree in refinements_trees.values() for key in tree.keys()]
+    paths = [key.path for key in keys]
+    text_paths = {key.path for key in keys if key.has_attributes}
+    try:
+        sql_query.create_path_indexes(paths, text_paths)
+    except Exception as exception:
+        logger.warning(
+            "Impossible to create the refinement path indexes: %s.",
+            str(exception),
+        )
+
+
+def get_fingerprint(root, tree):
+    """Get the fingerprint of a refinement: hash of its name and of the
+    content of its categories tree, in creation order.
+
+    Args:
+        root: Refinement tree info.
+        tree: Tree of categories.
+
+    Returns:
+        str
+
+    """
+    fingerprint = hashlib.sha256()
+    fingerprint.update(f"{root.title}\0{root.xsd_name}\n".encode())
+    # (depth, key, leaves), in the order of creation of the categories
+    stack = [(0, key, leaves) for key, leaves in reversed(tree.items())]
+    while stack:
+        depth, key, leaves = stack.pop()
+        fingerprint.update(
+            f"{depth}\0{key.title}\0{key.path}\0{key.value}\0"
+            f"{key.has_attributes}\n".encode()
+        )
+        stack.extend(
+            (depth + 1, child_key, child_leaves)
+            for child_key, child_leaves in reversed(sorted(leaves.items()))
+        )
+    return fingerprint.hexdigest()
 
 
 def create_categories(tree, refinement):
@@ -51,31 +283,40 @@ def create_categories(tree, refinement):
         refinement: Refinement.
 
     """
+    from core_main_registry_app.components.category import api as category_api
+
+    categories = []
     # Iterate over the categories.
     for key, leaves in list(tree.items()):
-        _create_sub_categories(key, leaves, refinement)
+        _get_sub_categories(key, leaves, refinement, categories)
+    # Save all the categories at once.
+    category_api.bulk_create_trees(categories)
 
 
-def _create_sub_categories(key, leaves, refinement, parent=None):
-    """Create all sub categories.
+def _get_sub_categories(key, leaves, refinement, categories, parent=None):
+    """Get all sub categories, in tree order.
 
     Args:
         key:
         leaves:
         refinement:
+        categories: list of the unsaved categories, completed in place
         parent:
 
     """
-    from core_main_registry_app.components.category import api as category_api
+    from core_main_registry_app.components.category.models import Category
 
-    # No children. Only create the category.
+    # No children. Only the category.
     if len(leaves) == 0:
-        category_api.create_and_save(
-            name=key.title,
-            path=key.path,
-            value=key.value,
-            parent=parent,
-            refinement=refinement,
+        categories.append(
+            Category(
+                name=key.title,
+                path=key.path,
+                value=key.value,
+                parent=parent,
+                refinement=refinement,
+                has_attributes=key.has_attributes,
+            )
         )
     elif len(leaves) > 0:
 
@@ -85,15 +326,19 @@ def _create_sub_categories(key, leaves, refinement, parent=None):
             else key.value_as_category()
         )
 
-        # Create the category and become a parent.
-        parent = category_api.create_and_save(
+        # The category becomes a parent.
+        parent = Category(
             name=key.title,
             path=key.path,
             value=value,
             parent=parent,
             refinement=refinement,
+            has_attributes=key.has_attributes,
         )
+        categories.append(parent)
         # For each child.
         for key, value in sorted(leaves.items()):
-            # Create sub categories.
-            _create_sub_categories(key, value, refinement, parent=parent)
+            # Get sub categories.
+            _get_sub_categories(
+                key, value, refinement, categories, parent=parent
+            )
@@ -0,0 +1,186 @@
+"""
+Django query creation for the refinements, used when data are not indexed
+with MongoDB.
+
+On PostgreSQL, values are matched with the JSONB '?|' operator on the
+refinement paths of the dict_content column, which can use the GIN indexes
+created by create_path_indexes. With ENABLE_DATA_FACETS, the categories are
+matched on the data facet values table instead.
+"""
+
+import hashlib
+import logging
+
+from django.db import connection
+from django.db.models import Q
+
+from core_main_app.components.data.models import Data
+from core_main_registry_app import settings as registry_settings
+from core_main_registry_app.components.data_facet import (
+    api as data_facet_api,
+)
+from core_main_registry_app.utils.refinement import category_index
+
+logger = logging.getLogger("core_main_registry_app.utils.refinement.sql_query")
+
+DICT_CONTENT_FIELD = "dict_content"
+TEXT_KEY = "#text"
+PATH_INDEX_PREFIX = "core_main_registry_app_rfx_"
+
+
+def build_refinements_query(refinements, template_hash=None):
+    """Build the refinements query on the Data model.
+
+    Args:
+        refinements: list of list of category ids
+        template_hash: categories are read from the category index of the
+            template hash, read from the selected categories if None.
+
+    Returns:
+        Q object
+
+    """
+    if registry_settings.ENABLE_DATA_FACETS:
+        # categories matched by each data, kept up to date on save
+        return data_facet_api.get_data_query_from_refinements(refinements)
+
+    and_query = Q()
+    try:
+        if template_hash is None:
+            template_hash = category_index.get_template_hash(refinements)
+        for values_by_path in category_index.get_selected_values_by_path(
+            refinements, template_hash
+        ):
+            values_by_field = {}
+            for (path, has_attributes), values in values_by_path.items():
+                fields = [path]
+                # Case of the element has attributes
+                if has_attributes:
+                    fields.append(f"{path}.{TEXT_KEY}")
+                for field in fields:
+                    values_by_field.setdefault(field, []).extend(values)
+
+            or_query = Q()
+            for field, values in values_by_field.items():
+                or_query |= get_path_query(field, values)
+
+            if len(or_query) > 0:
+                # AND between refinements
+                and_query &= or_query
+
+        return and_query
+    except Exception as exception:
+        logger.error(
+            "Something went wrong during the creation of the refinement query. Search "
+            "won't be refined: %s.",
+            str(exception),
+        )
+        return Q()
+
+
+def get_path_query(path, values):
+    """Get the query matching one of the values at a path of the dict content.
+
+    Args:
+        path: dot notation path
+        values: list of values
+
+    Returns:
+        Q object
+
+    """
+    lookup = "__".join([DICT_CONTENT_FIELD] + path.split("."))
+    if _uses_postgresql():
+        # '?|' matches a string value or a list containing one of the values
+        return Q(**{f"{lookup}__has_any_keys": values})
+    return Q(**{f"{lookup}__in": values})
+
+
+def get_path_index_name(path):
+    """Get the name of the index of a refinement path.
+
+    Args:
+        path: dot notation path
+
+    Returns:
+
+    """
+    return (
+        PATH_INDEX_PREFIX + hashlib.sha1(path.encode("utf-8")).hexdigest()[:20]
+    )
+
+
+def get_create_path_index_sql(path, concurrently=False):
+    """Get the SQL statement creating the GIN index of a refinement path.
+
+    Args:
+        path: dot notation path
+        concurrently:
+
+    Returns:
+
+    """
+    keys = ",".join(
+        '"{0}"'.format(key.replace("\\", "\\\\").replace('"', '\\"'))
+        for key in path.split(".")
+    )
+    return (
+        "CREATE INDEX {concurrently}IF NOT EXISTS {name} ON {table} "
+        "USING gin (({column} #> '{{{keys}}}'::text[]))".format(
+            concurrently="CONCURRENTLY " if concurrently else "",
+            name=connection.ops.quote_name(get_path_index_name(path)),
+            table=connection.ops.quote_name(Data._meta.db_table),
+            column=connection.ops.quote_name(DICT_CONTENT_FIELD),
+            keys=keys.replace("'", "''"),
+        )
+    )
+
+
+def get_indexed_paths(paths, text_paths=None):
+    """Get the paths to index for a list of refinement paths.
+
+    Args:
+        paths: list of dot notation paths
+        text_paths: paths of the elements that can have attributes, all
+            paths if None
+
+    Returns:
+        list of paths, including the '#text' twin of the text paths
+
+    """
+    indexed_paths = []
+    for path in paths:
+        indexed_paths.append(path)
+        if text_paths is None or path in text_paths:
+            indexed_paths.append(f"{path}.{TEXT_KEY}")
+    return list(dict.fromkeys(indexed_paths))
+
+
+def create_path_indexes(paths, text_paths=None):
+    """Create the GIN indexes of the refinement paths (PostgreSQL only).
+
+    Args:
+        paths: list of dot notation paths
+        text_paths: paths of the elements that can have attributes, all
+            paths if None
+
+    Returns:
+
+    """
+    if not _uses_postgresql():
+        return
+
+    # indexes can not be created concurrently in a transaction
+    concurrently = not connection.in_atomic_block
+    with connection.cursor() as cursor:
+        for path in get_indexed_paths(paths, text_paths):
+            cursor.execute(get_create_path_index_sql(path, concurrently))
+
+
+def _uses_postgresql():
+    """Check if the data are stored in PostgreSQL.
+
+    Returns:
+
+    """
+    return connection.vendor == "postgresql"
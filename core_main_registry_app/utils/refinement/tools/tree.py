@@ -20,11 +20,15 @@ class TreeInfo(object):
     title = ""
     selected = False
 
-    def __init__(self, xsd_name="", title="", path="", value=""):
+    def __init__(
+        self, xsd_name="", title="", path="", value="", has_attributes=True
+    ):
         self.xsd_name = xsd_name
         self.title = title
         self.path = path
         self.value = value
+        # False if the element at path can not have attributes in the data
+        self.has_attributes = has_attributes
 
     def __str__(self):
         return self.title
@@ -47,7 +51,14 @@ class TreeInfo(object):
         return f"{self.value}{CATEGORY_SUFFIX}"
 
 
-def build_tree(tree, element_name, element_display_name, enums, dot_query):
+def build_tree(
+    tree,
+    element_name,
+    element_display_name,
+    enums,
+    dot_query,
+    has_attributes=True,
+):
     """Create a tree of refinements.
 
     Args:
@@ -56,6 +67,7 @@ def build_tree(tree, element_name, element_display_name, enums, dot_query):
         element_display_name:
         enums:
         dot_query:
+        has_attributes: False if the element can not have attributes
 
     Returns:
 
@@ -65,6 +77,7 @@ def build_tree(tree, element_name, element_display_name, enums, dot_query):
         xsd_name=element_name, title=element_display_name
     )
     first_node = tree.setdefault(type_refinement, OrderedDict())
+    longest_values = _get_longest_values(enums)
 
     # For each enumerations, we create the tree representation.
     for enum in enums:
@@ -78,6 +91,7 @@ def build_tree(tree, element_name, element_display_name, enums, dot_query):
                 title=level,
                 path=dot_query,
                 value=":".join(levels[: i + 1]),
+                has_attributes=has_attributes,
             )
             g_node = parent_node.setdefault(graph, OrderedDict())
             parent_node = g_node
@@ -85,7 +99,7 @@ def build_tree(tree, element_name, element_display_name, enums, dot_query):
             # Case where it is the last element of the enum
             # check if we are in the unspecified case
             if len(levels) - 1 == i and _check_case_unspecified(
-                enums, enum, i, level
+                longest_values, enum, i, level
             ):
                 # Case unspecified: create a new node for the unspecified node
                 title = (
@@ -98,35 +112,45 @@ def build_tree(tree, element_name, element_display_name, enums, dot_query):
                     title=title,
                     path=dot_query,
                     value=":".join(levels[: i + 1]),
+                    has_attributes=has_attributes,
                 )
                 parent_node.setdefault(graph, OrderedDict())
 
     return tree
 
 
-def _check_case_unspecified(enums, current_enum, i, current_level):
-    """Check if we can find the case of the unspecified.
+def _get_longest_values(enums):
+    """Index the length of the longest enum value having each level at each
+    position.
 
     Args:
         enums: list of enums
+
+    Returns:
+        dict: {(index of level, level): length of the longest enum value}
+    """
+    longest_values = {}
+    for enum in enums:
+        value = enum.attrib["value"]
+        for i, level in enumerate(value.split(":")):
+            key = (i, level)
+            if len(value) > longest_values.get(key, -1):
+                longest_values[key] = len(value)
+    return longest_values
+
+
+def _check_case_unspecified(longest_values, current_enum, i, current_level):
+    """Check if we can find the case of the unspecified: another enum, longer
+    than the current enum, has the current level at the same position.
+
+    Args:
+        longest_values: index of the longest enum values by level
         current_enum: current enum
         i: index of current level in current enum
         current_level: current level
 
     Returns:
     """
-    for enum in enums:
-        # We work only on enums different to the current enum
-        if current_enum != enum:
-            levels = enum.attrib["value"].split(":")
-            # check if the current level is in the levels of the enum tested.
-            # check if the current level is at the same position in the enum
-            # check if the enum has more level
-            if (
-                current_level in levels
-                and levels[i] == current_level
-                and len(current_enum.attrib["value"])
-                < len(enum.attrib["value"])
-            ):
-                return True
-    return False
+    return longest_values.get((i, current_level), -1) > len(
+        current_enum.attrib["value"]
+    )
@@ -3,157 +3,552 @@ Management of the refinements' Tree from a schema.
 """
 
 import logging
+import time
 from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from lxml import etree
 
-from core_main_app.utils.xsd_flattener.xsd_flattener_database_url import (
-    XSDFlattenerDatabaseOrURL,
-)
 from core_parser_app.tools.parser.utils.xml import get_app_info_options
-from xml_utils.commons.constants import LXML_SCHEMA_NAMESPACE
+from xml_utils.commons.constants import LXML_SCHEMA_NAMESPACE, XML_NAMESPACE
 from xml_utils.xsd_tree.operations.namespaces import (
     get_namespaces,
     get_target_namespace,
 )
 from xml_utils.xsd_tree.xsd_tree import XSDTree
+from core_main_registry_app.components.flattened_schema import (
+    api as flattened_schema_api,
+)
+from core_main_registry_app.settings import REFINEMENT_STREAMING_EXTRACTION
 from core_main_registry_app.utils.refinement.tools import tree
 
 logger = logging.getLogger(
     "core_main_registry_app.utils.refinement.tools.xsd_refinements"
 )
 
+ELEMENT_TAG = "{0}element".format(LXML_SCHEMA_NAMESPACE)
+EXTENSION_TAG = "{0}extension".format(LXML_SCHEMA_NAMESPACE)
+SIMPLE_TYPE_TAG = "{0}simpleType".format(LXML_SCHEMA_NAMESPACE)
+COMPLEX_TYPE_TAG = "{0}complexType".format(LXML_SCHEMA_NAMESPACE)
+SIMPLE_CONTENT_TAG = "{0}simpleContent".format(LXML_SCHEMA_NAMESPACE)
+ENUMERATION_TAG = "{0}enumeration".format(LXML_SCHEMA_NAMESPACE)
+APP_INFO_TAG = "{0}appinfo".format(LXML_SCHEMA_NAMESPACE)
+ATTRIBUTE_TAGS = tuple(
+    "{0}{1}".format(LXML_SCHEMA_NAMESPACE, tag)
+    for tag in ("attribute", "attributeGroup", "anyAttribute")
+)
+INDEXED_TAGS = (ELEMENT_TAG, EXTENSION_TAG, SIMPLE_TYPE_TAG, COMPLEX_TYPE_TAG)
+# Nodes kept by the streaming mode, with their ancestors and app info
+KEPT_TAGS = frozenset(
+    (ELEMENT_TAG, EXTENSION_TAG, SIMPLE_TYPE_TAG, ENUMERATION_TAG)
+    + ATTRIBUTE_TAGS
+)
+# Number of characters of the schema fed at once to the streaming parser
+FEED_SIZE = 1 << 16
+
+# Stages of the extraction of the refinements, see loads_refinements_trees
+FLATTEN_STAGE = "flatten"
+PARSE_STAGE = "parse"
+EXTRACT_STAGE = "extract"
+TREE_BUILD_STAGE = "tree build"
+
+# Schema parsed by a worker process of the parallel extraction
+_worker_schema = None
+
+
+class SchemaIndex(object):
+    """
+    Elements of a schema by @type, extensions by @base and global types by
+    name, built in a single traversal of the schema.
+    """
+
+    def __init__(self, xml_doc_tree=None):
+        """
+
+        Args:
+            xml_doc_tree: schema tree, nodes can also be added one by one
+        """
+        self.elements_by_type = {}
+        self.extensions_by_base = {}
+        self.simple_types_by_name = {}
+        self.complex_types_by_name = {}
+        if xml_doc_tree is None:
+            return
+
+        root = (
+            xml_doc_tree.getroot()
+            if hasattr(xml_doc_tree, "getroot")
+            else xml_doc_tree
+        )
+        # descendants of the root in document order, as returned by findall
+        for node in root.iter(*INDEXED_TAGS):
+            if node is not root:
+                self.add(node, root)
+
+    def add(self, node, root):
+        """Index a node of the schema. Nodes are added in document order.
+
+        Args:
+            node: element, extension, simple type or complex type
+            root: root of the schema
+
+        Returns:
+
+        """
+        if node.tag == ELEMENT_TAG and "type" in node.attrib:
+            self.elements_by_type.setdefault(node.attrib["type"], []).append(
+                node
+            )
+        elif node.tag == EXTENSION_TAG and "base" in node.attrib:
+            self.extensions_by_base.setdefault(node.attrib["base"], []).append(
+                node
+            )
+        elif (
+            node.tag == SIMPLE_TYPE_TAG
+            and node.getparent() is root
+            and "name" in node.attrib
+        ):
+            self.simple_types_by_name.setdefault(node.attrib["name"], node)
+        elif (
+            node.tag == COMPLEX_TYPE_TAG
+            and node.getparent() is root
+            and "name" in node.attrib
+        ):
+            self.complex_types_by_name.setdefault(node.attrib["name"], node)
+
+    def get_elements_by_type(self, type_name):
+        """Get the elements of a type.
+
+        Args:
+            type_name: value of the @type attribute
+
+        Returns:
+            list of elements
+
+        """
+        return self.elements_by_type.get(type_name, [])
+
+    def get_extensions_by_base(self, base):
+        """Get the extensions of a type.
+
+        Args:
+            base: value of the @base attribute
 
-def loads_refinements_trees(template):
+        Returns:
+            list of extensions
+
+        """
+        return self.extensions_by_base.get(base, [])
+
+    def get_simple_type(self, name):
+        """Get a global simple type by name.
+
+        Args:
+            name:
+
+        Returns:
+            simple type or None
+
+        """
+        return self.simple_types_by_name.get(name)
+
+    def get_complex_type(self, name):
+        """Get a global complex type by name.
+
+        Args:
+            name:
+
+        Returns:
+            complex type or None
+
+        """
+        return self.complex_types_by_name.get(name)
+
+
+def loads_refinements_trees(
+    template, workers=None, streaming=None, timings=None
+):
     """Load refinements for the given template.
 
     Args:
         template:
+        workers: number of processes extracting the refinements, None, 0 or 1
+        to extract them in the current process
+        streaming: load only the parts of the schema used by the extraction,
+        default to REFINEMENT_STREAMING_EXTRACTION
+        timings: dict completed with the duration (in seconds) of each stage
 
     Returns:
 
     """
+    if streaming is None:
+        streaming = REFINEMENT_STREAMING_EXTRACTION
+    if timings is None:
+        timings = {}
     # Get the flatten schema
+    start = time.perf_counter()
     ref_xml_schema_content = _get_flatten_schema(template)
-    xml_doc_tree = XSDTree.build_tree(ref_xml_schema_content)
-    # Get the target namespace
-    target_ns_prefix = _get_target_namespace_prefix(
-        ref_xml_schema_content, xml_doc_tree
-    )
-    target_ns_prefix = (
-        "{}:".format(target_ns_prefix) if target_ns_prefix != "" else ""
+    timings[FLATTEN_STAGE] = time.perf_counter() - start
+    start = time.perf_counter()
+    xml_doc_tree, schema_index, target_ns_prefix = _load_schema(
+        ref_xml_schema_content, streaming
     )
+    timings[PARSE_STAGE] = time.perf_counter() - start
 
     # Iterate over the simple types.
-    simple_types = xml_doc_tree.findall(
-        "./{0}simpleType".format(LXML_SCHEMA_NAMESPACE)
-    )
+    start = time.perf_counter()
+    simple_types = _get_simple_types(xml_doc_tree)
+    simple_types_info = None
+    if workers is not None and workers > 1 and len(simple_types) > 1:
+        simple_types_info = _get_simple_types_info_in_parallel(
+            ref_xml_schema_content, len(simple_types), workers, streaming
+        )
+    if simple_types_info is None:
+        simple_types_info = [
+            _get_simple_type_info_or_error(
+                simple_type, schema_index, target_ns_prefix
+            )
+            for simple_type in simple_types
+        ]
+    timings[EXTRACT_STAGE] = time.perf_counter() - start
+
+    start = time.perf_counter()
     trees = OrderedDict()
-    for simple_type in simple_types:
+    # Build the trees in the order of the simple types
+    for simple_type, (info, error) in zip(simple_types, simple_types_info):
+        if error is not None:
+            # Log the exception
+            logger.warning(error)
+            continue
+        if info is None:
+            continue
         try:
-            # Get all the enumerations
-            enums = simple_type.findall(
-                "./{0}restriction/{0}enumeration".format(LXML_SCHEMA_NAMESPACE)
+            element_name, element_label, dot_query, has_attributes = info
+            # Build the corresponding refinement tree
+            trees = tree.build_tree(
+                tree=trees,
+                element_name=element_name,
+                element_display_name=element_label,
+                enums=_get_enumerations(simple_type),
+                dot_query=dot_query,
+                has_attributes=has_attributes,
             )
-            if len(enums) > 0:
-                # Get the corresponding element
-                element = xml_doc_tree.findall(
-                    ".//{0}element[@type='{1}']".format(
-                        LXML_SCHEMA_NAMESPACE,
-                        target_ns_prefix + simple_type.attrib["name"],
-                    )
-                )
-                if len(element) > 1:
-                    logger.error(
-                        "More than one element using the enumeration ({0})".format(
-                            str(len(element))
-                        )
-                    )
-                else:
-                    element = element[0]
-                    # get the label of refinements
-                    element_name, element_label = _get_element_info(
-                        element, xml_doc_tree, target_ns_prefix
-                    )
-                    query = []
-
-                    # Build the path to access the element (dot notation)
-                    while element is not None:
-                        if element.tag == "{0}element".format(
-                            LXML_SCHEMA_NAMESPACE
-                        ):
-                            query.insert(0, element.attrib["name"])
-                        elif element.tag == "{0}simpleType".format(
-                            LXML_SCHEMA_NAMESPACE
-                        ):
-                            element = _get_simple_type_or_complex_type_info(
-                                xml_doc_tree, target_ns_prefix, element, query
-                            )
-                        elif element.tag == "{0}complexType".format(
-                            LXML_SCHEMA_NAMESPACE
-                        ):
-                            element = _get_simple_type_or_complex_type_info(
-                                xml_doc_tree, target_ns_prefix, element, query
-                            )
-                        elif element.tag == "{0}extension".format(
-                            LXML_SCHEMA_NAMESPACE
-                        ):
-                            element = _get_extension_info(
-                                xml_doc_tree, element, query
-                            )
-
-                        element = element.getparent()
-
-                    dot_query = ".".join(query)
-                    # Build the corresponding refinement tree
-                    trees = tree.build_tree(
-                        tree=trees,
-                        element_name=element_name,
-                        element_display_name=element_label,
-                        enums=enums,
-                        dot_query=dot_query,
-                    )
         except Exception as exception:
             # Log the exception
             logger.warning(str(exception))
+    timings[TREE_BUILD_STAGE] = time.perf_counter() - start
 
     return trees
 
 
-def _get_flatten_schema(template):
-    """Get the flatten schema of the given template.
+def _load_schema(ref_xml_schema_content, streaming=False):
+    """Parse and index a flatten schema.
 
     Args:
-        template:
+        ref_xml_schema_content:
+        streaming: load only the parts of the schema used by the extraction
 
     Returns:
+        tuple: xml tree, schema index, target namespace prefix
 
     """
-    return XSDFlattenerDatabaseOrURL(template.content, request=None).get_flat()
+    if streaming:
+        xml_doc_tree, schema_index, namespaces = _iterparse_schema(
+            ref_xml_schema_content
+        )
+    else:
+        xml_doc_tree = XSDTree.build_tree(ref_xml_schema_content)
+        schema_index = SchemaIndex(xml_doc_tree)
+        namespaces = get_namespaces(ref_xml_schema_content)
+    # Get the target namespace
+    target_namespace, target_ns_prefix = get_target_namespace(
+        xml_doc_tree, namespaces
+    )
+    target_ns_prefix = (
+        "{}:".format(target_ns_prefix) if target_ns_prefix != "" else ""
+    )
+    return xml_doc_tree, schema_index, target_ns_prefix
 
 
-def _get_target_namespace_prefix(ref_xml_schema_content, xml_doc_tree):
-    """Get the target namespace prefix.
+def _iterparse_schema(ref_xml_schema_content):
+    """Parse a flatten schema in a single pass, indexing it and dropping the
+    nodes not used by the extraction as soon as they are parsed.
 
     Args:
         ref_xml_schema_content:
+
+    Returns:
+        tuple: xml tree, schema index, namespaces of the root
+
+    """
+    namespaces = {"xml": XML_NAMESPACE}
+    schema_index = SchemaIndex()
+    parser = etree.XMLPullParser(
+        events=("start-ns", "start", "end"),
+        remove_blank_text=True,
+        remove_comments=True,
+        remove_pis=True,
+    )
+    root = None
+    # fed by slices: the schema is not copied as a whole
+    for start in range(0, len(ref_xml_schema_content), FEED_SIZE):
+        parser.feed(
+            ref_xml_schema_content[start : start + FEED_SIZE]  # noqa: E203
+        )
+        root = _read_schema_events(parser, root, schema_index, namespaces)
+    parser.close()
+    root = _read_schema_events(parser, root, schema_index, namespaces)
+
+    return etree.ElementTree(root), schema_index, namespaces
+
+
+def _read_schema_events(parser, root, schema_index, namespaces):
+    """Index the nodes parsed so far and drop the nodes not used by the
+    extraction: only the elements, extensions, simple types, enumerations
+    and attribute declarations are kept, with their ancestors and their app
+    info.
+
+    Args:
+        parser: streaming parser
+        root: root of the schema, None until parsed
+        schema_index:
+        namespaces: completed with the namespaces of the root
+
+    Returns:
+        root of the schema
+
+    """
+    for event, node in parser.read_events():
+        if event == "start-ns":
+            # namespaces declared on the root, as get_namespaces
+            if root is None and len(node[0]) > 0 and len(node[1]) > 0:
+                namespaces[node[0]] = node[1]
+        elif event == "start":
+            if root is None:
+                root = node
+            elif node.tag in INDEXED_TAGS:
+                schema_index.add(node, root)
+        elif (
+            node is not root
+            and len(node) == 0
+            and node.tag not in KEPT_TAGS
+            and node.getparent().tag != APP_INFO_TAG
+        ):
+            # no child kept: the node is not used by the extraction
+            node.clear()
+            node.getparent().remove(node)
+    return root
+
+
+def _get_simple_types(xml_doc_tree):
+    """Get the global simple types of a schema.
+
+    Args:
         xml_doc_tree:
 
     Returns:
 
     """
-    namespaces = get_namespaces(ref_xml_schema_content)
-    target_namespace, target_ns_prefix = get_target_namespace(
-        xml_doc_tree, namespaces
+    return xml_doc_tree.findall(
+        "./{0}simpleType".format(LXML_SCHEMA_NAMESPACE)
+    )
+
+
+def _get_enumerations(simple_type):
+    """Get the enumerations of a simple type.
+
+    Args:
+        simple_type:
+
+    Returns:
+
+    """
+    return simple_type.findall(
+        "./{0}restriction/{0}enumeration".format(LXML_SCHEMA_NAMESPACE)
     )
 
-    return target_ns_prefix
 
+def _get_simple_type_info(simple_type, schema_index, target_ns_prefix):
+    """Get the information of the element using an enumerated simple type.
+
+    Args:
+        simple_type:
+        schema_index:
+        target_ns_prefix:
+
+    Returns:
+        tuple: element name, element label, dot notation path, has attributes
+        or None if the simple type is not a refinement
+
+    """
+    # Get all the enumerations
+    if len(_get_enumerations(simple_type)) == 0:
+        return None
 
-def _get_element_info(element, xml_doc_tree, target_ns_prefix):
+    # Get the corresponding element
+    element = _get_elements_by_simple_type(
+        simple_type, schema_index, target_ns_prefix
+    )
+    if len(element) > 1:
+        logger.error(
+            "More than one element using the enumeration ({0})".format(
+                str(len(element))
+            )
+        )
+        return None
+
+    element = element[0]
+    # get the label of refinements
+    element_name, element_label = _get_element_info(
+        element, schema_index, target_ns_prefix
+    )
+    # the text of an element without attributes is not
+    # stored under '#text' in the data
+    has_attributes = _can_have_attributes(
+        element, schema_index, target_ns_prefix
+    )
+    query = []
+
+    # Build the path to access the element (dot notation)
+    while element is not None:
+        if element.tag == "{0}element".format(LXML_SCHEMA_NAMESPACE):
+            query.insert(0, element.attrib["name"])
+        elif element.tag == "{0}simpleType".format(LXML_SCHEMA_NAMESPACE):
+            element = _get_simple_type_or_complex_type_info(
+                schema_index, target_ns_prefix, element, query
+            )
+        elif element.tag == "{0}complexType".format(LXML_SCHEMA_NAMESPACE):
+            element = _get_simple_type_or_complex_type_info(
+                schema_index, target_ns_prefix, element, query
+            )
+        elif element.tag == "{0}extension".format(LXML_SCHEMA_NAMESPACE):
+            element = _get_extension_info(schema_index, element, query)
+
+        element = element.getparent()
+
+    return element_name, element_label, ".".join(query), has_attributes
+
+
+def _get_simple_type_info_or_error(
+    simple_type, schema_index, target_ns_prefix
+):
+    """Get the information of the element using a simple type, or the error
+    raised while getting it.
+
+    Args:
+        simple_type:
+        schema_index:
+        target_ns_prefix:
+
+    Returns:
+        tuple: information or None, error message or None
+
+    """
+    try:
+        return (
+            _get_simple_type_info(simple_type, schema_index, target_ns_prefix),
+            None,
+        )
+    except Exception as exception:
+        return None, str(exception)
+
+
+def _get_simple_types_info_in_parallel(
+    ref_xml_schema_content, simple_type_count, workers, streaming=False
+):
+    """Get the information of the simple types in a pool of processes. Each
+    process parses the flatten schema once.
+
+    Args:
+        ref_xml_schema_content:
+        simple_type_count:
+        workers:
+        streaming:
+
+    Returns:
+        list: information and error of each simple type, in order, or None
+        if the processes can not be started
+
+    """
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(ref_xml_schema_content, streaming),
+        ) as executor:
+            return list(
+                executor.map(
+                    _get_worker_simple_type_info,
+                    range(simple_type_count),
+                    chunksize=max(1, simple_type_count // (workers * 4)),
+                )
+            )
+    except Exception as exception:
+        # e.g. daemonic processes (celery workers) can not have children
+        logger.warning(
+            "Unable to extract the refinements in parallel: %s.",
+            str(exception),
+        )
+        return None
+
+
+def _init_worker(ref_xml_schema_content, streaming):
+    """Parse the flatten schema in a worker process.
+
+    Args:
+        ref_xml_schema_content:
+        streaming:
+
+    Returns:
+
+    """
+    global _worker_schema
+
+    xml_doc_tree, schema_index, target_ns_prefix = _load_schema(
+        ref_xml_schema_content, streaming
+    )
+    _worker_schema = (
+        _get_simple_types(xml_doc_tree),
+        schema_index,
+        target_ns_prefix,
+    )
+
+
+def _get_worker_simple_type_info(index):
+    """Get the information of a simple type in a worker process.
+
+    Args:
+        index: index of the simple type in the schema
+
+    Returns:
+        tuple: information or None, error message or None
+
+    """
+    simple_types, schema_index, target_ns_prefix = _worker_schema
+    return _get_simple_type_info_or_error(
+        simple_types[index], schema_index, target_ns_prefix
+    )
+
+
+def _get_flatten_schema(template):
+    """Get the flatten schema of the given template. The flatten schema is
+    computed once per template hash.
+
+    Args:
+        template:
+
+    Returns:
+
+    """
+    return flattened_schema_api.get_flat(template)
+
+
+def _get_element_info(element, schema_index, target_ns_prefix):
     """Get the element label.
 
     Args:
         element:
-        xml_doc_tree:
+        schema_index:
         target_ns_prefix:
 
     Returns:
@@ -172,7 +567,7 @@ def _get_element_info(element, xml_doc_tree, target_ns_prefix):
             parent = parent.getparent()
             if parent.tag == "{0}complexType".format(LXML_SCHEMA_NAMESPACE):
                 parent = _get_simple_type_or_complex_type_info(
-                    xml_doc_tree, target_ns_prefix, parent
+                    schema_index, target_ns_prefix, parent
                 )
                 app_info = get_app_info_options(parent)
                 break
@@ -185,13 +580,90 @@ def _get_element_info(element, xml_doc_tree, target_ns_prefix):
     return name, label
 
 
+def _get_elements_by_simple_type(simple_type, schema_index, target_ns_prefix):
+    """Get the elements whose value is of a simple type: the elements of this
+    type, and the elements of a complex type whose simple content extends it.
+
+    Args:
+        simple_type:
+        schema_index:
+        target_ns_prefix:
+
+    Returns:
+        list of elements
+
+    """
+    type_name = target_ns_prefix + simple_type.attrib["name"]
+    elements = list(schema_index.get_elements_by_type(type_name))
+    for extension in schema_index.get_extensions_by_base(type_name):
+        if extension.getparent().tag != SIMPLE_CONTENT_TAG:
+            continue
+        complex_type = extension.getparent().getparent()
+        if "name" in complex_type.attrib:
+            elements.extend(
+                schema_index.get_elements_by_type(
+                    target_ns_prefix + complex_type.attrib["name"]
+                )
+            )
+        elif complex_type.getparent().tag == ELEMENT_TAG:
+            elements.append(complex_type.getparent())
+    return elements
+
+
+def _can_have_attributes(element, schema_index, target_ns_prefix):
+    """Check if an element can have attributes.
+
+    Args:
+        element:
+        schema_index:
+        target_ns_prefix:
+
+    Returns:
+        True if the complex type of the element declares attributes, or if
+        the element has no type (any type), False otherwise.
+
+    """
+    complex_type = element.find("./{0}".format(COMPLEX_TYPE_TAG))
+    if complex_type is None:
+        if element.find("./{0}".format(SIMPLE_TYPE_TAG)) is not None:
+            return False
+
+        element_type = element.attrib.get("type")
+        if element_type is None:
+            return True
+
+        # Built-in types are simple types
+        if element_type.startswith("xs:") or element_type.startswith("xsd:"):
+            return False
+
+        if target_ns_prefix and element_type.startswith(target_ns_prefix):
+            element_type = element_type[len(target_ns_prefix) :]  # noqa: E203
+        complex_type = schema_index.get_complex_type(element_type)
+        if complex_type is None:
+            # simple type
+            return False
+
+    # attributes of the type, or of its simple or complex content
+    for parent in (
+        complex_type,
+        *complex_type.findall("./*/{0}".format(EXTENSION_TAG)),
+        *complex_type.findall(
+            "./*/{0}restriction".format(LXML_SCHEMA_NAMESPACE)
+        ),
+    ):
+        for child in parent:
+            if child.tag in ATTRIBUTE_TAGS:
+                return True
+    return False
+
+
 def _get_simple_type_or_complex_type_info(
-    xml_doc_tree, target_ns_prefix, element, query=None
+    schema_index, target_ns_prefix, element, query=None
 ):
     """Get simple type / complex type information.
 
     Args:
-        xml_doc_tree:
+        schema_index:
         target_ns_prefix:
         element:
         query:
@@ -200,11 +672,8 @@ def _get_simple_type_or_complex_type_info(
 
     """
     try:
-        to_search_element = xml_doc_tree.findall(
-            ".//{0}element[@type='{1}']".format(
-                LXML_SCHEMA_NAMESPACE,
-                target_ns_prefix + element.attrib["name"],
-            )
+        to_search_element = schema_index.get_elements_by_type(
+            target_ns_prefix + element.attrib["name"]
         )
         if len(to_search_element) == 0:
             logger.debug(
@@ -212,7 +681,7 @@ def _get_simple_type_or_complex_type_info(
                     str(len(element))
                 )
             )
-            element = _find_extension(xml_doc_tree, target_ns_prefix, element)
+            element = _find_extension(schema_index, target_ns_prefix, element)
         elif len(to_search_element) > 1:
             logger.error(
                 "More than one element using the enumeration ({0})".format(
@@ -233,11 +702,11 @@ def _get_simple_type_or_complex_type_info(
     return element
 
 
-def _get_extension_info(xml_doc_tree, element, query=None):
+def _get_extension_info(schema_index, element, query=None):
     """Get extension information.
 
     Args:
-        xml_doc_tree:
+        schema_index:
         element:
         query:
 
@@ -245,10 +714,8 @@ def _get_extension_info(xml_doc_tree, element, query=None):
 
     """
     try:
-        to_search_element = xml_doc_tree.findall(
-            ".//{0}element[@type='{1}']".format(
-                LXML_SCHEMA_NAMESPACE, element.attrib["base"]
-            )
+        to_search_element = schema_index.get_elements_by_type(
+            element.attrib["base"]
         )
         if len(to_search_element) == 0:
             logger.debug(
@@ -276,11 +743,11 @@ def _get_extension_info(xml_doc_tree, element, query=None):
     return element
 
 
-def _find_extension(xml_doc_tree, target_ns_prefix, element):
+def _find_extension(schema_index, target_ns_prefix, element):
     """Find the element extension.
 
     Args:
-        xml_doc_tree:
+        schema_index:
         target_ns_prefix:
         element:
 
@@ -288,11 +755,8 @@ def _find_extension(xml_doc_tree, target_ns_prefix, element):
 
     """
     try:
-        to_search_element = xml_doc_tree.findall(
-            ".//{0}extension[@base='{1}']".format(
-                LXML_SCHEMA_NAMESPACE,
-                target_ns_prefix + element.attrib["name"],
-            )
+        to_search_element = schema_index.get_extensions_by_base(
+            target_ns_prefix + element.attrib["name"]
         )
         if len(to_search_element) == 0:
             logger.debug(
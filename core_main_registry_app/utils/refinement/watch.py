@@ -1,19 +1,39 @@
 """Handle refinement signals"""
 
 from logging import getLogger
+from uuid import uuid4
 
 from billiard.exceptions import SoftTimeLimitExceeded
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 
+from core_main_app.components.data.models import Data
 from core_main_app.components.template.models import Template
+from core_main_registry_app.components.category_bitmap import (
+    api as category_bitmap_api,
+)
+from core_main_registry_app.components.data_facet import (
+    api as data_facet_api,
+)
+from core_main_registry_app.components.refinement_generation import (
+    api as refinement_generation_api,
+)
+from core_main_registry_app.settings import (
+    ENABLE_CATEGORY_BITMAPS,
+    ENABLE_DATA_FACETS,
+)
 from core_main_registry_app.tasks import init_refinement_task
 
 logger = getLogger(__name__)
 
 
 def init():
-    """Connect to template object events."""
+    """Connect to template and data object events."""
     post_save.connect(post_save_template, sender=Template)
+    if ENABLE_DATA_FACETS:
+        post_save.connect(post_save_data, sender=Data)
+    if ENABLE_CATEGORY_BITMAPS:
+        post_save.connect(post_save_data_bitmaps, sender=Data)
+        post_delete.connect(post_delete_data_bitmaps, sender=Data)
 
 
 def post_save_template(sender, instance, **kwargs):
@@ -24,12 +44,74 @@ def post_save_template(sender, instance, **kwargs):
         **kwargs:
     """
     try:
-        # start asynchronous task
+        # start asynchronous task, unless the refinements of the template
+        # hash are already pending, being generated or generated
         if kwargs["created"]:
-            init_refinement_task.delay(str(instance.id))
+            task_id = str(uuid4())
+            if not instance.hash or refinement_generation_api.enqueue(
+                instance.hash, task_id
+            ):
+                try:
+                    init_refinement_task.apply_async(
+                        args=(str(instance.id),), task_id=task_id
+                    )
+                except Exception:
+                    # task not sent: let the next enqueue send it
+                    if instance.hash:
+                        refinement_generation_api.finish(
+                            instance.hash, success=False
+                        )
+                    raise
     except (TimeoutError, SoftTimeLimitExceeded) as ex:
         logger.error("Timeout while generating refinements: %s ", str(ex))
     except Exception as ex:
         logger.error(
             "Error happened while generating refinements:  %s ", str(ex)
         )
+
+
+def post_save_data(sender, instance, **kwargs):
+    """Method executed after saving of a Data object.
+    Args:
+        sender:
+        instance: data object.
+        **kwargs:
+    """
+    try:
+        # data content and status may have changed: update the facet values
+        data_facet_api.upsert_data_facet_values(instance)
+    except Exception as ex:
+        logger.error(
+            "Error happened while saving the data facet values:  %s ", str(ex)
+        )
+
+
+def post_save_data_bitmaps(sender, instance, **kwargs):
+    """Method executed after saving of a Data object (publish, set status...).
+    Args:
+        sender:
+        instance: data object.
+        **kwargs:
+    """
+    try:
+        # data content and status may have changed: update the bitmaps
+        category_bitmap_api.update_data_bitmaps(instance)
+    except Exception as ex:
+        logger.error(
+            "Error happened while updating the category bitmaps:  %s ", str(ex)
+        )
+
+
+def post_delete_data_bitmaps(sender, instance, **kwargs):
+    """Method executed after deleting of a Data object.
+    Args:
+        sender:
+        instance: data object.
+        **kwargs:
+    """
+    try:
+        category_bitmap_api.delete_data_bitmaps(instance)
+    except Exception as ex:
+        logger.error(
+            "Error happened while updating the category bitmaps:  %s ", str(ex)
+        )
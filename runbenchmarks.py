@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+"""Run benchmarks"""
+
+import argparse
+import contextlib
+import importlib
+import json
+import os
+import sys
+from unittest import mock
+
+import django
+from celery import Celery
+from django.conf import settings
+from django.test.utils import get_runner
+
+
+def _parse_args():
+    """Parse the command line arguments.
+
+    Returns:
+
+    """
+    parser = argparse.ArgumentParser(
+        description="Benchmark the refinement query pipeline."
+    )
+    parser.add_argument(
+        "--categories",
+        type=int,
+        default=1000,
+        help="Number of categories of the refinement (1k to 50k).",
+    )
+    parser.add_argument(
+        "--data",
+        type=int,
+        default=10000,
+        help="Number of data (10k to 500k).",
+    )
+    parser.add_argument(
+        "--fanout",
+        type=int,
+        default=10,
+        help="Number of children of each category.",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Number of runs of each measure."
+    )
+    parser.add_argument(
+        "--seed", type=int, default=0, help="Seed of the data generation."
+    )
+    parser.add_argument(
+        "--mongo",
+        action="store_true",
+        help="Index the data with MongoDB (requires mongomock).",
+    )
+    parser.add_argument(
+        "--output", help="JSON report file (default: standard output)."
+    )
+    return parser.parse_args()
+
+
+def _setup_django(mongo):
+    """Set up Django. With MongoDB indexing, the MongoDB connection opened by
+    core_main_app is replaced by a mongomock connection.
+
+    Args:
+        mongo: if True, enable MongoDB indexing
+
+    Returns:
+
+    """
+    if not mongo:
+        django.setup()
+        return
+
+    from core_main_app.utils.integration_tests.integration_base_test_case import (
+        MOCK_DATABASE_HOST,
+        MOCK_DATABASE_NAME,
+    )
+    from core_main_app.utils.tests_tools.databases.mongo.mongoengine_database import (
+        Database,
+    )
+
+    # MongoData is only defined if indexing is enabled when it is loaded
+    settings.MONGODB_INDEXING = True
+    database = Database(MOCK_DATABASE_HOST, MOCK_DATABASE_NAME)
+    # core_main_app connects to MONGODB_URI when its modules are loaded
+    with mock.patch(
+        "mongoengine.connect", lambda *args, **kwargs: database.connect()
+    ):
+        django.setup()
+        importlib.import_module("core_main_app.utils.databases.mongo")
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    os.environ["DJANGO_SETTINGS_MODULE"] = "tests.test_settings"
+    app = Celery("celery_app")
+    app.config_from_object("django.conf:settings")
+    _setup_django(args.mongo)
+
+    from tests.benchmarks import refinement as refinement_benchmark
+
+    test_runner = get_runner(settings)(verbosity=0)
+    test_runner.setup_test_environment()
+    # keep the standard output for the report
+    with contextlib.redirect_stdout(sys.stderr):
+        old_config = test_runner.setup_databases()
+    try:
+        report = refinement_benchmark.run(
+            category_count=args.categories,
+            data_count=args.data,
+            fanout=args.fanout,
+            repeat=args.repeat,
+            seed=args.seed,
+        )
+    finally:
+        test_runner.teardown_databases(old_config)
+        test_runner.teardown_test_environment()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(report, output_file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
@@ -0,0 +1,391 @@
+"""Benchmarks of the refinement query pipeline
+
+Generates a synthetic refinement and a synthetic Data set, then times the
+creation of the refinement query, the parsing of the selected values, the
+execution of the query and the facet counting. Run with runbenchmarks.py.
+"""
+
+import platform
+import random
+import statistics
+import time
+from collections import deque
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import django
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from core_main_app.components.data import api as data_api
+from core_main_app.components.data.models import Data
+from core_main_app.components.template.models import Template
+from core_main_app.utils.query.mongo.prepare import prepare_query
+from core_main_app.utils.tests_tools.MockUser import create_mock_user
+from core_main_registry_app.components.category.models import Category
+from core_main_registry_app.components.refinement.models import Refinement
+from core_main_registry_app.constants import CATEGORY_SUFFIX
+from core_main_registry_app.utils.refinement import cache as refinement_cache
+from core_main_registry_app.utils.refinement import category_index
+from core_main_registry_app.utils.refinement import facet_count
+from core_main_registry_app.utils.refinement.mongo_query import (
+    build_refinements_query,
+    get_refinement_selected_values_from_query,
+)
+
+TEMPLATE_HASH = "benchmark_hash"
+REFINEMENT_PATH = "Resource.benchmark.type"
+SUB_DOCUMENT_ROOT = "dict_content"
+BATCH_SIZE = 1000
+# Number of leaves of the "leaves" selection
+LEAF_SELECTION_SIZE = 50
+
+
+def run(
+    category_count=1000,
+    data_count=10000,
+    fanout=10,
+    repeat=5,
+    seed=0,
+):
+    """Run the benchmarks.
+
+    Args:
+        category_count: number of categories of the refinement
+        data_count: number of data
+        fanout: number of children of each category
+        repeat: number of runs of each measure
+        seed: seed of the random generator
+
+    Returns:
+        dict: report
+    """
+    random_generator = random.Random(seed)
+    database = _connect_mongo() if settings.MONGODB_INDEXING else None
+    try:
+        start = time.perf_counter()
+        template = _generate_template()
+        categories = generate_categories(
+            Refinement.create_and_save(
+                "Benchmark", "benchmark", TEMPLATE_HASH
+            ),
+            category_count,
+            fanout,
+        )
+        category_generation_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        generate_data(
+            template,
+            [category for category in categories if _is_leaf(category)],
+            data_count,
+            random_generator,
+        )
+        data_generation_time = time.perf_counter() - start
+
+        refinement_cache.invalidate(TEMPLATE_HASH)
+        category_index.invalidate()
+        with override_settings(CAN_ANONYMOUS_ACCESS_PUBLIC_DOCUMENT=False):
+            results = {
+                name: benchmark_selection(selection, repeat)
+                for name, selection in get_selections(
+                    categories, random_generator
+                ).items()
+            }
+    finally:
+        if database is not None:
+            database.disconnect()
+
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "mongodb_indexing": settings.MONGODB_INDEXING,
+        },
+        "parameters": {
+            "categories": category_count,
+            "data": data_count,
+            "fanout": fanout,
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "generation": {
+            "categories": {"wall_time": category_generation_time},
+            "data": {"wall_time": data_generation_time},
+        },
+        "results": results,
+    }
+
+
+def benchmark_selection(selection, repeat):
+    """Time the refinement query pipeline for a selection.
+
+    Args:
+        selection: list of list of category ids
+        repeat:
+
+    Returns:
+        dict: measures of each step
+    """
+    user = create_mock_user("1", is_superuser=True)
+    results = {}
+
+    refinement_query, results["build_refinements_query"] = measure(
+        lambda: build_refinements_query(selection), repeat
+    )
+    # first call fills the index and the query cache
+    build_refinements_query(selection, template_hash=TEMPLATE_HASH)
+    _, results["build_refinements_query_cached"] = measure(
+        lambda: build_refinements_query(
+            selection, template_hash=TEMPLATE_HASH
+        ),
+        repeat,
+    )
+
+    with patch(
+        "core_main_registry_app.components.template.api.get_current_registry_template"
+    ) as mock_get_current_registry_template:
+        mock_get_current_registry_template.return_value = SimpleNamespace(
+            hash=TEMPLATE_HASH
+        )
+        _, results["get_refinement_selected_values_from_query"] = measure(
+            lambda: get_refinement_selected_values_from_query(
+                refinement_query, None
+            ),
+            repeat,
+        )
+
+    json_query = prepare_query(
+        refinement_query, sub_document_root=SUB_DOCUMENT_ROOT
+    )
+    result_count, results["execute_query"] = measure(
+        lambda: data_api.execute_json_query(json_query, user).count(),
+        repeat,
+    )
+    results["execute_query"]["results"] = result_count
+
+    facet_counts, results["facet_counts"] = measure(
+        lambda: facet_count.get_facet_counts(json_query, TEMPLATE_HASH, user),
+        repeat,
+    )
+    results["facet_counts"]["categories"] = len(facet_counts)
+
+    results["selected_categories"] = sum(
+        len(refinement) for refinement in selection
+    )
+    return results
+
+
+def measure(function, repeat):
+    """Measure the wall time and the number of SQL queries of a function.
+
+    Args:
+        function:
+        repeat:
+
+    Returns:
+        tuple: result of the last call, measures
+    """
+    wall_times = []
+    query_counts = []
+    result = None
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            result = function()
+            wall_times.append(time.perf_counter() - start)
+        query_counts.append(len(queries))
+
+    return result, {
+        "wall_time": {
+            "min": min(wall_times),
+            "median": statistics.median(wall_times),
+            "max": max(wall_times),
+        },
+        "queries": max(query_counts),
+    }
+
+
+def generate_categories(refinement, category_count, fanout):
+    """Generate the categories of a refinement, level by level.
+
+    Args:
+        refinement:
+        category_count:
+        fanout:
+
+    Returns:
+        list: categories, in tree order
+    """
+    # enumeration values in breadth first order: parents before children
+    values = []
+    children = {}
+    queue = deque((None, f"v{index}") for index in range(fanout))
+    while queue and len(values) < category_count:
+        parent_value, value = queue.popleft()
+        values.append(value)
+        children.setdefault(parent_value, []).append(value)
+        queue.extend((value, f"{value}:v{index}") for index in range(fanout))
+
+    categories_by_value = {}
+    for value in values:
+        categories_by_value[value] = Category(
+            name=value.replace(":", " "),
+            path=REFINEMENT_PATH,
+            value=(
+                f"{value}{CATEGORY_SUFFIX}" if value in children else value
+            ),
+            has_attributes=False,
+            refinement=refinement,
+            parent=categories_by_value.get(value.rpartition(":")[0] or None),
+        )
+    categories = Category.bulk_create_trees(
+        list(categories_by_value.values()), batch_size=BATCH_SIZE
+    )
+    return sorted(
+        categories, key=lambda category: (category.tree_id, category.lft)
+    )
+
+
+def generate_data(template, leaves, data_count, random_generator):
+    """Generate data with one or two random leaf values each.
+
+    Args:
+        template:
+        leaves: leaf categories
+        data_count:
+        random_generator:
+
+    Returns:
+
+    """
+    leaf_values = [leaf.value for leaf in leaves]
+    for start in range(0, data_count, BATCH_SIZE):
+        data_list = []
+        for index in range(start, min(start + BATCH_SIZE, data_count)):
+            values = random_generator.sample(
+                leaf_values, min(len(leaf_values), 1 + index % 2)
+            )
+            data_list.append(
+                Data(
+                    template=template,
+                    user_id="1",
+                    title=f"data {index}",
+                    dict_content={
+                        "Resource": {
+                            "benchmark": {
+                                "type": (
+                                    values[0] if len(values) == 1 else values
+                                )
+                            }
+                        }
+                    },
+                )
+            )
+        data_list = Data.objects.bulk_create(data_list)
+        if settings.MONGODB_INDEXING:
+            _insert_mongo_data(data_list)
+
+
+def get_selections(categories, random_generator):
+    """Get the selections to benchmark.
+
+    Args:
+        categories: categories, in tree order
+        random_generator:
+
+    Returns:
+        dict: {name: list of list of category ids}
+    """
+    leaves = [category for category in categories if _is_leaf(category)]
+    selections = {
+        "leaves": [
+            [
+                leaf.id
+                for leaf in random_generator.sample(
+                    leaves, min(len(leaves), LEAF_SELECTION_SIZE)
+                )
+            ]
+        ],
+    }
+    # first root and all its descendants, as selected in the tree
+    root = categories[0]
+    selections["subtree"] = [
+        [
+            category.id
+            for category in categories
+            if category.tree_id == root.tree_id
+        ]
+    ]
+    return selections
+
+
+def _is_leaf(category):
+    """Check if a category is a leaf.
+
+    Args:
+        category:
+
+    Returns:
+
+    """
+    return category.rght == category.lft + 1
+
+
+def _generate_template():
+    """Generate the template of the data.
+
+    Returns:
+
+    """
+    template = Template(
+        filename="benchmark.xsd", content="<schema/>", _hash=TEMPLATE_HASH
+    )
+    template.save()
+    return template
+
+
+def _connect_mongo():
+    """Open a connection to a mock MongoDB database.
+
+    Returns:
+
+    """
+    from core_main_app.utils.integration_tests.integration_base_test_case import (
+        MOCK_DATABASE_HOST,
+        MOCK_DATABASE_NAME,
+    )
+    from core_main_app.utils.tests_tools.databases.mongo.mongoengine_database import (
+        Database,
+    )
+
+    database = Database(MOCK_DATABASE_HOST, MOCK_DATABASE_NAME)
+    database.connect()
+    return database
+
+
+def _insert_mongo_data(data_list):
+    """Insert the data in MongoDB.
+
+    Args:
+        data_list:
+
+    Returns:
+
+    """
+    from core_main_app.components.mongo.models import MongoData
+
+    MongoData._get_collection().insert_many(
+        [
+            {
+                "_id": data.id,
+                "title": data.title,
+                "dict_content": data.dict_content,
+                "template": data.template_id,
+                "user_id": int(data.user_id),
+            }
+            for data in data_list
+        ]
+    )
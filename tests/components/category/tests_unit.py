@@ -1,11 +1,16 @@
 """Unit Test for Category API"""
 
+from unittest.mock import patch
+
 from django.test import TestCase
 
 from core_main_app.commons import exceptions as exceptions
 from core_main_registry_app.components.category import (
     api as category_api,
 )
+from core_main_registry_app.components.category import (
+    models as category_models,
+)
 from core_main_registry_app.components.category.models import (
     Category,
 )
@@ -33,6 +38,135 @@ class TestCreateAndSaveCategory(TestCase):
         self.assertEqual(result.name, "Category")
 
 
+class TestBulkCreateTrees(TestCase):
+    """
+    Test Bulk Create Trees
+    """
+
+    def setUp(self):
+        """setUp"""
+        self.refinement = Refinement.create_and_save("Refinement", "", "")
+
+    def _get_category(self, name, parent=None):
+        """Get an unsaved category.
+
+        Args:
+            name:
+            parent:
+
+        Returns:
+
+        """
+        return Category(
+            name=name,
+            path="/Path",
+            value=name,
+            parent=parent,
+            refinement=self.refinement,
+        )
+
+    def test_bulk_create_trees_sets_tree_positions(self):
+        """test_bulk_create_trees_sets_tree_positions"""
+        # Arrange
+        root = self._get_category("Root")
+        child = self._get_category("Child", root)
+        grandchild = self._get_category("Grandchild", child)
+        other_child = self._get_category("Other Child", root)
+        other_root = self._get_category("Other Root")
+        # Act
+        category_api.bulk_create_trees(
+            [root, child, grandchild, other_child, other_root]
+        )
+        # Assert
+        self.assertEqual(
+            list(
+                Category.objects.filter(
+                    refinement=self.refinement
+                ).values_list("name", "parent__name", "lft", "rght", "level")
+            ),
+            [
+                ("Root", None, 1, 8, 0),
+                ("Child", "Root", 2, 5, 1),
+                ("Grandchild", "Child", 3, 4, 2),
+                ("Other Child", "Root", 6, 7, 1),
+                ("Other Root", None, 1, 2, 0),
+            ],
+        )
+        self.assertEqual(other_root.tree_id, root.tree_id + 1)
+
+    def test_bulk_create_trees_creates_trees_after_existing_trees(self):
+        """test_bulk_create_trees_creates_trees_after_existing_trees"""
+        # Arrange
+        category = create_category()
+        root = self._get_category("Root")
+        # Act
+        category_api.bulk_create_trees([root])
+        # Assert
+        self.assertEqual(root.tree_id, category.tree_id + 1)
+        self.assertEqual(
+            list(Category.objects.get(pk=root.pk).get_family()), [root]
+        )
+
+    def test_bulk_create_trees_sets_slugs_as_slug_field(self):
+        """test_bulk_create_trees_sets_slugs_as_slug_field"""
+        # Arrange
+        names = ["Category", "Category", "A" * 60, "A" * 60, "Other: Value"]
+        expected_slugs = [
+            category_api.create_and_save(
+                name, "/Path", "", None, self.refinement
+            ).slug
+            for name in names
+        ]
+        Category.objects.all().delete()
+        create_category()
+        root = self._get_category(names[0])
+        categories = [root] + [
+            self._get_category(name, root) for name in names[1:]
+        ]
+        # Act
+        category_api.bulk_create_trees(categories)
+        # Assert
+        self.assertEqual(
+            [category.slug for category in categories],
+            ["category-2", "category-3"] + expected_slugs[2:],
+        )
+        self.assertEqual(expected_slugs[:2], ["category", "category-2"])
+
+    def test_bulk_create_trees_reads_only_candidate_slugs(self):
+        """test_bulk_create_trees_reads_only_candidate_slugs"""
+        # Arrange
+        category_api.create_and_save(
+            "Category", "/Path", "", None, self.refinement
+        )
+        category_api.create_and_save(
+            "Other", "/Path", "", None, self.refinement
+        )
+        # Act
+        result = category_models._get_used_slugs(
+            [self._get_category("Category")]
+        )
+        # Assert
+        self.assertEqual(result, {"category"})
+
+    @patch.object(category_models, "_lock_tree_ids")
+    def test_bulk_create_trees_locks_tree_ids(self, mock_lock_tree_ids):
+        """test_bulk_create_trees_locks_tree_ids"""
+        # Act
+        category_api.bulk_create_trees([self._get_category("Root")])
+        # Assert
+        mock_lock_tree_ids.assert_called_once_with()
+
+    def test_bulk_create_trees_raises_model_error(self):
+        """test_bulk_create_trees_raises_model_error"""
+        # Arrange
+        category = self._get_category("Category")
+        category.refinement_id = None
+        # Act # Assert
+        with self.assertRaises(exceptions.ModelError):
+            category_api.bulk_create_trees([category])
+        self.assertFalse(Category.objects.filter(name="Category").exists())
+
+
 class TestCategoryGetAllFilteredByRefinementId(TestCase):
     """
     Test Category Get All Filtered By Refinement Id
@@ -164,6 +298,194 @@ class TestCategoryGetAllCategoriesIdsByParentSlugAndRefinementId(TestCase):
         # Assert
         self.assertEqual(len(result), 1)
 
+    def test_get_all_categories_ids_by_parent_slug_and_refinement_id_prefers_exact_slug(
+        self,
+    ):
+        """test_get_all_categories_ids_by_parent_slug_and_refinement_id_prefers_exact_slug"""
+        # Arrange
+        category = create_category()
+        other_category = category_api.create_and_save(
+            "Category Other", "/Path", "", None, category.refinement
+        )
+        category_api.create_and_save(
+            "Child", "/Path", "", other_category, category.refinement
+        )
+        # Act
+        result = category_api.get_all_categories_ids_by_parent_slug_and_refinement_id(
+            category.slug, category.refinement.id
+        )
+        # Assert
+        self.assertEqual(result, [category.id])
+
+
+class TestCategoryGetAllSubtreesIds(TestCase):
+    """
+    Test Category Get All Subtrees Ids
+    """
+
+    def setUp(self):
+        """setUp"""
+        self.refinement = Refinement.create_and_save("Refinement", "", "")
+        self.root = category_api.create_and_save(
+            "Root", "/Path", "", None, self.refinement
+        )
+        self.parent_1 = category_api.create_and_save(
+            "Parent 1", "/Path", "", self.root, self.refinement
+        )
+        self.child_1 = category_api.create_and_save(
+            "Child 1", "/Path", "", self.parent_1, self.refinement
+        )
+        self.parent_2 = category_api.create_and_save(
+            "Parent 2", "/Path", "", self.root, self.refinement
+        )
+        self.child_2 = category_api.create_and_save(
+            "Child 2", "/Path", "", self.parent_2, self.refinement
+        )
+
+    def test_get_all_subtrees_ids_by_slugs_returns_descendants(self):
+        """test_get_all_subtrees_ids_by_slugs_returns_descendants"""
+        # Act
+        result = category_api.get_all_subtrees_ids_by_slugs_and_refinement_id(
+            [self.parent_1.slug, self.child_2.slug], self.refinement.id
+        )
+        # Assert
+        self.assertEqual(
+            result, [self.parent_1.id, self.child_1.id, self.child_2.id]
+        )
+
+    def test_get_all_subtrees_ids_by_names_returns_descendants(self):
+        """test_get_all_subtrees_ids_by_names_returns_descendants"""
+        # Act
+        result = category_api.get_all_subtrees_ids_by_names_and_refinement_id(
+            ["Parent 2"], self.refinement.id
+        )
+        # Assert
+        self.assertEqual(result, [self.parent_2.id, self.child_2.id])
+
+    def test_get_all_subtrees_ids_by_names_ignores_other_refinements(self):
+        """test_get_all_subtrees_ids_by_names_ignores_other_refinements"""
+        # Arrange
+        other_refinement = Refinement.create_and_save("Other", "", "")
+        category_api.create_and_save(
+            "Parent 2", "/Path", "", None, other_refinement
+        )
+        # Act
+        result = category_api.get_all_subtrees_ids_by_names_and_refinement_id(
+            ["Parent 2"], self.refinement.id
+        )
+        # Assert
+        self.assertEqual(result, [self.parent_2.id, self.child_2.id])
+
+    def test_get_all_subtrees_ids_by_slugs_returns_empty_list(self):
+        """test_get_all_subtrees_ids_by_slugs_returns_empty_list"""
+        # Act
+        result = category_api.get_all_subtrees_ids_by_slugs_and_refinement_id(
+            ["unknown"], self.refinement.id
+        )
+        # Assert
+        self.assertEqual(result, [])
+
+    def test_get_all_subtrees_ids_runs_a_single_query(self):
+        """test_get_all_subtrees_ids_runs_a_single_query"""
+        # Act # Assert
+        with self.assertNumQueries(1):
+            category_api.get_all_subtrees_ids_by_slugs_and_refinement_id(
+                [self.parent_1.slug, self.parent_2.slug], self.refinement.id
+            )
+
+    @patch.object(Category, "objects")
+    def test_get_all_subtrees_ids_raises_model_error(self, mock_objects):
+        """test_get_all_subtrees_ids_raises_model_error"""
+        # Arrange
+        mock_objects.filter.side_effect = Exception("error")
+        # Act # Assert
+        with self.assertRaises(exceptions.ModelError):
+            category_api.get_all_subtrees_ids_by_names_and_refinement_id(
+                ["Parent 2"], self.refinement.id
+            )
+
+
+class TestCategoryGetAllValuesByIds(TestCase):
+    """
+    Test Category Get All Values By Ids
+    """
+
+    def test_get_all_values_by_ids_returns_empty_list(self):
+        """test_get_all_values_by_ids_returns_empty_list"""
+        # Act
+        result = category_api.get_all_values_by_ids([-1])
+        # Assert
+        self.assertEqual(result, [])
+
+    def test_get_all_values_by_ids_returns_values(self):
+        """test_get_all_values_by_ids_returns_values"""
+        # Arrange
+        category = create_category()
+        # Act
+        result = category_api.get_all_values_by_ids([category.id])
+        # Assert
+        self.assertEqual(
+            result,
+            [
+                {
+                    "id": category.id,
+                    "path": "/Path",
+                    "value": "",
+                    "has_attributes": True,
+                    "tree_id": category.tree_id,
+                    "lft": category.lft,
+                    "rght": category.rght,
+                    "refinement_id": category.refinement.id,
+                }
+            ],
+        )
+
+
+class TestCategoryGetTemplateHashByIds(TestCase):
+    """
+    Test Category Get Template Hash By Ids
+    """
+
+    def test_get_template_hash_by_ids_returns_none(self):
+        """test_get_template_hash_by_ids_returns_none"""
+        # Act
+        result = category_api.get_template_hash_by_ids([-1])
+        # Assert
+        self.assertIsNone(result)
+
+    def test_get_template_hash_by_ids_returns_hash_of_most_categories(self):
+        """test_get_template_hash_by_ids_returns_hash_of_most_categories"""
+        # Arrange
+        refinement = Refinement.create_and_save("Refinement", "", "hash_1")
+        category_1 = category_api.create_and_save(
+            "Category 1", "/Path", "1", None, refinement
+        )
+        category_2 = category_api.create_and_save(
+            "Category 2", "/Path", "2", None, refinement
+        )
+        category_3 = category_api.create_and_save(
+            "Category 3",
+            "/Path",
+            "3",
+            None,
+            Refinement.create_and_save("Refinement", "", "hash_2"),
+        )
+        # Act
+        result = category_api.get_template_hash_by_ids(
+            [category_1.id, category_2.id, category_3.id]
+        )
+        # Assert
+        self.assertEqual(result, "hash_1")
+
+    @patch.object(Category, "objects")
+    def test_get_template_hash_by_ids_raises_model_error(self, mock_objects):
+        """test_get_template_hash_by_ids_raises_model_error"""
+        # Arrange
+        mock_objects.filter.side_effect = Exception("error")
+        # Act # Assert
+        with self.assertRaises(exceptions.ModelError):
+            category_api.get_template_hash_by_ids([1])
+
 
 def create_category():
     """create_refinement
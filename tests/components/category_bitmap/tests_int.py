@@ -0,0 +1,256 @@
+"""Integration Test for Category Bitmap API"""
+
+from unittest.mock import patch
+
+from django.test import override_settings
+
+from core_main_app.components.data import api as data_api
+from core_main_app.utils.integration_tests.integration_base_test_case import (
+    IntegrationBaseTestCase,
+)
+from core_main_app.utils.tests_tools.MockUser import create_mock_user
+
+from core_main_registry_app.components.category.models import Category
+from core_main_registry_app.components.category_bitmap import (
+    api as category_bitmap_api,
+)
+from core_main_registry_app.components.category_bitmap.models import (
+    CHUNK_BITS,
+)
+from core_main_registry_app.components.refinement.models import Refinement
+from core_main_registry_app.utils.refinement import bitmap_index
+from core_main_registry_app.utils.refinement import cache as refinement_cache
+from core_main_registry_app.utils.refinement import category_index
+from core_main_registry_app.utils.refinement import facet_count
+from tests.components.data.fixtures.fixtures import DataRegistryFixtures
+
+fixture_data = DataRegistryFixtures()
+
+
+class TestCategoryBitmaps(IntegrationBaseTestCase):
+    """Test Category Bitmaps"""
+
+    fixture = fixture_data
+
+    def setUp(self):
+        """setUp"""
+        super().setUp()
+        category_index.invalidate()
+        bitmap_index.invalidate()
+        self.template_hash = "category_bitmap_hash"
+        self.fixture.template.hash = self.template_hash
+        self.fixture.template.save()
+        refinement = Refinement.create_and_save(
+            "Role", "role", self.template_hash
+        )
+        self.category = Category.create_and_save(
+            "Institution",
+            "Resource.role.type",
+            "Organization: Institution",
+            None,
+            refinement,
+        )
+        self.other_category = Category.create_and_save(
+            "Person", "Resource.role.type", "Person", None, refinement
+        )
+
+    def test_update_data_bitmaps_sets_data_bit(self):
+        """test_update_data_bitmaps_sets_data_bit"""
+        # Act
+        result = category_bitmap_api.update_data_bitmaps(self.fixture.data_1)
+        # Assert
+        self.assertEqual(result, {self.category.id})
+        self.assertEqual(
+            bitmap_index.get_data_ids(
+                [[self.category.id]], self.template_hash
+            ),
+            [self.fixture.data_1.id],
+        )
+
+    def test_update_data_bitmaps_clears_data_bit(self):
+        """test_update_data_bitmaps_clears_data_bit"""
+        # Arrange
+        category_bitmap_api.update_data_bitmaps(self.fixture.data_1)
+        self.fixture.data_1.dict_content = {}
+        # Act
+        category_bitmap_api.update_data_bitmaps(self.fixture.data_1)
+        # Assert
+        self.assertEqual(
+            category_bitmap_api.get_bitmaps_by_template_hash(
+                self.template_hash
+            ),
+            {},
+        )
+
+    def test_update_data_bitmaps_clears_deleted_data(self):
+        """test_update_data_bitmaps_clears_deleted_data"""
+        # Arrange
+        category_bitmap_api.update_data_bitmaps(self.fixture.data_1)
+        self.fixture.data_1.dict_content["Resource"]["@status"] = "deleted"
+        # Act
+        result = category_bitmap_api.update_data_bitmaps(self.fixture.data_1)
+        # Assert
+        self.assertEqual(result, set())
+        self.assertEqual(
+            bitmap_index.get_data_ids(
+                [[self.category.id]], self.template_hash
+            ),
+            [],
+        )
+
+    def test_delete_data_bitmaps_clears_data_bit(self):
+        """test_delete_data_bitmaps_clears_data_bit"""
+        # Arrange
+        for data in self.fixture.data_collection:
+            category_bitmap_api.update_data_bitmaps(data)
+        # Act
+        category_bitmap_api.delete_data_bitmaps(self.fixture.data_1)
+        # Assert
+        self.assertEqual(
+            bitmap_index.get_data_ids(
+                [[self.category.id]], self.template_hash
+            ),
+            [self.fixture.data_2.id],
+        )
+
+    def test_rebuild_bitmaps_sets_bits_of_all_data(self):
+        """test_rebuild_bitmaps_sets_bits_of_all_data"""
+        # Act
+        result = category_bitmap_api.rebuild_bitmaps(
+            self.template_hash, self.fixture.data_collection
+        )
+        # Assert
+        self.assertEqual(result, 2)
+        self.assertEqual(
+            bitmap_index.get_data_ids(
+                [[self.category.id, self.other_category.id]],
+                self.template_hash,
+            ),
+            sorted(data.id for data in self.fixture.data_collection),
+        )
+
+    def test_rebuild_bitmaps_keeps_bits_of_other_template_hashes(self):
+        """test_rebuild_bitmaps_keeps_bits_of_other_template_hashes"""
+        # Arrange
+        category_bitmap_api.rebuild_bitmaps(
+            self.template_hash, self.fixture.data_collection
+        )
+        Refinement.add_template_hash(
+            Refinement.get_all_filtered_by_template_hash(
+                self.template_hash
+            ).get(),
+            "other_hash",
+        )
+        # Act
+        category_bitmap_api.rebuild_bitmaps("other_hash", [])
+        # Assert
+        self.assertEqual(
+            bitmap_index.get_data_ids(
+                [[self.category.id, self.other_category.id]],
+                self.template_hash,
+            ),
+            sorted(data.id for data in self.fixture.data_collection),
+        )
+
+    def test_get_data_ids_ands_refinements(self):
+        """test_get_data_ids_ands_refinements"""
+        # Arrange
+        category_bitmap_api.rebuild_bitmaps(
+            self.template_hash, self.fixture.data_collection
+        )
+        # Act
+        result = bitmap_index.get_data_ids(
+            [[self.category.id], [self.other_category.id]],
+            self.template_hash,
+        )
+        # Assert
+        self.assertEqual(result, [])
+
+    def test_update_data_bitmaps_reloads_only_the_chunk_of_the_data(self):
+        """test_update_data_bitmaps_reloads_only_the_chunk_of_the_data"""
+        # Arrange
+        category_bitmap_api.rebuild_bitmaps(
+            self.template_hash, self.fixture.data_collection
+        )
+        bitmap_index.get_index(self.template_hash)
+        self.fixture.data_1.dict_content = {}
+        category_bitmap_api.update_data_bitmaps(self.fixture.data_1)
+        # Act
+        with patch.object(
+            category_bitmap_api,
+            "get_bitmaps_by_template_hash",
+            wraps=category_bitmap_api.get_bitmaps_by_template_hash,
+        ) as mock_get_bitmaps_by_template_hash:
+            result = bitmap_index.get_data_ids(
+                [[self.category.id]], self.template_hash
+            )
+        # Assert
+        mock_get_bitmaps_by_template_hash.assert_called_once_with(
+            self.template_hash, [0]
+        )
+        self.assertEqual(result, [self.fixture.data_2.id])
+
+    def test_update_data_bitmaps_of_new_chunk_reloads_all_bitmaps(self):
+        """test_update_data_bitmaps_of_new_chunk_reloads_all_bitmaps"""
+        # Arrange
+        category_bitmap_api.rebuild_bitmaps(
+            self.template_hash, self.fixture.data_collection
+        )
+        bitmap_index.get_index(self.template_hash)
+        data_id = 3 << CHUNK_BITS
+        category_bitmap_api._set_data_categories(
+            data_id, {self.category.id}, self.template_hash
+        )
+        # Act
+        with patch.object(
+            category_bitmap_api,
+            "get_bitmaps_by_template_hash",
+            wraps=category_bitmap_api.get_bitmaps_by_template_hash,
+        ) as mock_get_bitmaps_by_template_hash:
+            result = bitmap_index.get_data_ids(
+                [[self.category.id]], self.template_hash
+            )
+        # Assert
+        mock_get_bitmaps_by_template_hash.assert_called_once_with(
+            self.template_hash
+        )
+        self.assertEqual(
+            result,
+            [self.fixture.data_1.id, self.fixture.data_2.id, data_id],
+        )
+
+    def test_update_data_bitmaps_without_bitmap_keeps_version(self):
+        """test_update_data_bitmaps_without_bitmap_keeps_version"""
+        # Arrange
+        version = refinement_cache.get_version(
+            self.template_hash, refinement_cache.DATA_SCOPE
+        )
+        self.fixture.data_1.dict_content = {}
+        # Act
+        category_bitmap_api.update_data_bitmaps(self.fixture.data_1)
+        # Assert
+        self.assertEqual(
+            refinement_cache.get_version(
+                self.template_hash, refinement_cache.DATA_SCOPE
+            ),
+            version,
+        )
+
+    @override_settings(CAN_ANONYMOUS_ACCESS_PUBLIC_DOCUMENT=False)
+    def test_count_with_bitmaps_returns_counts(self):
+        """test_count_with_bitmaps_returns_counts"""
+        # Arrange
+        category_bitmap_api.rebuild_bitmaps(
+            self.template_hash, self.fixture.data_collection
+        )
+        index = category_index.get_index(self.template_hash)
+        bitmap_index.get_index(self.template_hash)
+        user = create_mock_user("1", is_superuser=True)
+        # Act
+        # access control (2 queries) and data ids (1 query)
+        with self.assertNumQueries(3):
+            result = facet_count._count_with_bitmaps(
+                data_api.execute_json_query({}, user), index
+            )
+        # Assert
+        self.assertEqual(result, {self.category.id: 2})
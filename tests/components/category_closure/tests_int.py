@@ -0,0 +1,189 @@
+"""Integration Test for Category Closure API"""
+
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from core_main_app.commons import exceptions as exceptions
+
+from core_main_registry_app.components.category import api as category_api
+from core_main_registry_app.components.category.models import Category
+from core_main_registry_app.components.category_closure import (
+    api as category_closure_api,
+)
+from core_main_registry_app.components.category_closure.models import (
+    CategoryClosure,
+)
+from core_main_registry_app.components.refinement.models import Refinement
+
+
+class TestCategoryClosure(TestCase):
+    """Test Category Closure"""
+
+    def setUp(self):
+        """setUp"""
+        self.refinement = Refinement.create_and_save("Type", "type", "hash")
+        self.root = category_api.create_and_save(
+            "a", "Resource.type", "a__category", None, self.refinement
+        )
+        self.child = category_api.create_and_save(
+            "b", "Resource.type", "a:b__category", self.root, self.refinement
+        )
+        self.grandchild = category_api.create_and_save(
+            "c", "Resource.type", "a:b:c", self.child, self.refinement
+        )
+
+    def test_create_and_save_adds_ancestors(self):
+        """test_create_and_save_adds_ancestors"""
+        # Act
+        result = CategoryClosure.objects.filter(
+            descendant=self.grandchild
+        ).values_list("ancestor_id", "depth")
+        # Assert
+        self.assertEqual(
+            sorted(result, key=lambda link: link[1]),
+            [(self.grandchild.id, 0), (self.child.id, 1), (self.root.id, 2)],
+        )
+
+    def test_bulk_create_trees_adds_ancestors(self):
+        """test_bulk_create_trees_adds_ancestors"""
+        # Arrange
+        parent = Category(
+            name="d", path="Resource.type", refinement=self.refinement
+        )
+        child = Category(
+            name="e",
+            path="Resource.type",
+            parent=parent,
+            refinement=self.refinement,
+        )
+        # Act
+        category_api.bulk_create_trees([parent, child])
+        # Assert
+        self.assertEqual(
+            set(
+                CategoryClosure.objects.filter(
+                    descendant__in=[parent, child]
+                ).values_list("ancestor_id", "descendant_id", "depth")
+            ),
+            {
+                (parent.id, parent.id, 0),
+                (child.id, child.id, 0),
+                (parent.id, child.id, 1),
+            },
+        )
+
+    def test_get_all_descendant_ids_expands_selection(self):
+        """test_get_all_descendant_ids_expands_selection"""
+        # Act
+        result = category_closure_api.get_all_descendant_ids(
+            [self.child.id, self.grandchild.id]
+        )
+        # Assert
+        self.assertEqual(list(result), [self.child.id, self.grandchild.id])
+
+    def test_get_all_descendant_ids_of_root_returns_whole_tree(self):
+        """test_get_all_descendant_ids_of_root_returns_whole_tree"""
+        # Act
+        result = category_closure_api.get_all_descendant_ids([self.root.id])
+        # Assert
+        self.assertEqual(
+            list(result), [self.root.id, self.child.id, self.grandchild.id]
+        )
+
+    def test_delete_refinement_deletes_ancestors(self):
+        """test_delete_refinement_deletes_ancestors"""
+        # Act
+        self.refinement.delete()
+        # Assert
+        self.assertFalse(
+            CategoryClosure.objects.filter(
+                descendant_id=self.grandchild.id
+            ).exists()
+        )
+
+    def test_objects_create_adds_ancestors(self):
+        """test_objects_create_adds_ancestors"""
+        # Act
+        category = Category.objects.create(
+            name="d",
+            path="Resource.type",
+            value="a:b:d",
+            parent=self.child,
+            refinement=self.refinement,
+        )
+        # Assert
+        self.assertEqual(
+            self._get_ancestors(category),
+            [(category.id, 0), (self.child.id, 1), (self.root.id, 2)],
+        )
+
+    def test_move_to_updates_ancestors_of_subtree(self):
+        """test_move_to_updates_ancestors_of_subtree"""
+        # Arrange
+        other_root = category_api.create_and_save(
+            "d", "Resource.type", "d__category", None, self.refinement
+        )
+        # Act
+        Category.objects.get(pk=self.child.pk).move_to(other_root)
+        # Assert
+        self.assertEqual(
+            self._get_ancestors(self.grandchild),
+            [
+                (self.grandchild.id, 0),
+                (self.child.id, 1),
+                (other_root.id, 2),
+            ],
+        )
+        self.assertEqual(
+            list(category_closure_api.get_all_descendant_ids([self.root.id])),
+            [self.root.id],
+        )
+
+    def test_save_with_new_parent_updates_ancestors(self):
+        """test_save_with_new_parent_updates_ancestors"""
+        # Arrange
+        category = Category.objects.get(pk=self.grandchild.pk)
+        category.parent = self.root
+        # Act
+        category.save()
+        # Assert
+        self.assertEqual(
+            self._get_ancestors(self.grandchild),
+            [(self.grandchild.id, 0), (self.root.id, 1)],
+        )
+
+    def test_move_to_root_keeps_subtree_ancestors(self):
+        """test_move_to_root_keeps_subtree_ancestors"""
+        # Act
+        Category.objects.get(pk=self.child.pk).move_to(None)
+        # Assert
+        self.assertEqual(
+            self._get_ancestors(self.grandchild),
+            [(self.grandchild.id, 0), (self.child.id, 1)],
+        )
+
+    @patch.object(CategoryClosure, "objects")
+    def test_move_category_raises_model_error(self, mock_objects):
+        """test_move_category_raises_model_error"""
+        # Arrange
+        mock_objects.filter.side_effect = Exception("error")
+        # Act # Assert
+        with self.assertRaises(exceptions.ModelError):
+            category_closure_api.move_category(self.child)
+
+    def _get_ancestors(self, category):
+        """Get the ancestors of a category, from self to root.
+
+        Args:
+            category:
+
+        Returns:
+            list of (ancestor id, depth)
+
+        """
+        return list(
+            CategoryClosure.objects.filter(descendant=category)
+            .order_by("depth")
+            .values_list("ancestor_id", "depth")
+        )
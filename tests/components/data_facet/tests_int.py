@@ -0,0 +1,111 @@
+"""Integration Test for Data Facet Value API"""
+
+from unittest.mock import patch
+
+from core_main_app.components.data.models import Data
+from core_main_app.utils.integration_tests.integration_base_test_case import (
+    IntegrationBaseTestCase,
+)
+
+from core_main_registry_app.components.category.models import Category
+from core_main_registry_app.components.data_facet import (
+    api as data_facet_api,
+)
+from core_main_registry_app.components.refinement.models import Refinement
+from core_main_registry_app.utils.refinement import category_index
+from core_main_registry_app.utils.refinement import sql_query
+from tests.components.data.fixtures.fixtures import DataRegistryFixtures
+
+fixture_data = DataRegistryFixtures()
+
+
+class TestUpsertDataFacetValues(IntegrationBaseTestCase):
+    """Test Upsert Data Facet Values"""
+
+    fixture = fixture_data
+
+    def setUp(self):
+        """setUp"""
+        super().setUp()
+        category_index.invalidate()
+        self.fixture.template.hash = "data_facet_hash"
+        self.fixture.template.save()
+        refinement = Refinement.create_and_save(
+            "Role", "role", self.fixture.template.hash
+        )
+        self.category = Category.create_and_save(
+            "Institution",
+            "Resource.role.type",
+            "Organization: Institution",
+            None,
+            refinement,
+        )
+        self.other_category = Category.create_and_save(
+            "Person", "Resource.role.type", "Person", None, refinement
+        )
+
+    def test_upsert_data_facet_values_saves_matched_categories(self):
+        """test_upsert_data_facet_values_saves_matched_categories"""
+        # Act
+        result = data_facet_api.upsert_data_facet_values(self.fixture.data_1)
+        # Assert
+        self.assertEqual(result, {self.category.id})
+        self.assertEqual(
+            list(
+                data_facet_api.get_all_by_data_id(
+                    self.fixture.data_1.id
+                ).values_list("category_id", flat=True)
+            ),
+            [self.category.id],
+        )
+
+    def test_upsert_data_facet_values_replaces_previous_values(self):
+        """test_upsert_data_facet_values_replaces_previous_values"""
+        # Arrange
+        data_facet_api.upsert_data_facet_values(self.fixture.data_1)
+        self.fixture.data_1.dict_content = {}
+        # Act
+        data_facet_api.upsert_data_facet_values(self.fixture.data_1)
+        # Assert
+        self.assertEqual(
+            data_facet_api.get_all_by_data_id(self.fixture.data_1.id).count(),
+            0,
+        )
+
+    def test_get_data_query_from_refinements_filters_data(self):
+        """test_get_data_query_from_refinements_filters_data"""
+        # Arrange
+        for data in self.fixture.data_collection:
+            data_facet_api.upsert_data_facet_values(data)
+        # Act
+        matching = Data.objects.filter(
+            data_facet_api.get_data_query_from_refinements(
+                [[self.category.id, self.other_category.id]]
+            )
+        )
+        not_matching = Data.objects.filter(
+            data_facet_api.get_data_query_from_refinements(
+                [[self.category.id], [self.other_category.id]]
+            )
+        )
+        # Assert
+        self.assertEqual(
+            list(matching.values_list("id", flat=True)),
+            [self.fixture.data_1.id, self.fixture.data_2.id],
+        )
+        self.assertEqual(not_matching.count(), 0)
+
+    @patch("core_main_registry_app.settings.ENABLE_DATA_FACETS", True)
+    def test_sql_build_refinements_query_uses_data_facet_values(self):
+        """test_sql_build_refinements_query_uses_data_facet_values"""
+        # Arrange
+        data_facet_api.upsert_data_facet_values(self.fixture.data_1)
+        # Act
+        result = Data.objects.filter(
+            sql_query.build_refinements_query([[self.category.id]])
+        )
+        # Assert
+        self.assertEqual(
+            list(result.values_list("id", flat=True)),
+            [self.fixture.data_1.id],
+        )
@@ -0,0 +1,74 @@
+"""Unit Test for Data Facet Value API"""
+
+from unittest import TestCase
+
+from core_main_registry_app.components.data_facet import (
+    api as data_facet_api,
+)
+
+
+class TestGetValuesAtPath(TestCase):
+    """
+    Test Get Values At Path
+    """
+
+    def test_get_values_at_path_returns_value(self):
+        """test_get_values_at_path_returns_value"""
+        # Act
+        result = data_facet_api.get_values_at_path(
+            {"Resource": {"type": "a"}}, "Resource.type"
+        )
+        # Assert
+        self.assertEqual(result, ["a"])
+
+    def test_get_values_at_path_traverses_lists(self):
+        """test_get_values_at_path_traverses_lists"""
+        # Act
+        result = data_facet_api.get_values_at_path(
+            {"Resource": [{"type": ["a", "b"]}, {"type": "c"}]},
+            "Resource.type",
+        )
+        # Assert
+        self.assertEqual(result, ["a", "b", "c"])
+
+    def test_get_values_at_path_reads_text_of_elements_with_attributes(self):
+        """test_get_values_at_path_reads_text_of_elements_with_attributes"""
+        # Act
+        result = data_facet_api.get_values_at_path(
+            {"Resource": {"type": {"@lang": "en", "#text": "a"}}},
+            "Resource.type",
+        )
+        # Assert
+        self.assertEqual(result, ["a"])
+
+    def test_get_values_at_path_returns_empty_list_if_path_not_found(self):
+        """test_get_values_at_path_returns_empty_list_if_path_not_found"""
+        # Act
+        result = data_facet_api.get_values_at_path(
+            {"Resource": {"role": "a"}}, "Resource.type"
+        )
+        # Assert
+        self.assertEqual(result, [])
+
+
+class TestGetDataQueryFromRefinements(TestCase):
+    """
+    Test Get Data Query From Refinements
+    """
+
+    def test_get_data_query_from_refinements_returns_empty_query(self):
+        """test_get_data_query_from_refinements_returns_empty_query"""
+        # Act
+        result = data_facet_api.get_data_query_from_refinements([[], ["a"]])
+        # Assert
+        self.assertEqual(len(result), 0)
+
+    def test_get_data_query_from_refinements_ands_refinements(self):
+        """test_get_data_query_from_refinements_ands_refinements"""
+        # Act
+        result = data_facet_api.get_data_query_from_refinements(
+            [["1", "2"], ["3"]]
+        )
+        # Assert
+        self.assertEqual(len(result), 2)
+        self.assertEqual(result.connector, "AND")
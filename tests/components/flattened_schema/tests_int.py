@@ -0,0 +1,51 @@
+"""Integration Test for Flattened Schema API"""
+
+from django.test import TestCase
+
+from core_main_app.commons import exceptions
+
+from core_main_registry_app.components.flattened_schema import (
+    api as flattened_schema_api,
+)
+from core_main_registry_app.components.flattened_schema.models import (
+    FlattenedSchema,
+)
+
+
+class TestFlattenedSchema(TestCase):
+    """Test Flattened Schema"""
+
+    def test_upsert_replaces_content(self):
+        """test_upsert_replaces_content"""
+        # Arrange
+        FlattenedSchema.upsert("hash", "<a/>")
+        # Act
+        FlattenedSchema.upsert("hash", "<b/>")
+        # Assert
+        self.assertEqual(
+            FlattenedSchema.get_by_template_hash("hash").content, "<b/>"
+        )
+        self.assertEqual(
+            FlattenedSchema.objects.filter(template_hash="hash").count(), 1
+        )
+
+    def test_get_by_template_hash_raises_does_not_exist(self):
+        """test_get_by_template_hash_raises_does_not_exist"""
+        # Act # Assert
+        with self.assertRaises(exceptions.DoesNotExist):
+            FlattenedSchema.get_by_template_hash("unknown")
+
+    def test_delete_all_deletes_template_hash_only(self):
+        """test_delete_all_deletes_template_hash_only"""
+        # Arrange
+        FlattenedSchema.upsert("hash_1", "<a/>")
+        FlattenedSchema.upsert("hash_2", "<b/>")
+        # Act
+        flattened_schema_api.delete_all("hash_1")
+        # Assert
+        self.assertFalse(
+            FlattenedSchema.objects.filter(template_hash="hash_1").exists()
+        )
+        self.assertTrue(
+            FlattenedSchema.objects.filter(template_hash="hash_2").exists()
+        )
@@ -0,0 +1,98 @@
+"""Unit Test for Flattened Schema API"""
+
+from types import SimpleNamespace
+from unittest import TestCase
+from unittest.mock import patch
+
+from core_main_app.commons import exceptions
+from core_main_registry_app.components.flattened_schema import (
+    api as flattened_schema_api,
+)
+from core_main_registry_app.components.flattened_schema.models import (
+    FlattenedSchema,
+)
+
+
+class TestGetFlat(TestCase):
+    """
+    Test Get Flat
+    """
+
+    def setUp(self):
+        """setUp"""
+        self.template = SimpleNamespace(hash="hash", content="<schema/>")
+
+    @patch.object(FlattenedSchema, "upsert")
+    @patch(
+        "core_main_registry_app.components.flattened_schema.api.XSDFlattenerDatabaseOrURL"
+    )
+    @patch.object(FlattenedSchema, "get_by_template_hash")
+    def test_get_flat_returns_stored_content(
+        self, mock_get_by_template_hash, mock_flattener, mock_upsert
+    ):
+        """test_get_flat_returns_stored_content"""
+        # Arrange
+        mock_get_by_template_hash.return_value = FlattenedSchema(
+            template_hash="hash", content="<flat/>"
+        )
+        # Act
+        result = flattened_schema_api.get_flat(self.template)
+        # Assert
+        self.assertEqual(result, "<flat/>")
+        mock_flattener.assert_not_called()
+        mock_upsert.assert_not_called()
+
+    @patch.object(FlattenedSchema, "upsert")
+    @patch(
+        "core_main_registry_app.components.flattened_schema.api.XSDFlattenerDatabaseOrURL"
+    )
+    @patch.object(FlattenedSchema, "get_by_template_hash")
+    def test_get_flat_flattens_and_saves_missing_content(
+        self, mock_get_by_template_hash, mock_flattener, mock_upsert
+    ):
+        """test_get_flat_flattens_and_saves_missing_content"""
+        # Arrange
+        mock_get_by_template_hash.side_effect = exceptions.DoesNotExist("")
+        mock_flattener.return_value.get_flat.return_value = "<flat/>"
+        # Act
+        result = flattened_schema_api.get_flat(self.template)
+        # Assert
+        self.assertEqual(result, "<flat/>")
+        mock_upsert.assert_called_once_with("hash", "<flat/>")
+
+    @patch.object(FlattenedSchema, "upsert")
+    @patch(
+        "core_main_registry_app.components.flattened_schema.api.XSDFlattenerDatabaseOrURL"
+    )
+    @patch.object(FlattenedSchema, "get_by_template_hash")
+    def test_get_flat_returns_content_if_save_fails(
+        self, mock_get_by_template_hash, mock_flattener, mock_upsert
+    ):
+        """test_get_flat_returns_content_if_save_fails"""
+        # Arrange
+        mock_get_by_template_hash.side_effect = exceptions.ModelError("")
+        mock_flattener.return_value.get_flat.return_value = "<flat/>"
+        mock_upsert.side_effect = exceptions.ModelError("")
+        # Act
+        result = flattened_schema_api.get_flat(self.template)
+        # Assert
+        self.assertEqual(result, "<flat/>")
+
+    @patch.object(FlattenedSchema, "upsert")
+    @patch(
+        "core_main_registry_app.components.flattened_schema.api.XSDFlattenerDatabaseOrURL"
+    )
+    @patch.object(FlattenedSchema, "get_by_template_hash")
+    def test_get_flat_does_not_store_template_without_hash(
+        self, mock_get_by_template_hash, mock_flattener, mock_upsert
+    ):
+        """test_get_flat_does_not_store_template_without_hash"""
+        # Arrange
+        self.template.hash = None
+        mock_flattener.return_value.get_flat.return_value = "<flat/>"
+        # Act
+        result = flattened_schema_api.get_flat(self.template)
+        # Assert
+        self.assertEqual(result, "<flat/>")
+        mock_get_by_template_hash.assert_not_called()
+        mock_upsert.assert_not_called()
@@ -84,6 +84,98 @@ class TestRefinementGetAllFilteredByTemplateHash(TestCase):
         self.assertTrue(refinement_2 in result)
 
 
+class TestRefinementAddTemplateHash(TestCase):
+    """
+    Test Refinement Add Template Hash
+    """
+
+    def test_add_template_hash_shares_refinement(self):
+        """test_add_template_hash_shares_refinement"""
+        # Arrange
+        refinement = refinement_api.create_and_save("Refinement", "", "hash_1")
+        # Act
+        refinement_api.add_template_hash(refinement, "hash_2")
+        # Assert
+        for template_hash in ("hash_1", "hash_2"):
+            self.assertEqual(
+                list(
+                    refinement_api.get_all_filtered_by_template_hash(
+                        template_hash
+                    )
+                ),
+                [refinement],
+            )
+            self.assertEqual(
+                refinement_api.get_by_template_hash_and_by_slug(
+                    template_hash, refinement.slug
+                ),
+                refinement,
+            )
+
+    def test_add_template_hash_keeps_order_of_template_hash(self):
+        """test_add_template_hash_keeps_order_of_template_hash"""
+        # Arrange
+        refinement_1 = refinement_api.create_and_save("A", "", "hash_1")
+        refinement_2 = refinement_api.create_and_save("B", "", "hash_2")
+        # Act
+        refinement_api.add_template_hash(refinement_2, "hash_3")
+        refinement_api.add_template_hash(refinement_1, "hash_3")
+        refinement_api.add_template_hash(refinement_1, "hash_3")
+        # Assert
+        self.assertEqual(
+            list(refinement_api.get_all_filtered_by_template_hash("hash_3")),
+            [refinement_2, refinement_1],
+        )
+        self.assertTrue(
+            {"hash_1", "hash_2", "hash_3"}
+            <= refinement_api.get_all_template_hashes()
+        )
+
+
+class TestRefinementDeleteByTemplateHash(TestCase):
+    """
+    Test Refinement Delete By Template Hash
+    """
+
+    def test_delete_by_template_hash_deletes_refinements_of_template_hash(
+        self,
+    ):
+        """test_delete_by_template_hash_deletes_refinements_of_template_hash"""
+        # Arrange
+        refinement = refinement_api.create_and_save("A", "", "hash_1")
+        # Act
+        refinement_api.delete_by_template_hash("hash_1")
+        # Assert
+        self.assertFalse(Refinement.objects.filter(pk=refinement.pk).exists())
+
+    def test_delete_by_template_hash_keeps_shared_refinements(self):
+        """test_delete_by_template_hash_keeps_shared_refinements"""
+        # Arrange
+        refinement = refinement_api.create_and_save("A", "", "hash_1")
+        refinement_api.add_template_hash(refinement, "hash_2")
+        # Act
+        refinement_api.delete_by_template_hash("hash_1")
+        # Assert
+        self.assertEqual(
+            list(refinement_api.get_all_filtered_by_template_hash("hash_2")),
+            [refinement],
+        )
+
+    def test_delete_by_template_hash_keeps_refinements_of_other_hashes(
+        self,
+    ):
+        """test_delete_by_template_hash_keeps_refinements_of_other_hashes"""
+        # Arrange
+        refinement_api.create_and_save("A", "", "hash_1")
+        unmapped_refinement = Refinement.objects.create(name="B", xsd_name="")
+        # Act
+        refinement_api.delete_by_template_hash("hash_1")
+        # Assert
+        self.assertTrue(
+            Refinement.objects.filter(pk=unmapped_refinement.pk).exists()
+        )
+
+
 class TestRefinementCheckRefinementsAlreadyExistByTemplateHash(TestCase):
     """
     Test Refinement Check Refinements Already Exist By Template Hash
@@ -144,6 +236,21 @@ class TestRefinementGetByTemplateHashAndBySlug(TestCase):
         # Assert
         self.assertIsInstance(result, Refinement)
 
+    def test_refinement_get_by_template_hash_and_by_slug_prefers_exact_slug(
+        self,
+    ):
+        """test_refinement_get_by_template_hash_and_by_slug_prefers_exact_slug"""
+        # Arrange
+        refinement = create_refinement()
+        Refinement.create_and_save("Refinement Other", "", "")
+
+        # Act
+        result = refinement_api.get_by_template_hash_and_by_slug(
+            "", refinement.slug
+        )
+        # Assert
+        self.assertEqual(result, refinement)
+
 
 def create_refinement():
     """create_refinement
@@ -0,0 +1,109 @@
+"""Integration Test for Refinement Generation API"""
+
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from core_main_app.commons import exceptions
+
+from core_main_registry_app.commons.constants import (
+    RefinementGenerationStatus,
+)
+from core_main_registry_app.components.refinement_generation import (
+    api as refinement_generation_api,
+)
+from core_main_registry_app.components.refinement_generation.models import (
+    RefinementGeneration,
+)
+
+
+class TestRefinementGeneration(TestCase):
+    """Test Refinement Generation"""
+
+    def test_enqueue_creates_pending_generation(self):
+        """test_enqueue_creates_pending_generation"""
+        # Act
+        result = refinement_generation_api.enqueue("hash", "task_1")
+        # Assert
+        self.assertTrue(result)
+        generation = refinement_generation_api.get_by_template_hash("hash")
+        self.assertEqual(generation.status, RefinementGenerationStatus.PENDING)
+        self.assertEqual(generation.task_id, "task_1")
+
+    def test_enqueue_coalesces_duplicate_enqueues(self):
+        """test_enqueue_coalesces_duplicate_enqueues"""
+        # Arrange
+        refinement_generation_api.enqueue("hash", "task_1")
+        # Act
+        result = refinement_generation_api.enqueue("hash", "task_2")
+        # Assert
+        self.assertFalse(result)
+        self.assertEqual(
+            refinement_generation_api.get_by_template_hash("hash").task_id,
+            "task_1",
+        )
+
+    def test_start_claims_pending_generation(self):
+        """test_start_claims_pending_generation"""
+        # Arrange
+        refinement_generation_api.enqueue("hash", "task_1")
+        # Act
+        result = refinement_generation_api.start("hash", "task_1")
+        # Assert
+        self.assertTrue(result)
+        self.assertEqual(
+            refinement_generation_api.get_by_template_hash("hash").status,
+            RefinementGenerationStatus.RUNNING,
+        )
+
+    def test_start_does_not_claim_running_generation(self):
+        """test_start_does_not_claim_running_generation"""
+        # Arrange
+        refinement_generation_api.start("hash", "task_1")
+        # Act
+        result = refinement_generation_api.start("hash", "task_2")
+        # Assert
+        self.assertFalse(result)
+
+    def test_enqueue_retries_failed_generation(self):
+        """test_enqueue_retries_failed_generation"""
+        # Arrange
+        refinement_generation_api.start("hash", "task_1")
+        refinement_generation_api.finish("hash", success=False)
+        # Act
+        result = refinement_generation_api.enqueue("hash", "task_2")
+        # Assert
+        self.assertTrue(result)
+
+    def test_enqueue_does_not_retry_done_generation(self):
+        """test_enqueue_does_not_retry_done_generation"""
+        # Arrange
+        refinement_generation_api.start("hash", "task_1")
+        refinement_generation_api.finish("hash")
+        # Act
+        result = refinement_generation_api.enqueue("hash", "task_2")
+        # Assert
+        self.assertFalse(result)
+
+    def test_start_claims_abandoned_generation(self):
+        """test_start_claims_abandoned_generation"""
+        # Arrange
+        refinement_generation_api.start("hash", "task_1")
+        RefinementGeneration.objects.filter(template_hash="hash").update(
+            update_date=timezone.now() - timedelta(days=1)
+        )
+        # Act
+        result = refinement_generation_api.start("hash", "task_2")
+        # Assert
+        self.assertTrue(result)
+        self.assertEqual(
+            refinement_generation_api.get_by_template_hash("hash").task_id,
+            "task_2",
+        )
+
+    def test_get_by_template_hash_raises_does_not_exist(self):
+        """test_get_by_template_hash_raises_does_not_exist"""
+        # Act # Assert
+        with self.assertRaises(exceptions.DoesNotExist):
+            refinement_generation_api.get_by_template_hash("unknown")
@@ -3,6 +3,7 @@
 from unittest.mock import patch
 
 from django.db.migrations.exceptions import BadMigrationError
+from django.db.models.signals import post_migrate
 from django.test import TestCase
 
 from core_main_app.components.template_version_manager.models import (
@@ -145,3 +146,59 @@ class TestInitData(TestCase):
 
         with self.assertRaises(BadMigrationError):
             discover.init_registry()
+
+
+class TestInitRegistryAfterMigrate(TestCase):
+    """TestInitRegistryAfterMigrate"""
+
+    def tearDown(self):
+        """tearDown"""
+        post_migrate.disconnect(
+            dispatch_uid=discover.INIT_REGISTRY_DISPATCH_UID
+        )
+
+    @patch.object(TemplateVersionManager, "objects")
+    @patch("core_main_registry_app.discover._has_pending_migrations")
+    def test_init_registry_is_deferred_while_migrations_are_pending(
+        self, mock_has_pending_migrations, mock_tvm_objects
+    ):
+        """test_init_registry_is_deferred_while_migrations_are_pending"""
+        # Arrange
+        mock_has_pending_migrations.return_value = True
+        # Act
+        discover.init_registry()
+        # Assert
+        mock_tvm_objects.count.assert_not_called()
+        self.assertTrue(
+            post_migrate.disconnect(
+                dispatch_uid=discover.INIT_REGISTRY_DISPATCH_UID
+            )
+        )
+
+    @patch.object(TemplateVersionManager, "objects")
+    @patch("core_main_registry_app.discover._has_pending_migrations")
+    def test_init_registry_runs_after_migrate(
+        self, mock_has_pending_migrations, mock_tvm_objects
+    ):
+        """test_init_registry_runs_after_migrate"""
+        # Arrange
+        mock_has_pending_migrations.return_value = True
+        mock_tvm_objects.count.return_value = 1
+        discover.init_registry()
+        mock_has_pending_migrations.return_value = False
+        # Act
+        discover._init_registry_after_migrate(sender=None)
+        # Assert
+        mock_tvm_objects.count.assert_called_once_with()
+        self.assertFalse(
+            post_migrate.disconnect(
+                dispatch_uid=discover.INIT_REGISTRY_DISPATCH_UID
+            )
+        )
+
+    def test_has_pending_migrations_returns_false_when_migrated(self):
+        """test_has_pending_migrations_returns_false_when_migrated"""
+        # Act
+        result = discover._has_pending_migrations()
+        # Assert
+        self.assertFalse(result)
@@ -0,0 +1,141 @@
+"""Integration Test for the backfill_data_facets command"""
+
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command, CommandError
+
+from core_main_app.utils.integration_tests.integration_base_test_case import (
+    IntegrationBaseTestCase,
+)
+
+from core_main_registry_app.components.category.models import Category
+from core_main_registry_app.components.data_facet import (
+    api as data_facet_api,
+)
+from core_main_registry_app.components.data_facet.models import (
+    DataFacetValue,
+)
+from core_main_registry_app.components.refinement.models import Refinement
+from core_main_registry_app.utils.refinement import category_index
+from tests.components.data.fixtures.fixtures import DataRegistryFixtures
+
+fixture_data = DataRegistryFixtures()
+
+
+class TestBackfillDataFacets(IntegrationBaseTestCase):
+    """Test Backfill Data Facets"""
+
+    fixture = fixture_data
+
+    def setUp(self):
+        """setUp"""
+        super().setUp()
+        category_index.invalidate()
+        self.template_hash = "backfill_data_facets_hash"
+        self.fixture.template.hash = self.template_hash
+        self.fixture.template.save()
+        refinement = Refinement.create_and_save(
+            "Role", "role", self.template_hash
+        )
+        self.category = Category.create_and_save(
+            "Institution",
+            "Resource.role.type",
+            "Organization: Institution",
+            None,
+            refinement,
+        )
+        self.stdout = StringIO()
+        self.stderr = StringIO()
+
+    def _call_command(self, *args):
+        """Call the command with the test outputs.
+
+        Args:
+            args:
+
+        Returns:
+
+        """
+        call_command(
+            "backfill_data_facets",
+            *args,
+            stdout=self.stdout,
+            stderr=self.stderr,
+        )
+
+    def test_backfill_saves_facet_values(self):
+        """test_backfill_saves_facet_values"""
+        # Act
+        self._call_command()
+        # Assert
+        self.assertEqual(
+            set(DataFacetValue.objects.values_list("data_id", "category_id")),
+            {
+                (self.fixture.data_1.id, self.category.id),
+                (self.fixture.data_2.id, self.category.id),
+            },
+        )
+        self.assertIn(
+            f"{len(self.fixture.data_collection)} data processed, 0 errors",
+            self.stdout.getvalue(),
+        )
+
+    def test_backfill_dry_run_does_not_save_facet_values(self):
+        """test_backfill_dry_run_does_not_save_facet_values"""
+        # Act
+        with patch.object(
+            data_facet_api,
+            "get_data_category_ids",
+            wraps=data_facet_api.get_data_category_ids,
+        ) as mock_get_data_category_ids:
+            self._call_command("--dry-run")
+        # Assert
+        self.assertEqual(DataFacetValue.objects.count(), 0)
+        self.assertEqual(
+            mock_get_data_category_ids.call_count,
+            len(self.fixture.data_collection),
+        )
+        self.assertIn("Dry run", self.stdout.getvalue())
+
+    def test_backfill_of_other_template_hash_processes_no_data(self):
+        """test_backfill_of_other_template_hash_processes_no_data"""
+        # Act
+        self._call_command("--template-hash", "other_hash")
+        # Assert
+        self.assertEqual(DataFacetValue.objects.count(), 0)
+        self.assertIn("0 data will be processed", self.stdout.getvalue())
+
+    @patch.object(data_facet_api, "upsert_data_facet_values")
+    def test_backfill_counts_data_errors(self, mock_upsert_data_facet_values):
+        """test_backfill_counts_data_errors"""
+        # Arrange
+        mock_upsert_data_facet_values.side_effect = Exception("error")
+        # Act
+        self._call_command()
+        # Assert
+        self.assertIn(
+            f"0 data processed, {len(self.fixture.data_collection)} errors",
+            self.stdout.getvalue(),
+        )
+        self.assertIn(
+            f"Unable to process data {self.fixture.data_1.id}: error",
+            self.stderr.getvalue(),
+        )
+
+    def test_backfill_with_invalid_batch_size_raises_command_error(self):
+        """test_backfill_with_invalid_batch_size_raises_command_error"""
+        # Act # Assert
+        with self.assertRaises(CommandError):
+            self._call_command("--batch-size", "0")
+
+    @patch.object(Refinement, "get_all_template_hashes")
+    def test_backfill_raises_command_error_on_error(
+        self, mock_get_all_template_hashes
+    ):
+        """test_backfill_raises_command_error_on_error"""
+        # Arrange
+        mock_get_all_template_hashes.side_effect = Exception("error")
+        # Act # Assert
+        with self.assertRaises(CommandError):
+            self._call_command()
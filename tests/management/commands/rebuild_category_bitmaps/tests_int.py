@@ -0,0 +1,101 @@
+"""Integration Test for the rebuild_category_bitmaps command"""
+
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command, CommandError
+
+from core_main_app.utils.integration_tests.integration_base_test_case import (
+    IntegrationBaseTestCase,
+)
+
+from core_main_registry_app.components.category.models import Category
+from core_main_registry_app.components.category_bitmap import (
+    api as category_bitmap_api,
+)
+from core_main_registry_app.components.refinement.models import Refinement
+from core_main_registry_app.utils.refinement import bitmap_index
+from core_main_registry_app.utils.refinement import category_index
+from tests.components.data.fixtures.fixtures import DataRegistryFixtures
+
+fixture_data = DataRegistryFixtures()
+
+
+class TestRebuildCategoryBitmaps(IntegrationBaseTestCase):
+    """Test Rebuild Category Bitmaps"""
+
+    fixture = fixture_data
+
+    def setUp(self):
+        """setUp"""
+        super().setUp()
+        category_index.invalidate()
+        bitmap_index.invalidate()
+        self.template_hash = "rebuild_category_bitmaps_hash"
+        self.fixture.template.hash = self.template_hash
+        self.fixture.template.save()
+        refinement = Refinement.create_and_save(
+            "Role", "role", self.template_hash
+        )
+        self.category = Category.create_and_save(
+            "Institution",
+            "Resource.role.type",
+            "Organization: Institution",
+            None,
+            refinement,
+        )
+        self.stdout = StringIO()
+
+    def test_rebuild_sets_bitmaps_of_data(self):
+        """test_rebuild_sets_bitmaps_of_data"""
+        # Act
+        call_command("rebuild_category_bitmaps", stdout=self.stdout)
+        # Assert
+        self.assertEqual(
+            bitmap_index.get_data_ids(
+                [[self.category.id]], self.template_hash
+            ),
+            [self.fixture.data_1.id, self.fixture.data_2.id],
+        )
+        self.assertIn(
+            f"{self.template_hash}: 2 data matching a category.",
+            self.stdout.getvalue(),
+        )
+
+    def test_rebuild_of_other_template_hash_sets_no_bitmap(self):
+        """test_rebuild_of_other_template_hash_sets_no_bitmap"""
+        # Act
+        call_command(
+            "rebuild_category_bitmaps",
+            "--template-hash",
+            "other_hash",
+            stdout=self.stdout,
+        )
+        # Assert
+        self.assertEqual(
+            category_bitmap_api.get_bitmaps_by_template_hash(
+                self.template_hash
+            ),
+            {},
+        )
+        self.assertNotIn(self.template_hash, self.stdout.getvalue())
+
+    def test_rebuild_with_invalid_batch_size_raises_command_error(self):
+        """test_rebuild_with_invalid_batch_size_raises_command_error"""
+        # Act # Assert
+        with self.assertRaises(CommandError):
+            call_command(
+                "rebuild_category_bitmaps",
+                "--batch-size",
+                "0",
+                stdout=self.stdout,
+            )
+
+    @patch.object(category_bitmap_api, "rebuild_bitmaps")
+    def test_rebuild_raises_command_error_on_error(self, mock_rebuild_bitmaps):
+        """test_rebuild_raises_command_error_on_error"""
+        # Arrange
+        mock_rebuild_bitmaps.side_effect = Exception("error")
+        # Act # Assert
+        with self.assertRaises(CommandError):
+            call_command("rebuild_category_bitmaps", stdout=self.stdout)
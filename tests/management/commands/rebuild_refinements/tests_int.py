@@ -0,0 +1,181 @@
+"""Integration Test for the rebuild_refinements command"""
+
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command, CommandError
+from django.test import TestCase
+
+from core_main_app.components.template.models import Template
+from core_main_app.system import api as system_api
+from core_main_registry_app.components.category.models import Category
+from core_main_registry_app.components.refinement.models import Refinement
+from core_main_registry_app.utils.refinement import refinement
+
+
+class TestRebuildRefinements(TestCase):
+    """Test Rebuild Refinements"""
+
+    def setUp(self):
+        """setUp"""
+        # registry template, with its refinements, added by the migrations
+        self.template = Template.objects.filter(
+            _hash__in=Refinement.get_all_template_hashes()
+        ).first()
+        self.category_ids = set(
+            Category.objects.filter(
+                refinement__template_hash=self.template.hash
+            ).values_list("id", flat=True)
+        )
+        self.stdout = StringIO()
+        self.stderr = StringIO()
+
+    def _call_command(self, *args):
+        """Call the command on the registry template.
+
+        Args:
+            args:
+
+        Returns:
+
+        """
+        call_command(
+            "rebuild_refinements",
+            "--template-id",
+            str(self.template.pk),
+            *args,
+            stdout=self.stdout,
+            stderr=self.stderr,
+        )
+
+    def _get_category_ids(self):
+        """Get the ids of the categories of the registry template.
+
+        Returns:
+
+        """
+        return set(
+            Category.objects.filter(
+                refinement__template_hash=self.template.hash
+            ).values_list("id", flat=True)
+        )
+
+    def test_rebuild_replaces_categories(self):
+        """test_rebuild_replaces_categories"""
+        # Act
+        self._call_command()
+        # Assert
+        category_ids = self._get_category_ids()
+        self.assertEqual(len(category_ids), len(self.category_ids))
+        self.assertTrue(category_ids.isdisjoint(self.category_ids))
+        self.assertIn(
+            f"{self.template.hash} (template", self.stdout.getvalue()
+        )
+        self.assertIn("rebuilt", self.stdout.getvalue())
+        self.assertIn("1 templates processed", self.stdout.getvalue())
+
+    @patch(
+        "core_main_registry_app.management.commands.rebuild_refinements.ENABLE_CATEGORY_BITMAPS",
+        True,
+    )
+    @patch(
+        "core_main_registry_app.management.commands.rebuild_refinements.ENABLE_DATA_FACETS",
+        True,
+    )
+    def test_rebuild_reminds_to_update_facet_values_and_bitmaps(self):
+        """test_rebuild_reminds_to_update_facet_values_and_bitmaps"""
+        # Act
+        self._call_command()
+        # Assert
+        self.assertIn("Run backfill_data_facets", self.stdout.getvalue())
+        self.assertIn("Run rebuild_category_bitmaps", self.stdout.getvalue())
+
+    def test_rebuild_dry_run_does_not_save_refinements(self):
+        """test_rebuild_dry_run_does_not_save_refinements"""
+        # Act
+        self._call_command("--dry-run")
+        # Assert
+        self.assertEqual(self._get_category_ids(), self.category_ids)
+        self.assertIn("Dry run", self.stdout.getvalue())
+        self.assertIn(
+            f"{Refinement.objects.filter(template_hash=self.template.hash).count()} refinements",
+            self.stdout.getvalue(),
+        )
+
+    def test_verify_up_to_date_refinements(self):
+        """test_verify_up_to_date_refinements"""
+        # Act
+        self._call_command("--verify")
+        # Assert
+        self.assertEqual(self._get_category_ids(), self.category_ids)
+        self.assertIn("up to date", self.stdout.getvalue())
+        self.assertIn("0 stale", self.stdout.getvalue())
+
+    def test_verify_stale_refinements(self):
+        """test_verify_stale_refinements"""
+        # Arrange
+        Refinement.objects.filter(
+            template_hash=self.template.hash, name="Type"
+        ).update(fingerprint="stale")
+        # Act
+        self._call_command("--verify")
+        # Assert
+        self.assertIn("1 stale", self.stdout.getvalue())
+
+    def test_rebuild_of_other_template_hash_processes_no_template(self):
+        """test_rebuild_of_other_template_hash_processes_no_template"""
+        # Act
+        self._call_command("--template-hash", "other_hash")
+        # Assert
+        self.assertEqual(self._get_category_ids(), self.category_ids)
+        self.assertIn("0 templates processed", self.stdout.getvalue())
+
+    def test_rebuild_skips_templates_without_hash(self):
+        """test_rebuild_skips_templates_without_hash"""
+        # Arrange
+        template = Template(
+            content=self.template.content, filename="no_hash.xsd"
+        )
+        template.hash = ""
+        template.save()
+        # Act
+        call_command(
+            "rebuild_refinements",
+            "--template-hash",
+            self.template.hash,
+            "--verify",
+            stdout=self.stdout,
+        )
+        # Assert
+        self.assertIn("1 templates processed", self.stdout.getvalue())
+
+    @patch.object(refinement, "init_refinements")
+    def test_rebuild_counts_template_errors(self, mock_init_refinements):
+        """test_rebuild_counts_template_errors"""
+        # Arrange
+        mock_init_refinements.side_effect = Exception("error")
+        # Act
+        self._call_command()
+        # Assert
+        self.assertIn("1 errors", self.stdout.getvalue())
+        self.assertIn(
+            f"Unable to process template {self.template.pk}: error",
+            self.stderr.getvalue(),
+        )
+
+    def test_rebuild_with_invalid_workers_raises_command_error(self):
+        """test_rebuild_with_invalid_workers_raises_command_error"""
+        # Act # Assert
+        with self.assertRaises(CommandError):
+            self._call_command("--workers", "-1")
+
+    @patch.object(system_api, "get_all_templates")
+    def test_rebuild_raises_command_error_on_error(
+        self, mock_get_all_templates
+    ):
+        """test_rebuild_raises_command_error_on_error"""
+        # Arrange
+        mock_get_all_templates.side_effect = Exception("error")
+        # Act # Assert
+        with self.assertRaises(CommandError):
+            self._call_command()
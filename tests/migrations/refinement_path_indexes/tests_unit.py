@@ -0,0 +1,82 @@
+"""Unit tests for the migration creating the refinement path indexes"""
+
+from importlib import import_module
+from unittest.mock import MagicMock
+
+from django.apps import apps
+from django.test import TestCase
+
+from core_main_registry_app.components.category.models import Category
+from core_main_registry_app.components.refinement.models import Refinement
+from core_main_registry_app.utils.refinement import sql_query
+
+migration = import_module(
+    "core_main_registry_app.migrations.0004_refinement_path_indexes"
+)
+
+
+class TestRefinementPathIndexesMigration(TestCase):
+    """Tests for the refinement path indexes migration."""
+
+    def setUp(self):
+        """setUp"""
+        refinement = Refinement.create_and_save("Type", "type", "hash")
+        Category.create_and_save("a", "Migration.type", "a", None, refinement)
+        self.schema_editor = MagicMock()
+        self.schema_editor.connection.vendor = "postgresql"
+        self.schema_editor.quote_name.side_effect = lambda name: f'"{name}"'
+
+    def _get_executed_sql(self):
+        """Get the SQL statements executed on the indexes of the path
+        'Migration.type'.
+
+        Returns:
+
+        """
+        index_names = [
+            sql_query.get_path_index_name(path)
+            for path in ["Migration.type", "Migration.type.#text"]
+        ]
+        return [
+            call.args[0]
+            for call in self.schema_editor.execute.call_args_list
+            if any(index_name in call.args[0] for index_name in index_names)
+        ]
+
+    def test_forwards_func_creates_indexes_concurrently(self):
+        """test_forwards_func_creates_indexes_concurrently"""
+        # Act
+        migration.forwards_func(apps, self.schema_editor)
+        # Assert
+        self.assertEqual(
+            self._get_executed_sql(),
+            [
+                sql_query.get_create_path_index_sql(path, concurrently=True)
+                for path in ["Migration.type", "Migration.type.#text"]
+            ],
+        )
+
+    def test_reverse_func_drops_indexes_concurrently(self):
+        """test_reverse_func_drops_indexes_concurrently"""
+        # Act
+        migration.reverse_func(apps, self.schema_editor)
+        # Assert
+        self.assertEqual(
+            self._get_executed_sql(),
+            [
+                'DROP INDEX CONCURRENTLY IF EXISTS "{0}"'.format(
+                    sql_query.get_path_index_name(path)
+                )
+                for path in ["Migration.type", "Migration.type.#text"]
+            ],
+        )
+
+    def test_migration_does_nothing_without_postgresql(self):
+        """test_migration_does_nothing_without_postgresql"""
+        # Arrange
+        self.schema_editor.connection.vendor = "sqlite"
+        # Act
+        migration.forwards_func(apps, self.schema_editor)
+        migration.reverse_func(apps, self.schema_editor)
+        # Assert
+        self.schema_editor.execute.assert_not_called()
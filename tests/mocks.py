@@ -23,3 +23,9 @@ class MockChoicesIterator(Mock):
             return self.iterator_list[self._idx - 1]
         else:
             raise StopIteration
+
+
+class MockNode(object):
+    def __init__(self, name, pk):
+        self.name = name
+        self.pk = pk
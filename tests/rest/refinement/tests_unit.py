@@ -0,0 +1,142 @@
+"""Unit tests for the refinement REST API"""
+
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+from rest_framework import status
+
+from core_main_app.access_control.exceptions import AccessControlError
+from core_main_app.commons import exceptions
+from core_main_app.utils.tests_tools.MockUser import create_mock_user
+from core_main_app.utils.tests_tools.RequestMock import RequestMock
+from core_main_registry_app.components.template import (
+    api as template_registry_api,
+)
+from core_main_registry_app.rest.refinement import (
+    views as refinement_rest_views,
+)
+from core_main_registry_app.utils.refinement import facet_count
+
+
+@patch.object(template_registry_api, "get_current_registry_template")
+@patch.object(facet_count, "get_facet_counts")
+class TestFacetCounts(SimpleTestCase):
+    """Test Facet Counts"""
+
+    def setUp(self):
+        """setUp"""
+        self.user = create_mock_user("1")
+
+    def test_post_returns_http_200_with_counts(
+        self, mock_get_facet_counts, mock_get_current_registry_template
+    ):
+        """test_post_returns_http_200_with_counts"""
+        # Arrange
+        mock_get_current_registry_template.return_value.hash = "hash"
+        mock_get_facet_counts.return_value = {"1": 2}
+        # Act
+        response = RequestMock.do_request_post(
+            refinement_rest_views.facet_counts,
+            self.user,
+            data={"query": {"$and": []}},
+        )
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {"1": 2})
+        mock_get_facet_counts.assert_called_once_with(
+            {"$and": []}, "hash", self.user
+        )
+
+    def test_post_parses_json_string_query(
+        self, mock_get_facet_counts, mock_get_current_registry_template
+    ):
+        """test_post_parses_json_string_query"""
+        # Arrange
+        mock_get_current_registry_template.return_value.hash = "hash"
+        mock_get_facet_counts.return_value = {}
+        # Act
+        response = RequestMock.do_request_post(
+            refinement_rest_views.facet_counts,
+            self.user,
+            data={"query": '{"$and": []}'},
+        )
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        mock_get_facet_counts.assert_called_once_with(
+            {"$and": []}, "hash", self.user
+        )
+
+    def test_post_invalid_json_returns_http_400(
+        self, mock_get_facet_counts, mock_get_current_registry_template
+    ):
+        """test_post_invalid_json_returns_http_400"""
+        # Act
+        response = RequestMock.do_request_post(
+            refinement_rest_views.facet_counts,
+            self.user,
+            data={"query": "{"},
+        )
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        mock_get_facet_counts.assert_not_called()
+
+    def test_post_query_not_object_returns_http_400(
+        self, mock_get_facet_counts, mock_get_current_registry_template
+    ):
+        """test_post_query_not_object_returns_http_400"""
+        # Act
+        response = RequestMock.do_request_post(
+            refinement_rest_views.facet_counts,
+            self.user,
+            data={"query": "[]"},
+        )
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        mock_get_facet_counts.assert_not_called()
+
+    def test_post_query_error_returns_http_400(
+        self, mock_get_facet_counts, mock_get_current_registry_template
+    ):
+        """test_post_query_error_returns_http_400"""
+        # Arrange
+        mock_get_facet_counts.side_effect = exceptions.QueryError("error")
+        # Act
+        response = RequestMock.do_request_post(
+            refinement_rest_views.facet_counts,
+            self.user,
+            data={"query": {}},
+        )
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_post_access_control_error_returns_http_403(
+        self, mock_get_facet_counts, mock_get_current_registry_template
+    ):
+        """test_post_access_control_error_returns_http_403"""
+        # Arrange
+        mock_get_facet_counts.side_effect = AccessControlError("error")
+        # Act
+        response = RequestMock.do_request_post(
+            refinement_rest_views.facet_counts,
+            None,
+            data={"query": {}},
+        )
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_post_unexpected_error_returns_http_500(
+        self, mock_get_facet_counts, mock_get_current_registry_template
+    ):
+        """test_post_unexpected_error_returns_http_500"""
+        # Arrange
+        mock_get_current_registry_template.side_effect = Exception("error")
+        # Act
+        response = RequestMock.do_request_post(
+            refinement_rest_views.facet_counts,
+            self.user,
+            data={"query": {}},
+        )
+        # Assert
+        self.assertEqual(
+            response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
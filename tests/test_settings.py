@@ -69,6 +69,8 @@ MONGODB_ASYNC_SAVE = False
 ENABLE_ALLAUTH = False
 ENABLE_SAML2_SSO_AUTH = False
 ALLOW_MULTIPLE_SCHEMAS = True
+# single process: the local memory cache is shared by the tests
+REFINEMENT_CACHE = "default"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 CUSTOM_NAME = "NMRR"
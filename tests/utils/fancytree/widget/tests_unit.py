@@ -5,8 +5,9 @@ from unittest import TestCase
 from core_main_registry_app.utils.fancytree.widget import (
     FancyTreeWidget,
     FANCYTREE_CDN_PATH,
+    get_doc,
 )
-from tests.mocks import MockChoicesIterator
+from tests.mocks import MockChoicesIterator, MockNode
 
 
 class TestFancyTreeWidgetRender(TestCase):
@@ -21,3 +22,15 @@ class TestFancyTreeWidgetRender(TestCase):
         )
 
         self.assertIn(FANCYTREE_CDN_PATH, results)
+
+
+class TestGetDoc(TestCase):
+    """Tests for get_doc method."""
+
+    def test_get_doc_in_count_mode_renders_placeholder(self):
+        """test_get_doc_in_count_mode_renders_placeholder"""
+        node = MockNode(name="node", pk=1)
+        result = get_doc(node, [], True)
+        self.assertEqual(
+            result["title"], "node <em class='occurrences' id='1'></em>"
+        )
@@ -0,0 +1,126 @@
+"""Unit tests for the category bitmap index"""
+
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from core_main_registry_app.utils.refinement import bitmap_index
+from core_main_registry_app.utils.refinement import cache as refinement_cache
+from core_main_registry_app.utils.refinement import category_index
+from core_main_registry_app.utils.refinement import category_tree
+
+
+class TestBitmapIndex(TestCase):
+    """Tests for the bitmap index."""
+
+    def test_get_bitmap_from_ids_and_get_ids_from_bitmap(self):
+        """test_get_bitmap_from_ids_and_get_ids_from_bitmap"""
+        # Arrange
+        ids = [0, 7, 8, 65536, 1000003]
+        # Act
+        bitmap = bitmap_index.get_bitmap_from_ids(reversed(ids))
+        # Assert
+        self.assertEqual(bitmap_index.bit_count(bitmap), len(ids))
+        self.assertEqual(bitmap_index.get_ids_from_bitmap(bitmap), ids)
+
+    def test_count_bits_counts_set_bits(self):
+        """test_count_bits_counts_set_bits"""
+        # Act
+        result = bitmap_index.count_bits((1 << 100000) | 0b1011)
+        # Assert
+        self.assertEqual(result, 4)
+
+    @patch.object(refinement_cache, "REFINEMENT_CACHE", None)
+    @patch(
+        "core_main_registry_app.components.category_bitmap.api.get_bitmaps_by_template_hash"
+    )
+    def test_get_index_without_cache_is_loaded_for_each_use(
+        self, mock_get_bitmaps_by_template_hash
+    ):
+        """test_get_index_without_cache_is_loaded_for_each_use"""
+        # Arrange
+        mock_get_bitmaps_by_template_hash.return_value = {1: 1}
+        bitmap_index.get_index("hash")
+        # Act
+        bitmap_index.get_index("hash")
+        # Assert
+        self.assertEqual(mock_get_bitmaps_by_template_hash.call_count, 2)
+
+    def test_update_index_with_same_chunk_versions_returns_index(self):
+        """test_update_index_with_same_chunk_versions_returns_index"""
+        # Arrange
+        index = bitmap_index.BitmapIndex("hash", None, {1: 1}, {0: "v1"})
+        # Act
+        result = bitmap_index._update_index(index, {0: "v1"})
+        # Assert
+        self.assertIs(result, index)
+
+    @patch.object(bitmap_index, "get_index")
+    def test_get_refinements_bitmap_ors_categories_and_ands_refinements(
+        self, mock_get_index
+    ):
+        """test_get_refinements_bitmap_ors_categories_and_ands_refinements"""
+        # Arrange
+        mock_get_index.return_value = bitmap_index.BitmapIndex(
+            "hash", None, {1: 0b0011, 2: 0b0100, 3: 0b0110}
+        )
+        # Act
+        result = bitmap_index.get_refinements_bitmap(
+            [[1, "2"], [], [3, "invalid"]], "hash"
+        )
+        # Assert
+        self.assertEqual(result, 0b0110)
+
+    @patch.object(bitmap_index, "get_index")
+    def test_get_refinements_bitmap_returns_none_without_selection(
+        self, mock_get_index
+    ):
+        """test_get_refinements_bitmap_returns_none_without_selection"""
+        # Arrange
+        mock_get_index.return_value = bitmap_index.BitmapIndex(
+            "hash", None, {1: 1}
+        )
+        # Act
+        result = bitmap_index.get_refinements_bitmap([[]], "hash")
+        # Assert
+        self.assertIsNone(result)
+
+    @patch.object(bitmap_index, "get_index")
+    def test_get_facet_counts_counts_intersections(self, mock_get_index):
+        """test_get_facet_counts_counts_intersections"""
+        # Arrange
+        mock_get_index.return_value = bitmap_index.BitmapIndex(
+            "hash", None, {1: 0b0011, 2: 0b0100, 3: 0b1000}
+        )
+        # Act
+        result = bitmap_index.get_facet_counts([0, 1, 2], "hash")
+        # Assert
+        self.assertEqual(result, {1: 2, 2: 1})
+
+    @patch.object(bitmap_index, "get_index")
+    def test_get_facet_counts_counts_data_of_subtrees_once(
+        self, mock_get_index
+    ):
+        """test_get_facet_counts_counts_data_of_subtrees_once"""
+        # Arrange
+        mock_get_index.return_value = bitmap_index.BitmapIndex(
+            "hash", None, {2: 0b0011, 3: 0b0110}
+        )
+        tree = category_tree.CategoryTree(
+            1,
+            [
+                category_index.CategoryEntry(
+                    1, "a", "a__category", 1, "r", "R", True, 1, 1, 6
+                ),
+                category_index.CategoryEntry(
+                    2, "a", "a:b", 1, "r", "R", True, 1, 2, 3
+                ),
+                category_index.CategoryEntry(
+                    3, "a", "a:c", 1, "r", "R", True, 1, 4, 5
+                ),
+            ],
+        )
+        # Act
+        result = bitmap_index.get_facet_counts([0, 1, 2], "hash", [tree])
+        # Assert
+        self.assertEqual(result, {1: 3, 2: 2, 3: 2})
@@ -0,0 +1,174 @@
+"""Unit tests for the refinement cache"""
+
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from core_main_registry_app.components.category import api as category_api
+from core_main_registry_app.components.category.models import Category
+from core_main_registry_app.components.refinement import (
+    api as refinement_api,
+)
+from core_main_registry_app.components.refinement.models import Refinement
+from core_main_registry_app.utils.refinement import cache as refinement_cache
+
+
+@patch.object(refinement_cache, "_in_transaction", return_value=False)
+class TestRefinementLookupCache(TestCase):
+    """Tests for the refinement and category lookups read through the cache."""
+
+    def setUp(self):
+        """setUp"""
+        self.template_hash = "lookup_hash"
+        refinement_cache.invalidate(self.template_hash)
+        refinement_cache.clear_local_cache()
+        self.refinement = Refinement.create_and_save(
+            "Type", "type", self.template_hash
+        )
+        self.category = Category.create_and_save(
+            "a", "Resource.type", "a", None, self.refinement
+        )
+
+    def test_get_by_id_uses_cache(self, mock_in_transaction):
+        """test_get_by_id_uses_cache"""
+        # Arrange
+        category_api.get_by_id(self.category.id)
+        # Act
+        with self.assertNumQueries(0):
+            result = category_api.get_by_id(str(self.category.id))
+        # Assert
+        self.assertEqual(result, self.category)
+
+    def test_get_by_id_returns_new_object(self, mock_in_transaction):
+        """test_get_by_id_returns_new_object"""
+        # Arrange
+        category = category_api.get_by_id(self.category.id)
+        category.name = "modified"
+        # Act
+        result = category_api.get_by_id(self.category.id)
+        # Assert
+        self.assertIsNot(result, category)
+        self.assertEqual(result.name, "a")
+        self.assertEqual(result.refinement, self.refinement)
+
+    def test_get_by_id_returned_object_can_be_saved(self, mock_in_transaction):
+        """test_get_by_id_returned_object_can_be_saved"""
+        # Arrange
+        category = category_api.get_by_id(self.category.id)
+        category.name = "b"
+        # Act
+        category.save()
+        # Assert
+        self.assertEqual(
+            list(
+                Category.objects.filter(name="b").values_list("id", flat=True)
+            ),
+            [self.category.id],
+        )
+
+    def test_get_all_values_by_template_hash_uses_cache(
+        self, mock_in_transaction
+    ):
+        """test_get_all_values_by_template_hash_uses_cache"""
+        # Arrange
+        refinement_api.get_all_values_by_template_hash(self.template_hash)
+        # Act
+        with self.assertNumQueries(0):
+            result = refinement_api.get_all_values_by_template_hash(
+                self.template_hash
+            )
+        # Assert
+        self.assertEqual(
+            [refinement["id"] for refinement in result], [self.refinement.id]
+        )
+
+    def test_get_all_values_by_template_hash_returns_copies(
+        self, mock_in_transaction
+    ):
+        """test_get_all_values_by_template_hash_returns_copies"""
+        # Arrange
+        refinement_api.get_all_values_by_template_hash(self.template_hash)[0][
+            "name"
+        ] = "modified"
+        # Act
+        result = refinement_api.get_all_values_by_template_hash(
+            self.template_hash
+        )
+        # Assert
+        self.assertEqual(result[0]["name"], "Type")
+
+    def test_get_all_filtered_by_template_hash_returns_queryset(
+        self, mock_in_transaction
+    ):
+        """test_get_all_filtered_by_template_hash_returns_queryset"""
+        # Act
+        result = refinement_api.get_all_filtered_by_template_hash(
+            self.template_hash
+        )
+        # Assert
+        self.assertEqual(
+            list(result.values_list("id", flat=True)), [self.refinement.id]
+        )
+
+    def test_create_refinement_invalidates_cache(self, mock_in_transaction):
+        """test_create_refinement_invalidates_cache"""
+        # Arrange
+        refinement_api.get_all_values_by_template_hash(self.template_hash)
+        # Act
+        other_refinement = Refinement.create_and_save(
+            "Other", "other", self.template_hash
+        )
+        # Assert
+        self.assertEqual(
+            [
+                refinement["id"]
+                for refinement in refinement_api.get_all_values_by_template_hash(
+                    self.template_hash
+                )
+            ],
+            [self.refinement.id, other_refinement.id],
+        )
+
+    def test_check_refinements_exist_does_not_cache_missing_refinements(
+        self, mock_in_transaction
+    ):
+        """test_check_refinements_exist_does_not_cache_missing_refinements"""
+        # Arrange
+        refinement_api.check_refinements_already_exist_by_template_hash(
+            "missing_hash"
+        )
+        # Act
+        with self.assertNumQueries(1):
+            result = refinement_api.check_refinements_already_exist_by_template_hash(
+                "missing_hash"
+            )
+        # Assert
+        self.assertFalse(result)
+
+    def test_get_or_load_bypasses_cache_in_transaction(
+        self, mock_in_transaction
+    ):
+        """test_get_or_load_bypasses_cache_in_transaction"""
+        # Arrange
+        mock_in_transaction.return_value = True
+        category_api.get_by_id(self.category.id)
+        # Act
+        with self.assertNumQueries(1):
+            category_api.get_by_id(self.category.id)
+
+    @patch.object(refinement_cache, "REFINEMENT_LOCAL_CACHE_SIZE", 2)
+    def test_local_cache_is_bounded(self, mock_in_transaction):
+        """test_local_cache_is_bounded"""
+        # Act
+        for key in ("a", "b", "c"):
+            refinement_cache.get_or_load(
+                self.template_hash, "test", key, lambda: key
+            )
+        # Assert
+        self.assertEqual(len(refinement_cache._local_cache), 2)
+        self.assertEqual(
+            refinement_cache.get_or_load(
+                self.template_hash, "test", "a", lambda: "loaded"
+            ),
+            "a",
+        )
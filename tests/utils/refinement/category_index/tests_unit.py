@@ -0,0 +1,259 @@
+"""Unit tests for the category index"""
+
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from core_main_registry_app.components.category import api as category_api
+from core_main_registry_app.components.category.models import Category
+from core_main_registry_app.components.refinement.models import Refinement
+from core_main_registry_app.utils.refinement import cache as refinement_cache
+from core_main_registry_app.utils.refinement import category_index
+from core_main_registry_app.utils.refinement.mongo_query import (
+    build_refinements_query,
+    get_refinement_selected_values_from_query,
+)
+
+
+class TestCategoryIndex(TestCase):
+    """Tests for the category index."""
+
+    def setUp(self):
+        """setUp"""
+        self.template_hash = "index_hash"
+        refinement_cache.invalidate(self.template_hash)
+        category_index.invalidate()
+        self.refinement = Refinement.create_and_save(
+            "Type", "type", self.template_hash
+        )
+        self.parent = Category.create_and_save(
+            "a", "Resource.type", "a__category", None, self.refinement
+        )
+        self.child = Category.create_and_save(
+            "b", "Resource.type", "a:b", self.parent, self.refinement
+        )
+
+    def test_get_index_returns_categories_of_template_hash(self):
+        """test_get_index_returns_categories_of_template_hash"""
+        Category.create_and_save(
+            "c",
+            "Resource.type",
+            "c",
+            None,
+            Refinement.create_and_save("Type", "type", "other_hash"),
+        )
+        index = category_index.get_index(self.template_hash)
+        self.assertEqual(
+            [entry.id for entry in index.entries],
+            [self.parent.id, self.child.id],
+        )
+        self.assertEqual(index.get(str(self.child.id)).value, "a:b")
+        self.assertEqual(
+            index.get_ids("Resource.type", "a:b"), (self.child.id,)
+        )
+        self.assertEqual(
+            index.get(self.child.id).refinement_slug, self.refinement.slug
+        )
+
+    def test_get_index_is_built_once(self):
+        """test_get_index_is_built_once"""
+        index = category_index.get_index(self.template_hash)
+        with self.assertNumQueries(0):
+            self.assertIs(category_index.get_index(self.template_hash), index)
+
+    def test_get_index_is_rebuilt_when_template_hash_changes(self):
+        """test_get_index_is_rebuilt_when_template_hash_changes"""
+        category_index.get_index(self.template_hash)
+        index = category_index.get_index("other_hash")
+        self.assertEqual(index.template_hash, "other_hash")
+        self.assertEqual(len(index.entries), 0)
+
+    def test_get_index_is_rebuilt_when_refinements_are_invalidated(self):
+        """test_get_index_is_rebuilt_when_refinements_are_invalidated"""
+        index = category_index.get_index(self.template_hash)
+        refinement_cache.invalidate(self.template_hash)
+        self.assertIsNot(category_index.get_index(self.template_hash), index)
+
+    @patch.object(category_index, "REFINEMENT_INDEX_CHECK_INTERVAL", 0)
+    def test_get_index_is_kept_when_categories_are_unchanged(self):
+        """test_get_index_is_kept_when_categories_are_unchanged"""
+        # Arrange
+        index = category_index.get_index(self.template_hash)
+        # Act
+        with self.assertNumQueries(1):
+            result = category_index.get_index(self.template_hash)
+        # Assert
+        self.assertIs(result, index)
+
+    @patch.object(category_index, "REFINEMENT_INDEX_CHECK_INTERVAL", 0)
+    @patch.object(refinement_cache, "get_version", return_value=None)
+    def test_get_index_is_rebuilt_when_categories_change(
+        self, mock_get_version
+    ):
+        """test_get_index_is_rebuilt_when_categories_change"""
+        # Arrange
+        category_index.get_index(self.template_hash)
+        category = Category.create_and_save(
+            "c", "Resource.type", "a:c", self.parent, self.refinement
+        )
+        # Act
+        result = category_index.get_index(self.template_hash)
+        # Assert
+        self.assertIsNotNone(result.get(category.id))
+
+    @patch.object(refinement_cache, "get_version", return_value=None)
+    def test_get_selection_index_checks_index_missing_selected_category(
+        self, mock_get_version
+    ):
+        """test_get_selection_index_checks_index_missing_selected_category"""
+        # Arrange
+        category_index.get_index(self.template_hash)
+        category = Category.create_and_save(
+            "c", "Resource.type", "a:c", self.parent, self.refinement
+        )
+        # Act
+        result = build_refinements_query(
+            [[category.id]], template_hash=self.template_hash
+        )
+        # Assert
+        self.assertEqual(
+            result["$and"][0]["$or"][0], {"Resource.type": {"$in": ["a:c"]}}
+        )
+        self.assertIsNotNone(
+            category_index.get_index(self.template_hash).get(category.id)
+        )
+
+    @patch.object(category_index, "REFINEMENT_INDEX_CHECK_INTERVAL", 0)
+    @patch.object(refinement_cache, "REFINEMENT_CACHE", None)
+    def test_get_index_without_cache_is_rebuilt_when_categories_change(
+        self,
+    ):
+        """test_get_index_without_cache_is_rebuilt_when_categories_change"""
+        # Arrange
+        index = category_index.get_index(self.template_hash)
+        Category.create_and_save(
+            "c", "Resource.type", "a:c", self.parent, self.refinement
+        )
+        # Act
+        result = category_index.get_index(self.template_hash)
+        # Assert
+        self.assertIsNone(result.version)
+        self.assertEqual(len(result.entries), len(index.entries) + 1)
+
+    def test_get_selection_index_loads_categories_missing_from_index(self):
+        """test_get_selection_index_loads_categories_missing_from_index"""
+        # Arrange
+        category = Category.create_and_save(
+            "c",
+            "Resource.type",
+            "c",
+            None,
+            Refinement.create_and_save("Type", "type", "other_hash"),
+        )
+        # Act
+        result = category_index.get_selection_index(
+            [[category.id]], self.template_hash
+        )
+        # Assert
+        self.assertEqual(result.get(category.id).value, "c")
+
+    def test_get_index_keeps_index_of_each_template_hash(self):
+        """test_get_index_keeps_index_of_each_template_hash"""
+        # Arrange
+        index = category_index.get_index(self.template_hash)
+        category_index.get_index("other_hash")
+        # Act
+        with self.assertNumQueries(0):
+            result = category_index.get_index(self.template_hash)
+        # Assert
+        self.assertIs(result, index)
+
+    @patch.object(category_index, "REFINEMENT_INDEX_SIZE", 1)
+    def test_get_index_drops_least_recently_used_index(self):
+        """test_get_index_drops_least_recently_used_index"""
+        # Arrange
+        index = category_index.get_index(self.template_hash)
+        category_index.get_index("other_hash")
+        # Act
+        result = category_index.get_index(self.template_hash)
+        # Assert
+        self.assertIsNot(result, index)
+
+    def test_index_get_returns_none_for_invalid_id(self):
+        """test_index_get_returns_none_for_invalid_id"""
+        index = category_index.get_index(self.template_hash)
+        self.assertIsNone(index.get("invalid"))
+        self.assertIsNone(index.get(-1))
+
+    def test_get_template_hash_returns_hash_of_most_categories(self):
+        """test_get_template_hash_returns_hash_of_most_categories"""
+        # Arrange
+        category = Category.create_and_save(
+            "c",
+            "Resource.type",
+            "c",
+            None,
+            Refinement.create_and_save("Type", "type", "other_hash"),
+        )
+        # Act
+        result = category_index.get_template_hash(
+            [[self.parent.id, self.child.id], [category.id, "invalid"]]
+        )
+        # Assert
+        self.assertEqual(result, self.template_hash)
+
+    def test_get_template_hash_without_categories_returns_none(self):
+        """test_get_template_hash_without_categories_returns_none"""
+        # Act # Assert
+        with self.assertNumQueries(0):
+            self.assertIsNone(category_index.get_template_hash([[], []]))
+
+    @patch.object(category_api, "get_template_hash_by_ids")
+    def test_get_template_hash_returns_none_on_error(
+        self, mock_get_template_hash_by_ids
+    ):
+        """test_get_template_hash_returns_none_on_error"""
+        # Arrange
+        mock_get_template_hash_by_ids.side_effect = Exception("error")
+        # Act # Assert
+        self.assertIsNone(category_index.get_template_hash([[self.parent.id]]))
+
+    def test_build_refinements_query_with_template_hash_uses_index(self):
+        """test_build_refinements_query_with_template_hash_uses_index"""
+        category_index.get_index(self.template_hash)
+        with self.assertNumQueries(0):
+            result = build_refinements_query(
+                [[self.child.id]], template_hash=self.template_hash
+            )
+        self.assertEqual(
+            result["$and"][0]["$or"][0], {"Resource.type": {"$in": ["a:b"]}}
+        )
+
+    @patch(
+        "core_main_registry_app.components.template.api.get_current_registry_template"
+    )
+    def test_get_refinement_selected_values_from_query_returns_values(
+        self, mock_get_current_registry_template
+    ):
+        """test_get_refinement_selected_values_from_query_returns_values"""
+        mock_get_current_registry_template.return_value.hash = (
+            self.template_hash
+        )
+        query = build_refinements_query([[self.parent.id, self.child.id]])
+        result = get_refinement_selected_values_from_query(query, None)
+        self.assertEqual(
+            result,
+            {
+                self.refinement.slug: {
+                    "Type": [{"id": self.child.id, "value": "a"}]
+                }
+            },
+        )
+
+    def test_get_refinement_selected_values_from_query_returns_empty_dict(
+        self,
+    ):
+        """test_get_refinement_selected_values_from_query_returns_empty_dict"""
+        self.assertEqual(
+            get_refinement_selected_values_from_query({}, None), {}
+        )
@@ -0,0 +1,84 @@
+"""Unit tests for the category tree snapshots"""
+
+from django.test import TestCase
+
+from core_main_registry_app.components.category.models import Category
+from core_main_registry_app.components.refinement.models import Refinement
+from core_main_registry_app.utils.refinement import cache as refinement_cache
+from core_main_registry_app.utils.refinement import category_index
+
+
+class TestCategoryTree(TestCase):
+    """Tests for the category tree snapshots."""
+
+    def setUp(self):
+        """setUp"""
+        self.template_hash = "tree_hash"
+        refinement_cache.invalidate(self.template_hash)
+        category_index.invalidate()
+        self.refinement = Refinement.create_and_save(
+            "Type", "type", self.template_hash
+        )
+        self.root = Category.create_and_save(
+            "a", "Resource.type", "a__category", None, self.refinement
+        )
+        self.child_1 = Category.create_and_save(
+            "b", "Resource.type", "a:b", self.root, self.refinement
+        )
+        self.grandchild = Category.create_and_save(
+            "c", "Resource.type", "a:b:c", self.child_1, self.refinement
+        )
+        self.child_2 = Category.create_and_save(
+            "d", "Resource.type", "a:d", self.root, self.refinement
+        )
+        self.other_root = Category.create_and_save(
+            "e", "Resource.type", "e", None, self.refinement
+        )
+
+    def _get_tree(self):
+        """Get the category tree of the refinement.
+
+        Returns:
+
+        """
+        (tree,) = category_index.get_index(self.template_hash).get_trees()
+        return tree
+
+    def test_get_tree_stores_categories_in_pre_order(self):
+        """test_get_tree_stores_categories_in_pre_order"""
+        # Act
+        result = self._get_tree()
+        # Assert
+        self.assertEqual(
+            list(result.ids),
+            [
+                self.root.id,
+                self.child_1.id,
+                self.grandchild.id,
+                self.child_2.id,
+                self.other_root.id,
+            ],
+        )
+        self.assertEqual(list(result.parents), [-1, 0, 1, 0, -1])
+        self.assertEqual(list(result.depths), [0, 1, 2, 1, 0])
+        self.assertEqual(result.names, ("a", "b", "c", "d", "e"))
+
+    def test_get_tree_returns_children_and_subtrees(self):
+        """test_get_tree_returns_children_and_subtrees"""
+        # Act
+        result = self._get_tree()
+        # Assert
+        self.assertEqual(list(result.get_roots()), [0, 4])
+        self.assertEqual(list(result.get_children(0)), [1, 3])
+        self.assertEqual(
+            list(result.get_subtree_ids(result.get_position(self.child_1.id))),
+            [self.child_1.id, self.grandchild.id],
+        )
+
+    def test_get_tree_is_built_once(self):
+        """test_get_tree_is_built_once"""
+        # Arrange
+        tree_snapshot = self._get_tree()
+        # Act # Assert
+        with self.assertNumQueries(0):
+            self.assertIs(self._get_tree(), tree_snapshot)
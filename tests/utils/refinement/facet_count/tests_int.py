@@ -0,0 +1,236 @@
+"""Integration tests for the facet counts"""
+
+from unittest.mock import patch
+
+import mongomock
+from django.test import override_settings
+
+from core_main_app.components.data import api as data_api
+from core_main_app.utils.integration_tests.integration_base_test_case import (
+    IntegrationBaseTestCase,
+)
+from core_main_app.utils.tests_tools.MockUser import create_mock_user
+
+from core_main_registry_app.components.category.models import Category
+from core_main_registry_app.components.category_bitmap import (
+    api as category_bitmap_api,
+)
+from core_main_registry_app.components.data_facet import (
+    api as data_facet_api,
+)
+from core_main_registry_app.components.refinement.models import Refinement
+from core_main_registry_app.utils.refinement import category_index
+from core_main_registry_app.utils.refinement import facet_count
+from tests.components.data.fixtures.fixtures import DataRegistryFixtures
+
+fixture_data = DataRegistryFixtures()
+
+
+@override_settings(CAN_ANONYMOUS_ACCESS_PUBLIC_DOCUMENT=False)
+class TestGetFacetCounts(IntegrationBaseTestCase):
+    """Test get_facet_counts method."""
+
+    fixture = fixture_data
+
+    def setUp(self):
+        """setUp"""
+        super().setUp()
+        category_index.invalidate()
+        self.fixture.template.hash = "facet_count_hash"
+        self.fixture.template.save()
+        refinement = Refinement.create_and_save(
+            "Role", "role", self.fixture.template.hash
+        )
+        self.category = Category.create_and_save(
+            "Institution",
+            "Resource.role.type",
+            "Organization: Institution",
+            None,
+            refinement,
+        )
+        Category.create_and_save(
+            "Person", "Resource.role.type", "Person", None, refinement
+        )
+        self.user = create_mock_user("1", is_superuser=True)
+
+    def test_get_facet_counts_by_scanning_data(self):
+        """test_get_facet_counts_by_scanning_data"""
+        # Act
+        result = facet_count.get_facet_counts(
+            {}, self.fixture.template.hash, self.user
+        )
+        # Assert
+        self.assertEqual(result, {str(self.category.id): 2})
+
+    @patch(
+        "core_main_registry_app.settings.ENABLE_DATA_FACETS",
+        True,
+    )
+    def test_get_facet_counts_with_data_facet_values(self):
+        """test_get_facet_counts_with_data_facet_values"""
+        # Arrange
+        data_facet_api.upsert_data_facet_values(self.fixture.data_1)
+        # Act: 2 access control queries, then a single GROUP BY
+        with self.assertNumQueries(3):
+            result = facet_count.get_facet_counts(
+                {}, self.fixture.template.hash, self.user
+            )
+        # Assert
+        self.assertEqual(result, {str(self.category.id): 1})
+
+    def _create_folder(self):
+        """Create a folder with two categories matched by the same data.
+
+        Returns:
+            Category
+
+        """
+        refinement = Refinement.create_and_save(
+            "Type", "type", self.fixture.template.hash
+        )
+        folder = Category.create_and_save(
+            "Roles", "Resource.role.type", "Roles__category", None, refinement
+        )
+        for name in ["Institution", "Organization"]:
+            Category.create_and_save(
+                name,
+                "Resource.role.type",
+                "Organization: Institution",
+                folder,
+                refinement,
+            )
+        return folder
+
+    def test_get_facet_counts_counts_data_of_folders_once(self):
+        """test_get_facet_counts_counts_data_of_folders_once"""
+        # Arrange
+        folder = self._create_folder()
+        # Act
+        result = facet_count.get_facet_counts(
+            {}, self.fixture.template.hash, self.user
+        )
+        # Assert
+        self.assertEqual(result[str(folder.id)], 2)
+
+    @patch(
+        "core_main_registry_app.settings.ENABLE_DATA_FACETS",
+        True,
+    )
+    def test_get_facet_counts_with_data_facet_values_counts_data_of_folders_once(
+        self,
+    ):
+        """test_get_facet_counts_with_data_facet_values_counts_data_of_folders_once"""
+        # Arrange
+        folder = self._create_folder()
+        for data in self.fixture.data_collection:
+            data_facet_api.upsert_data_facet_values(data)
+        # Act
+        result = facet_count.get_facet_counts(
+            {}, self.fixture.template.hash, self.user
+        )
+        # Assert
+        self.assertEqual(result[str(folder.id)], 2)
+
+    @patch(
+        "core_main_registry_app.settings.ENABLE_CATEGORY_BITMAPS",
+        True,
+    )
+    def test_get_facet_counts_with_bitmaps_counts_data_of_folders_once(self):
+        """test_get_facet_counts_with_bitmaps_counts_data_of_folders_once"""
+        # Arrange
+        folder = self._create_folder()
+        category_bitmap_api.rebuild_bitmaps(
+            self.fixture.template.hash, self.fixture.data_collection
+        )
+        # Act
+        result = facet_count.get_facet_counts(
+            {}, self.fixture.template.hash, self.user
+        )
+        # Assert
+        self.assertEqual(result[str(folder.id)], 2)
+
+    @patch.object(facet_count, "_count_with_group_by")
+    @patch.object(facet_count, "connections")
+    def test_get_facet_counts_groups_by_values_on_postgresql(
+        self, mock_connections, mock_count_with_group_by
+    ):
+        """test_get_facet_counts_groups_by_values_on_postgresql"""
+        # Arrange
+        mock_connections.__getitem__.return_value.vendor = "postgresql"
+        mock_count_with_group_by.return_value = {self.category.id: 3}
+        # Act
+        result = facet_count.get_facet_counts(
+            {}, self.fixture.template.hash, self.user
+        )
+        # Assert
+        self.assertEqual(result, {str(self.category.id): 3})
+
+    def test_get_facet_counts_returns_empty_dict_without_refinements(self):
+        """test_get_facet_counts_returns_empty_dict_without_refinements"""
+        # Act
+        result = facet_count.get_facet_counts({}, "no_hash", self.user)
+        # Assert
+        self.assertEqual(result, {})
+
+
+@override_settings(CAN_ANONYMOUS_ACCESS_PUBLIC_DOCUMENT=False)
+class TestGetFacetCountsWithAggregation(IntegrationBaseTestCase):
+    """Test get_facet_counts method with a MongoDB aggregation."""
+
+    fixture = fixture_data
+
+    def setUp(self):
+        """setUp"""
+        super().setUp()
+        category_index.invalidate()
+        self.fixture.template.hash = "facet_count_aggregation_hash"
+        self.fixture.template.save()
+        refinement = Refinement.create_and_save(
+            "Role", "role", self.fixture.template.hash
+        )
+        self.folder = Category.create_and_save(
+            "Roles", "Resource.role.type", "Roles__category", None, refinement
+        )
+        self.categories = [
+            Category.create_and_save(
+                name,
+                "Resource.role.type",
+                "Organization: Institution",
+                self.folder,
+                refinement,
+            )
+            for name in ["Institution", "Organization"]
+        ]
+        Category.create_and_save(
+            "Person", "Resource.role.type", "Person", self.folder, refinement
+        )
+        self.collection = mongomock.MongoClient().db.data
+        self.collection.insert_many(
+            [
+                {"_id": data.id, "dict_content": data.dict_content}
+                for data in self.fixture.data_collection
+            ]
+        )
+        self.user = create_mock_user("1", is_superuser=True)
+
+    @override_settings(MONGODB_INDEXING=True)
+    @patch.object(data_api, "execute_json_query")
+    def test_get_facet_counts_with_aggregation_counts_data_of_folders_once(
+        self, mock_execute_json_query
+    ):
+        """test_get_facet_counts_with_aggregation_counts_data_of_folders_once"""
+        # Arrange
+        mock_execute_json_query.return_value = self.collection
+        # Act
+        result = facet_count.get_facet_counts(
+            {}, self.fixture.template.hash, self.user
+        )
+        # Assert
+        self.assertEqual(
+            result,
+            {
+                str(self.folder.id): 2,
+                str(self.categories[0].id): 2,
+                str(self.categories[1].id): 2,
+            },
+        )
@@ -0,0 +1,177 @@
+"""Unit tests for the facet counts"""
+
+from unittest.mock import MagicMock, patch
+
+from django.test import TestCase, override_settings
+
+from core_main_app.components.data.models import Data
+from core_main_registry_app.utils.refinement import category_index
+from core_main_registry_app.utils.refinement import facet_count
+
+
+class TestGetAggregationPipeline(TestCase):
+    """Tests for get_aggregation_pipeline method."""
+
+    def test_get_aggregation_pipeline_groups_data_by_values_of_paths(self):
+        """test_get_aggregation_pipeline_groups_data_by_values_of_paths"""
+        # Arrange
+        index = category_index.CategoryIndex(
+            "hash",
+            None,
+            [
+                category_index.CategoryEntry(1, "a.b", "x", 1, "r", "R"),
+                category_index.CategoryEntry(2, "a.b", "y", 1, "r", "R"),
+                category_index.CategoryEntry(3, "a.c", "z", 2, "s", "S"),
+            ],
+        )
+        # Act
+        pipeline, field_paths = facet_count.get_aggregation_pipeline(index)
+        # Assert
+        self.assertEqual(field_paths, {"p0": "a.b", "p1": "a.c"})
+        self.assertEqual(
+            pipeline,
+            [
+                {
+                    "$group": {
+                        "_id": {
+                            "p0": "$dict_content.a.b",
+                            "p1": "$dict_content.a.c",
+                        },
+                        "count": {"$sum": 1},
+                    }
+                }
+            ],
+        )
+
+    def test_get_scalar_values_traverses_arrays_and_reads_text(self):
+        """test_get_scalar_values_traverses_arrays_and_reads_text"""
+        # Act
+        result = facet_count.get_scalar_values(
+            ["a", ["b", 1], {"#text": "c", "@attr": "d"}, {"e": "f"}, None]
+        )
+        # Assert
+        self.assertEqual(result, ["a", "b", "1", "c"])
+
+
+class TestFacetCountHelpers(TestCase):
+    """Tests for the helpers of the facet counts."""
+
+    def setUp(self):
+        """setUp"""
+        # a__category (a:b, a:c), d
+        self.index = category_index.CategoryIndex(
+            "hash",
+            None,
+            [
+                category_index.CategoryEntry(
+                    1, "a.b", "a__category", 1, "r", "R", True, 1, 1, 6
+                ),
+                category_index.CategoryEntry(
+                    2, "a.b", "a:b", 1, "r", "R", True, 1, 2, 3
+                ),
+                category_index.CategoryEntry(
+                    3, "a.b", "a:c", 1, "r", "R", True, 1, 4, 5
+                ),
+                category_index.CategoryEntry(
+                    4, "a.c", "d", 2, "s", "S", False, 2, 1, 2
+                ),
+            ],
+        )
+
+    def test_count_matches_counts_each_data_once_per_ancestor(self):
+        """test_count_matches_counts_each_data_once_per_ancestor"""
+        # Act
+        result = facet_count.count_matches(
+            [([2, 3], 2), ([2, 2], 1), ([4, 5], 5)], self.index
+        )
+        # Assert
+        self.assertEqual(result, {1: 3, 2: 3, 3: 2, 4: 5})
+
+    def test_get_jsonpath_reads_scalar_values(self):
+        """test_get_jsonpath_reads_scalar_values"""
+        # Act
+        result = facet_count.get_jsonpath("a.b", text=True)
+        # Assert
+        self.assertEqual(
+            result,
+            '$."a"."b"."#text"' + facet_count.JSONPATH_SCALAR_FILTER,
+        )
+
+    def test_get_jsonpath_escapes_keys(self):
+        """test_get_jsonpath_escapes_keys"""
+        # Act
+        result = facet_count.get_jsonpath('a"b')
+        # Assert
+        self.assertTrue(result.startswith('$."a\\"b"[*]'))
+
+    def test_get_group_by_sql_reads_each_field(self):
+        """test_get_group_by_sql_reads_each_field"""
+        # Act
+        sql, params = facet_count.get_group_by_sql(
+            Data.objects.all(), self.index
+        )
+        # Assert
+        self.assertEqual(sql.count("jsonb_path_query"), 3)
+        self.assertEqual(
+            params,
+            (
+                0,
+                facet_count.get_jsonpath("a.b"),
+                0,
+                facet_count.get_jsonpath("a.b", text=True),
+                1,
+                facet_count.get_jsonpath("a.c"),
+            ),
+        )
+
+    @patch.object(facet_count, "get_group_by_sql")
+    @patch.object(facet_count, "connections")
+    def test_count_with_group_by_maps_values_to_categories(
+        self, mock_connections, mock_get_group_by_sql
+    ):
+        """test_count_with_group_by_maps_values_to_categories"""
+        # Arrange
+        mock_get_group_by_sql.return_value = ("sql", ())
+        cursor = mock_connections[
+            "default"
+        ].cursor.return_value.__enter__.return_value
+        cursor.fetchall.return_value = [
+            ([[0, "a:b"], [0, "a:c"]], 2),
+            ([[1, "d"]], 1),
+            ([[1, "e"]], 4),
+            (None, 3),
+        ]
+        # Act
+        result = facet_count._count_with_group_by(
+            Data.objects.all(), self.index
+        )
+        # Assert
+        cursor.execute.assert_called_once_with("sql", ())
+        self.assertEqual(result, {1: 2, 2: 2, 3: 2, 4: 1})
+
+    def test_count_with_group_by_without_paths_returns_empty_counter(self):
+        """test_count_with_group_by_without_paths_returns_empty_counter"""
+        # Act
+        result = facet_count._count_with_group_by(
+            Data.objects.all(), category_index.CategoryIndex("hash", None, [])
+        )
+        # Assert
+        self.assertEqual(result, {})
+
+    @override_settings(MONGODB_INDEXING=True)
+    @patch.object(facet_count.bitmap_index, "get_facet_counts")
+    def test_count_with_bitmaps_reads_ids_of_mongo_data(
+        self, mock_get_facet_counts
+    ):
+        """test_count_with_bitmaps_reads_ids_of_mongo_data"""
+        # Arrange
+        data_list = MagicMock()
+        data_list.order_by.return_value.scalar.return_value = [1, 2]
+        mock_get_facet_counts.return_value = {2: 2, 5: 1}
+        # Act
+        result = facet_count._count_with_bitmaps(data_list, self.index)
+        # Assert
+        data_list.order_by.return_value.scalar.assert_called_once_with(
+            "data_id"
+        )
+        self.assertEqual(result, {2: 2})
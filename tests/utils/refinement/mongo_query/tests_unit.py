@@ -0,0 +1,282 @@
+"""Unit tests for the refinement query building"""
+
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from core_main_registry_app.components.category.models import Category
+from core_main_registry_app.components.refinement.models import Refinement
+from core_main_registry_app.utils.refinement import cache as refinement_cache
+from core_main_registry_app.utils.refinement import category_index
+from core_main_registry_app.utils.refinement.mongo_query import (
+    build_refinements_query,
+    get_prefix_regex,
+    get_refinement_selected_values_from_query,
+)
+
+
+class TestBuildRefinementsQuery(TestCase):
+    """Tests for build_refinements_query method."""
+
+    def setUp(self):
+        """setUp"""
+        refinement_cache.invalidate("hash")
+        category_index.invalidate()
+        self.refinement = Refinement.create_and_save("Type", "type", "hash")
+        self.category_1 = Category.create_and_save(
+            "a", "Resource.type", "a", None, self.refinement
+        )
+        self.category_2 = Category.create_and_save(
+            "b", "Resource.type", "b", None, self.refinement
+        )
+        self.other_refinement = Refinement.create_and_save(
+            "Role", "role", "hash"
+        )
+        self.category_3 = Category.create_and_save(
+            "c", "Resource.role", "c", None, self.other_refinement
+        )
+
+    def test_build_refinements_query_returns_empty_dict_if_no_selection(
+        self,
+    ):
+        """test_build_refinements_query_returns_empty_dict_if_no_selection"""
+        self.assertEqual(build_refinements_query([]), {})
+
+    def test_build_refinements_query_returns_query(self):
+        """test_build_refinements_query_returns_query"""
+        result = build_refinements_query(
+            [
+                [str(self.category_1.id), str(self.category_2.id)],
+                [str(self.category_3.id)],
+            ]
+        )
+        self.assertEqual(
+            result,
+            {
+                "$and": [
+                    {
+                        "$or": [
+                            {"Resource.type": {"$in": ["a", "b"]}},
+                            {"Resource.type.#text": {"$in": ["a", "b"]}},
+                        ]
+                    },
+                    {
+                        "$or": [
+                            {"Resource.role": {"$in": ["c"]}},
+                            {"Resource.role.#text": {"$in": ["c"]}},
+                        ]
+                    },
+                ]
+            },
+        )
+
+    def test_build_refinements_query_reads_only_template_hash_when_cached(
+        self,
+    ):
+        """test_build_refinements_query_reads_only_template_hash_when_cached"""
+        # Arrange
+        refinements = [
+            [self.category_1.id, self.category_2.id],
+            [self.category_3.id],
+        ]
+        expected = build_refinements_query(refinements)
+        # Act: the template hash of the categories, then the cached query
+        with self.assertNumQueries(1):
+            result = build_refinements_query(refinements)
+        # Assert
+        self.assertEqual(result, expected)
+        self.assertEqual(
+            refinement_cache.get_query("hash", refinements), expected
+        )
+
+    def test_build_refinements_query_skips_text_path_without_attributes(
+        self,
+    ):
+        """test_build_refinements_query_skips_text_path_without_attributes"""
+        # Arrange
+        category = Category.create_and_save(
+            "d", "Resource.status", "d", None, self.refinement, False
+        )
+        # Act
+        result = build_refinements_query([[category.id]])
+        # Assert
+        self.assertEqual(
+            result,
+            {"$and": [{"$or": [{"Resource.status": {"$in": ["d"]}}]}]},
+        )
+
+    def test_build_refinements_query_ignores_unknown_categories(self):
+        """test_build_refinements_query_ignores_unknown_categories"""
+        result = build_refinements_query([[-1, "invalid"]])
+        self.assertEqual(result, {})
+
+
+class TestBuildRefinementsQueryCache(TestCase):
+    """Tests for the cache of build_refinements_query method."""
+
+    def setUp(self):
+        """setUp"""
+        self.template_hash = "cache_hash"
+        refinement_cache.invalidate(self.template_hash)
+        category_index.invalidate()
+        self.refinement = Refinement.create_and_save(
+            "Type", "type", self.template_hash
+        )
+        self.category = Category.create_and_save(
+            "a", "Resource.type", "a", None, self.refinement
+        )
+
+    def test_build_refinements_query_uses_cache(self):
+        """test_build_refinements_query_uses_cache"""
+        query = build_refinements_query(
+            [[self.category.id]], template_hash=self.template_hash
+        )
+        with self.assertNumQueries(0):
+            result = build_refinements_query(
+                [[str(self.category.id)]], template_hash=self.template_hash
+            )
+        self.assertEqual(result, query)
+
+    def test_invalidate_clears_cached_queries(self):
+        """test_invalidate_clears_cached_queries"""
+        build_refinements_query(
+            [[self.category.id]], template_hash=self.template_hash
+        )
+        refinement_cache.invalidate(self.template_hash)
+        # count and max id of the categories, then the categories
+        with self.assertNumQueries(2):
+            build_refinements_query(
+                [[self.category.id]], template_hash=self.template_hash
+            )
+
+    def test_normalize_selection_ignores_order_and_empty_refinements(self):
+        """test_normalize_selection_ignores_order_and_empty_refinements"""
+        self.assertEqual(
+            refinement_cache.normalize_selection([[2, 1], [], ["3"]]),
+            refinement_cache.normalize_selection([["3"], ["1", "2", 1]]),
+        )
+
+
+class TestBuildRefinementsQuerySubtrees(TestCase):
+    """Tests for the prefix predicates of build_refinements_query method."""
+
+    def setUp(self):
+        """setUp"""
+        self.template_hash = "subtree_hash"
+        refinement_cache.invalidate(self.template_hash)
+        category_index.invalidate()
+        self.refinement = Refinement.create_and_save(
+            "Type", "type", self.template_hash
+        )
+        self.root = Category.create_and_save(
+            "a", "Resource.type", "a__category", None, self.refinement
+        )
+        self.unspecified = Category.create_and_save(
+            "unspecified a", "Resource.type", "a", self.root, self.refinement
+        )
+        self.parent = Category.create_and_save(
+            "b", "Resource.type", "a:b__category", self.root, self.refinement
+        )
+        self.child_1 = Category.create_and_save(
+            "c", "Resource.type", "a:b:c", self.parent, self.refinement
+        )
+        self.child_2 = Category.create_and_save(
+            "d", "Resource.type", "a:b:d", self.parent, self.refinement
+        )
+
+    def test_build_refinements_query_replaces_selected_tree_by_prefix(self):
+        """test_build_refinements_query_replaces_selected_tree_by_prefix"""
+        # Arrange
+        selection = [
+            self.root.id,
+            self.unspecified.id,
+            self.parent.id,
+            self.child_1.id,
+            self.child_2.id,
+        ]
+        # Act
+        result = build_refinements_query([selection])
+        # Assert
+        self.assertEqual(
+            result,
+            {
+                "$and": [
+                    {
+                        "$or": [
+                            {"Resource.type": {"$regex": "^a(:|$)"}},
+                            {"Resource.type.#text": {"$regex": "^a(:|$)"}},
+                        ]
+                    },
+                ]
+            },
+        )
+
+    def test_build_refinements_query_replaces_selected_subtree_by_prefix(
+        self,
+    ):
+        """test_build_refinements_query_replaces_selected_subtree_by_prefix"""
+        # Arrange
+        selection = [
+            self.unspecified.id,
+            self.child_2.id,
+            self.parent.id,
+            self.child_1.id,
+        ]
+        # Act
+        result = build_refinements_query([selection])
+        # Assert
+        self.assertEqual(
+            result["$and"][0]["$or"],
+            [
+                {"Resource.type": {"$in": ["a"]}},
+                {"Resource.type.#text": {"$in": ["a"]}},
+                {"Resource.type": {"$regex": "^a:b:"}},
+                {"Resource.type.#text": {"$regex": "^a:b:"}},
+            ],
+        )
+
+    def test_build_refinements_query_keeps_values_of_partial_subtree(self):
+        """test_build_refinements_query_keeps_values_of_partial_subtree"""
+        # Act
+        result = build_refinements_query([[self.parent.id, self.child_1.id]])
+        # Assert
+        self.assertEqual(
+            result["$and"][0]["$or"][0],
+            {"Resource.type": {"$in": ["a:b__category", "a:b:c"]}},
+        )
+
+    def test_get_prefix_regex_escapes_prefix(self):
+        """test_get_prefix_regex_escapes_prefix"""
+        # Act
+        result = get_prefix_regex("a.b(c)", False)
+        # Assert
+        self.assertEqual(result, r"^a\.b\(c\):")
+
+    @patch(
+        "core_main_registry_app.components.template.api.get_current_registry_template"
+    )
+    def test_get_refinement_selected_values_from_query_expands_prefix(
+        self, mock_get_current_registry_template
+    ):
+        """test_get_refinement_selected_values_from_query_expands_prefix"""
+        # Arrange
+        mock_get_current_registry_template.return_value.hash = (
+            self.template_hash
+        )
+        query = build_refinements_query(
+            [[self.parent.id, self.child_1.id, self.child_2.id]]
+        )
+        # Act
+        result = get_refinement_selected_values_from_query(query, None)
+        # Assert
+        self.assertEqual(
+            result,
+            {
+                self.refinement.slug: {
+                    "Type": [
+                        {"id": self.child_1.id, "value": "a"},
+                        {"id": self.child_2.id, "value": "a"},
+                    ]
+                }
+            },
+        )
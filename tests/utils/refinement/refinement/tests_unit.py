@@ -0,0 +1,303 @@
+"""Unit tests for the refinements initialization"""
+
+from collections import OrderedDict
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.test import TestCase
+from lxml import etree
+
+from core_main_registry_app.commons.constants import (
+    RefinementGenerationStatus,
+)
+from core_main_registry_app.components.category.models import Category
+from core_main_registry_app.components.refinement import (
+    api as refinement_api,
+)
+from core_main_registry_app.components.refinement.models import Refinement
+from core_main_registry_app.components.refinement_generation import (
+    api as refinement_generation_api,
+)
+from core_main_registry_app.utils.refinement import refinement
+from core_main_registry_app.utils.refinement.tools import tree
+from core_main_registry_app.utils.refinement.tools import xsd_refinements
+
+
+class TestInitRefinements(TestCase):
+    """Tests for the init_refinements function."""
+
+    def _get_trees(self, values):
+        """Get the refinements trees of enumeration values.
+
+        Args:
+            values:
+
+        Returns:
+
+        """
+        enums = [etree.Element("enumeration", value=value) for value in values]
+        return tree.build_tree(
+            OrderedDict(), "type", "Type", enums, "Resource.type"
+        )
+
+    def _init_refinements(self, template_hash, values):
+        """Init the refinements of a template with enumeration values.
+
+        Args:
+            template_hash:
+            values:
+
+        Returns:
+
+        """
+        with patch.object(
+            xsd_refinements, "loads_refinements_trees"
+        ) as mock_loads_refinements_trees:
+            mock_loads_refinements_trees.return_value = self._get_trees(values)
+            refinement.init_refinements(SimpleNamespace(hash=template_hash))
+        return Refinement.get_all_filtered_by_template_hash(
+            template_hash
+        ).get()
+
+    def _get_categories(self, refinement_object):
+        """Get the content of the categories of a refinement.
+
+        Args:
+            refinement_object:
+
+        Returns:
+
+        """
+        return list(
+            Category.objects.filter(refinement=refinement_object).values_list(
+                "name", "value", "parent__name", "lft", "rght", "level"
+            )
+        )
+
+    def test_get_fingerprint_is_stable(self):
+        """test_get_fingerprint_is_stable"""
+        # Arrange
+        trees = [self._get_trees(["a", "a:b", "c"]) for _ in range(2)]
+        # Act
+        result = [
+            refinement.get_fingerprint(*list(trees[i].items())[0])
+            for i in range(2)
+        ]
+        # Assert
+        self.assertEqual(result[0], result[1])
+
+    def test_get_fingerprint_changes_with_values(self):
+        """test_get_fingerprint_changes_with_values"""
+        # Arrange
+        trees = [self._get_trees(["a", "a:b"]), self._get_trees(["a", "a:c"])]
+        # Act
+        result = [
+            refinement.get_fingerprint(*list(trees[i].items())[0])
+            for i in range(2)
+        ]
+        # Assert
+        self.assertNotEqual(result[0], result[1])
+
+    @patch.object(
+        refinement, "create_categories", wraps=refinement.create_categories
+    )
+    def test_init_refinements_shares_unchanged_refinement(
+        self, mock_create_categories
+    ):
+        """test_init_refinements_shares_unchanged_refinement"""
+        # Arrange
+        source = self._init_refinements("hash_1", ["a", "a:b", "c"])
+        category_count = Category.objects.count()
+        # Act
+        result = self._init_refinements("hash_2", ["a", "a:b", "c"])
+        # Assert
+        self.assertEqual(mock_create_categories.call_count, 1)
+        self.assertEqual(result, source)
+        self.assertEqual(Category.objects.count(), category_count)
+        self.assertEqual(
+            refinement_api.get_by_template_hash_and_by_slug(
+                "hash_2", source.slug
+            ),
+            source,
+        )
+
+    @patch.object(
+        refinement, "create_categories", wraps=refinement.create_categories
+    )
+    def test_init_refinements_builds_changed_refinement(
+        self, mock_create_categories
+    ):
+        """test_init_refinements_builds_changed_refinement"""
+        # Arrange
+        source = self._init_refinements("hash_1", ["a", "a:b"])
+        # Act
+        result = self._init_refinements("hash_2", ["a", "a:c"])
+        # Assert
+        self.assertEqual(mock_create_categories.call_count, 2)
+        self.assertNotEqual(result.fingerprint, source.fingerprint)
+        self.assertIn(("c", "a:c", "a", 2, 3, 1), self._get_categories(result))
+
+    def test_init_refinements_rebuild_replaces_refinements(self):
+        """test_init_refinements_rebuild_replaces_refinements"""
+        # Arrange
+        source = self._init_refinements("hash_1", ["a", "a:b"])
+        # Act
+        with patch.object(
+            xsd_refinements, "loads_refinements_trees"
+        ) as mock_loads_refinements_trees:
+            mock_loads_refinements_trees.return_value = self._get_trees(
+                ["a", "a:c"]
+            )
+            refinement.init_refinements(
+                SimpleNamespace(hash="hash_1"), rebuild=True
+            )
+        # Assert
+        result = Refinement.get_all_filtered_by_template_hash("hash_1").get()
+        self.assertNotEqual(result, source)
+        self.assertFalse(Refinement.objects.filter(pk=source.pk).exists())
+        self.assertIn(("c", "a:c", "a", 2, 3, 1), self._get_categories(result))
+
+    def test_init_refinements_rebuild_keeps_shared_refinements(self):
+        """test_init_refinements_rebuild_keeps_shared_refinements"""
+        # Arrange
+        source = self._init_refinements("hash_1", ["a", "a:b"])
+        self._init_refinements("hash_2", ["a", "a:b"])
+        # Act
+        with patch.object(
+            xsd_refinements, "loads_refinements_trees"
+        ) as mock_loads_refinements_trees:
+            mock_loads_refinements_trees.return_value = self._get_trees(
+                ["a", "a:c"]
+            )
+            refinement.init_refinements(
+                SimpleNamespace(hash="hash_1"), rebuild=True
+            )
+        # Assert
+        self.assertEqual(
+            Refinement.get_all_filtered_by_template_hash("hash_2").get(),
+            source,
+        )
+        self.assertNotEqual(
+            Refinement.get_all_filtered_by_template_hash("hash_1").get(),
+            source,
+        )
+
+    def test_init_refinements_rebuild_does_not_share_refinements(self):
+        """test_init_refinements_rebuild_does_not_share_refinements"""
+        # Arrange
+        source = self._init_refinements("hash_1", ["a", "a:b"])
+        self._init_refinements("hash_2", ["a", "a:b"])
+        # Act
+        with patch.object(
+            xsd_refinements, "loads_refinements_trees"
+        ) as mock_loads_refinements_trees:
+            mock_loads_refinements_trees.return_value = self._get_trees(
+                ["a", "a:b"]
+            )
+            refinement.init_refinements(
+                SimpleNamespace(hash="hash_1"), rebuild=True
+            )
+        # Assert
+        result = Refinement.get_all_filtered_by_template_hash("hash_1").get()
+        self.assertNotEqual(result, source)
+        self.assertEqual(result.fingerprint, source.fingerprint)
+        self.assertEqual(
+            Refinement.get_all_filtered_by_template_hash("hash_2").get(),
+            source,
+        )
+
+    def test_init_refinements_records_stage_timings(self):
+        """test_init_refinements_records_stage_timings"""
+        # Arrange
+        timings = {}
+        # Act
+        with patch.object(
+            xsd_refinements, "loads_refinements_trees"
+        ) as mock_loads_refinements_trees:
+            mock_loads_refinements_trees.return_value = self._get_trees(["a"])
+            refinement.init_refinements(
+                SimpleNamespace(hash="hash_1"), timings=timings
+            )
+        # Assert
+        self.assertIn(refinement.DB_WRITE_STAGE, timings)
+        self.assertIs(
+            mock_loads_refinements_trees.call_args.kwargs["timings"], timings
+        )
+
+    def test_verify_refinements_detects_stale_refinements(self):
+        """test_verify_refinements_detects_stale_refinements"""
+        # Arrange
+        self._init_refinements("hash_1", ["a", "a:b"])
+        template = SimpleNamespace(hash="hash_1")
+        # Act
+        with patch.object(
+            xsd_refinements, "loads_refinements_trees"
+        ) as mock_loads_refinements_trees:
+            mock_loads_refinements_trees.return_value = self._get_trees(
+                ["a", "a:b"]
+            )
+            up_to_date = refinement.verify_refinements(template)
+            mock_loads_refinements_trees.return_value = self._get_trees(
+                ["a", "a:c"]
+            )
+            stale = refinement.verify_refinements(template)
+        # Assert
+        self.assertTrue(up_to_date)
+        self.assertFalse(stale)
+
+    @patch.object(xsd_refinements, "loads_refinements_trees")
+    def test_init_refinements_skips_running_generation(
+        self, mock_loads_refinements_trees
+    ):
+        """test_init_refinements_skips_running_generation"""
+        # Arrange
+        refinement_generation_api.start("hash_1", "task_1")
+        # Act
+        refinement.init_refinements(SimpleNamespace(hash="hash_1"), "task_2")
+        # Assert
+        mock_loads_refinements_trees.assert_not_called()
+        self.assertEqual(
+            refinement_generation_api.get_by_template_hash("hash_1").task_id,
+            "task_1",
+        )
+
+    def test_init_refinements_reports_progress_and_finishes(self):
+        """test_init_refinements_reports_progress_and_finishes"""
+        # Arrange
+        progress = []
+        # Act
+        with patch.object(
+            xsd_refinements, "loads_refinements_trees"
+        ) as mock_loads_refinements_trees:
+            mock_loads_refinements_trees.return_value = self._get_trees(["a"])
+            refinement.init_refinements(
+                SimpleNamespace(hash="hash_1"),
+                progress=lambda current, total: progress.append(
+                    (current, total)
+                ),
+            )
+        # Assert
+        self.assertEqual(progress, [(0, 1), (1, 1)])
+        self.assertEqual(
+            refinement_generation_api.get_by_template_hash("hash_1").status,
+            RefinementGenerationStatus.DONE,
+        )
+
+    @patch.object(refinement, "create_categories")
+    def test_init_refinements_failure_rolls_back_and_marks_failed(
+        self, mock_create_categories
+    ):
+        """test_init_refinements_failure_rolls_back_and_marks_failed"""
+        # Arrange
+        mock_create_categories.side_effect = ValueError("error")
+        # Act
+        with self.assertRaises(Exception):
+            self._init_refinements("hash_1", ["a"])
+        # Assert
+        self.assertFalse(
+            Refinement.get_all_filtered_by_template_hash("hash_1").exists()
+        )
+        self.assertEqual(
+            refinement_generation_api.get_by_template_hash("hash_1").status,
+            RefinementGenerationStatus.FAILED,
+        )
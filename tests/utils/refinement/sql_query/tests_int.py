@@ -0,0 +1,61 @@
+"""Integration tests for the SQL refinement query building"""
+
+from core_main_app.components.data.models import Data
+from core_main_app.utils.integration_tests.integration_base_test_case import (
+    IntegrationBaseTestCase,
+)
+
+from core_main_registry_app.components.category.models import Category
+from core_main_registry_app.components.refinement.models import Refinement
+from core_main_registry_app.utils.refinement import sql_query
+from tests.components.data.fixtures.fixtures import DataRegistryFixtures
+
+fixture_data = DataRegistryFixtures()
+
+
+class TestSqlBuildRefinementsQuery(IntegrationBaseTestCase):
+    """Test build_refinements_query method of the SQL translator."""
+
+    fixture = fixture_data
+
+    def setUp(self):
+        """setUp"""
+        super().setUp()
+        refinement = Refinement.create_and_save("Role", "role", "hash")
+        self.category = Category.create_and_save(
+            "Institution",
+            "Resource.role.type",
+            "Organization: Institution",
+            None,
+            refinement,
+        )
+        self.other_category = Category.create_and_save(
+            "Person", "Resource.role.type", "Person", None, refinement
+        )
+
+    def test_build_refinements_query_filters_data(self):
+        """test_build_refinements_query_filters_data"""
+        # Act
+        result = Data.objects.filter(
+            sql_query.build_refinements_query([[self.category.id]])
+        )
+        # Assert
+        self.assertEqual(result.count(), 2)
+
+    def test_build_refinements_query_ands_refinements(self):
+        """test_build_refinements_query_ands_refinements"""
+        # Act
+        result = Data.objects.filter(
+            sql_query.build_refinements_query(
+                [[self.category.id], [self.other_category.id]]
+            )
+        )
+        # Assert
+        self.assertEqual(result.count(), 0)
+
+    def test_build_refinements_query_returns_empty_query(self):
+        """test_build_refinements_query_returns_empty_query"""
+        # Act
+        result = sql_query.build_refinements_query([[-1]])
+        # Assert
+        self.assertEqual(len(result), 0)
@@ -0,0 +1,126 @@
+"""Unit tests for the SQL refinement query"""
+
+from unittest.mock import patch
+
+from django.db.models import Q
+from django.test import TestCase
+
+from core_main_registry_app.components.category.models import Category
+from core_main_registry_app.components.refinement.models import Refinement
+from core_main_registry_app.utils.refinement import category_index
+from core_main_registry_app.utils.refinement import sql_query
+
+
+class TestSqlQueryPathIndexes(TestCase):
+    """Tests for the path indexes of the SQL translator."""
+
+    def test_get_indexed_paths_adds_text_twin(self):
+        """test_get_indexed_paths_adds_text_twin"""
+        self.assertEqual(
+            sql_query.get_indexed_paths(["a.b", "a.b", "c"]),
+            ["a.b", "a.b.#text", "c", "c.#text"],
+        )
+
+    def test_get_indexed_paths_adds_text_twin_of_text_paths_only(self):
+        """test_get_indexed_paths_adds_text_twin_of_text_paths_only"""
+        self.assertEqual(
+            sql_query.get_indexed_paths(["a.b", "c"], {"c"}),
+            ["a.b", "c", "c.#text"],
+        )
+
+    def test_get_create_path_index_sql_returns_expression_index(self):
+        """test_get_create_path_index_sql_returns_expression_index"""
+        result = sql_query.get_create_path_index_sql("Resource.role.#text")
+        self.assertIn(
+            """#> '{"Resource","role","#text"}'::text[]""",
+            result,
+        )
+        self.assertIn(
+            sql_query.get_path_index_name("Resource.role.#text"), result
+        )
+
+    def test_get_path_index_name_is_short_enough(self):
+        """test_get_path_index_name_is_short_enough"""
+        self.assertLessEqual(len(sql_query.get_path_index_name("a" * 255)), 63)
+
+    @patch.object(sql_query, "_uses_postgresql")
+    def test_create_path_indexes_creates_index_of_each_path(
+        self, mock_uses_postgresql
+    ):
+        """test_create_path_indexes_creates_index_of_each_path"""
+        # Arrange
+        mock_uses_postgresql.return_value = True
+        # Act
+        with patch.object(sql_query.connection, "cursor") as mock_cursor:
+            sql_query.create_path_indexes(["a.b"], set())
+        # Assert
+        mock_cursor.return_value.__enter__.return_value.execute.assert_called_once_with(
+            sql_query.get_create_path_index_sql("a.b")
+        )
+
+    def test_create_path_indexes_does_nothing_without_postgresql(self):
+        """test_create_path_indexes_does_nothing_without_postgresql"""
+        # Act
+        with patch.object(sql_query.connection, "cursor") as mock_cursor:
+            sql_query.create_path_indexes(["a.b"])
+        # Assert
+        mock_cursor.assert_not_called()
+
+
+class TestSqlBuildRefinementsQuery(TestCase):
+    """Tests for the build_refinements_query method of the SQL translator."""
+
+    def test_build_refinements_query_skips_text_path_without_attributes(
+        self,
+    ):
+        """test_build_refinements_query_skips_text_path_without_attributes"""
+        # Arrange
+        refinement = Refinement.create_and_save("Type", "type", "hash")
+        category = Category.create_and_save(
+            "a", "Resource.type", "a", None, refinement, False
+        )
+        # Act
+        result = sql_query.build_refinements_query([[category.id]])
+        # Assert
+        self.assertEqual(
+            result, sql_query.get_path_query("Resource.type", ["a"])
+        )
+
+    @patch.object(category_index, "get_selected_values_by_path")
+    def test_build_refinements_query_returns_empty_query_on_error(
+        self, mock_get_selected_values_by_path
+    ):
+        """test_build_refinements_query_returns_empty_query_on_error"""
+        # Arrange
+        mock_get_selected_values_by_path.side_effect = Exception("error")
+        # Act
+        result = sql_query.build_refinements_query([[1]])
+        # Assert
+        self.assertEqual(result, Q())
+
+
+class TestSqlGetPathQuery(TestCase):
+    """Tests for the get_path_query method of the SQL translator."""
+
+    @patch.object(sql_query, "_uses_postgresql")
+    def test_get_path_query_on_postgresql_matches_any_key(
+        self, mock_uses_postgresql
+    ):
+        """test_get_path_query_on_postgresql_matches_any_key"""
+        # Arrange
+        mock_uses_postgresql.return_value = True
+        # Act
+        result = sql_query.get_path_query("Resource.type", ["a", "b"])
+        # Assert
+        self.assertEqual(
+            result, Q(dict_content__Resource__type__has_any_keys=["a", "b"])
+        )
+
+    def test_get_path_query_matches_values(self):
+        """test_get_path_query_matches_values"""
+        # Act
+        result = sql_query.get_path_query("Resource.type", ["a", "b"])
+        # Assert
+        self.assertEqual(
+            result, Q(dict_content__Resource__type__in=["a", "b"])
+        )
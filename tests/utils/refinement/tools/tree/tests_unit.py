@@ -0,0 +1,73 @@
+"""Unit tests for the refinement trees"""
+
+from django.test import TestCase
+from lxml import etree
+
+from core_main_registry_app.utils.refinement.tools import tree
+
+
+class TestBuildTree(TestCase):
+    """Tests for the build_tree function."""
+
+    def _get_titles(self, values):
+        """Build the tree of enumeration values and get its titles.
+
+        Args:
+            values:
+
+        Returns:
+
+        """
+        enums = [etree.Element("enumeration", value=value) for value in values]
+        result = tree.build_tree({}, "type", "Type", enums, "Resource.type")
+        return _get_tree_titles(result)
+
+    def test_build_tree_adds_unspecified_node_to_extended_value(self):
+        """test_build_tree_adds_unspecified_node_to_extended_value"""
+        # Act
+        result = self._get_titles(["a", "a:b"])
+        # Assert
+        self.assertEqual(
+            result, [("Type", [("a", [("unspecified a", []), ("b", [])])])]
+        )
+
+    def test_build_tree_does_not_add_unspecified_node_to_leaves(self):
+        """test_build_tree_does_not_add_unspecified_node_to_leaves"""
+        # Act
+        result = self._get_titles(["a:b", "a:c"])
+        # Assert
+        self.assertEqual(result, [("Type", [("a", [("b", []), ("c", [])])])])
+
+    def test_build_tree_compares_level_at_same_position(self):
+        """test_build_tree_compares_level_at_same_position"""
+        # Act
+        result = self._get_titles(["a:b", "c:b:d", "b"])
+        # Assert
+        self.assertEqual(
+            result,
+            [
+                (
+                    "Type",
+                    [
+                        ("a", [("b", [("unspecified b", [])])]),
+                        ("c", [("b", [("d", [])])]),
+                        ("b", []),
+                    ],
+                )
+            ],
+        )
+
+
+def _get_tree_titles(refinement_tree):
+    """Get the titles of a refinement tree.
+
+    Args:
+        refinement_tree:
+
+    Returns:
+
+    """
+    return [
+        (key.title, _get_tree_titles(children))
+        for key, children in refinement_tree.items()
+    ]
@@ -0,0 +1,400 @@
+"""Unit tests for the refinements extraction from a schema"""
+
+from os.path import dirname, join, realpath
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.test import TestCase
+from xml_utils.commons.constants import LXML_SCHEMA_NAMESPACE
+from xml_utils.xsd_tree.xsd_tree import XSDTree
+
+from core_main_registry_app.utils.refinement.tools import xsd_refinements
+
+
+class TestSchemaIndex(TestCase):
+    """Tests for the SchemaIndex class."""
+
+    def setUp(self):
+        """setUp"""
+        self.schema_index = xsd_refinements.SchemaIndex(
+            XSDTree.build_tree(
+                '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">'
+                '<xs:simpleType name="Status"><xs:restriction '
+                'base="xs:string"/></xs:simpleType>'
+                '<xs:complexType name="Typed"><xs:simpleContent>'
+                '<xs:extension base="Status"/>'
+                "</xs:simpleContent></xs:complexType>"
+                '<xs:element name="a"><xs:complexType><xs:sequence>'
+                '<xs:element name="b" type="Status"/>'
+                '<xs:element name="c"><xs:simpleType><xs:restriction '
+                'base="xs:string"/></xs:simpleType></xs:element>'
+                "</xs:sequence></xs:complexType></xs:element>"
+                '<xs:element name="d" type="Status"/>'
+                "</xs:schema>"
+            )
+        )
+
+    def test_get_elements_by_type_returns_elements_in_document_order(self):
+        """test_get_elements_by_type_returns_elements_in_document_order"""
+        # Act
+        result = self.schema_index.get_elements_by_type("Status")
+        # Assert
+        self.assertEqual(
+            [element.attrib["name"] for element in result], ["b", "d"]
+        )
+
+    def test_get_elements_by_type_returns_empty_list(self):
+        """test_get_elements_by_type_returns_empty_list"""
+        self.assertEqual(self.schema_index.get_elements_by_type("Typed"), [])
+
+    def test_get_extensions_by_base_returns_extensions(self):
+        """test_get_extensions_by_base_returns_extensions"""
+        # Act
+        result = self.schema_index.get_extensions_by_base("Status")
+        # Assert
+        self.assertEqual(len(result), 1)
+        self.assertEqual(
+            result[0].getparent().getparent().attrib["name"], "Typed"
+        )
+
+    def test_get_simple_type_returns_global_simple_types_only(self):
+        """test_get_simple_type_returns_global_simple_types_only"""
+        self.assertIsNotNone(self.schema_index.get_simple_type("Status"))
+        self.assertEqual(len(self.schema_index.simple_types_by_name), 1)
+
+
+class TestLoadsRefinementsTrees(TestCase):
+    """Tests for the loads_refinements_trees function."""
+
+    def setUp(self):
+        """setUp"""
+        with open(
+            join(
+                dirname(realpath(__file__)),
+                "..",
+                "..",
+                "..",
+                "..",
+                "components",
+                "data",
+                "fixtures",
+                "data",
+                "res-md.xsd",
+            ),
+            encoding="utf-8",
+        ) as xsd_file:
+            self.template = SimpleNamespace(hash=None, content=xsd_file.read())
+
+    def test_loads_refinements_trees_records_stage_timings(self):
+        """test_loads_refinements_trees_records_stage_timings"""
+        # Arrange
+        timings = {}
+        # Act
+        xsd_refinements.loads_refinements_trees(self.template, timings=timings)
+        # Assert
+        self.assertEqual(
+            list(timings),
+            [
+                xsd_refinements.FLATTEN_STAGE,
+                xsd_refinements.PARSE_STAGE,
+                xsd_refinements.EXTRACT_STAGE,
+                xsd_refinements.TREE_BUILD_STAGE,
+            ],
+        )
+
+    def test_loads_refinements_trees_in_parallel_returns_same_trees(self):
+        """test_loads_refinements_trees_in_parallel_returns_same_trees"""
+        # Arrange
+        expected = xsd_refinements.loads_refinements_trees(
+            self.template, workers=0
+        )
+        # Act
+        result = xsd_refinements.loads_refinements_trees(
+            self.template, workers=2
+        )
+        # Assert
+        self.assertTrue(len(result) > 0)
+        self.assertEqual(
+            _get_tree_content(result), _get_tree_content(expected)
+        )
+
+    def test_loads_refinements_trees_streaming_returns_same_trees(self):
+        """test_loads_refinements_trees_streaming_returns_same_trees"""
+        # Arrange
+        expected = xsd_refinements.loads_refinements_trees(
+            self.template, workers=0, streaming=False
+        )
+        # Act
+        result = xsd_refinements.loads_refinements_trees(
+            self.template, workers=0, streaming=True
+        )
+        # Assert
+        self.assertTrue(len(result) > 0)
+        self.assertEqual(
+            _get_tree_content(result), _get_tree_content(expected)
+        )
+
+    def test_load_schema_streaming_drops_unused_subtrees(self):
+        """test_load_schema_streaming_drops_unused_subtrees"""
+        # Act
+        xml_doc_tree, schema_index, target_ns_prefix = (
+            xsd_refinements._load_schema(
+                '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema" '
+                'xmlns:t="urn:t" targetNamespace="urn:t">'
+                '<xs:element name="a" type="t:A"><xs:annotation>'
+                "<xs:documentation>text</xs:documentation>"
+                "</xs:annotation></xs:element>"
+                '<xs:complexType name="A"><xs:simpleContent>'
+                '<xs:extension base="t:B">'
+                '<xs:attribute name="lang" type="xs:string"/>'
+                "</xs:extension></xs:simpleContent></xs:complexType>"
+                '<xs:simpleType name="B"><xs:restriction base="xs:string"/>'
+                "</xs:simpleType></xs:schema>",
+                streaming=True,
+            )
+        )
+        # Assert
+        self.assertEqual(target_ns_prefix, "t:")
+        self.assertEqual(
+            [node.tag.split("}")[1] for node in xml_doc_tree.iter()],
+            [
+                "schema",
+                "element",
+                "complexType",
+                "simpleContent",
+                "extension",
+                "attribute",
+                "simpleType",
+            ],
+        )
+        self.assertEqual(
+            schema_index.get_elements_by_type("t:A")[0].attrib["name"], "a"
+        )
+        self.assertEqual(len(schema_index.get_extensions_by_base("t:B")), 1)
+        self.assertIsNotNone(schema_index.get_simple_type("B"))
+        self.assertIsNotNone(schema_index.get_complex_type("A"))
+
+    @patch.object(xsd_refinements, "FEED_SIZE", 16)
+    def test_load_schema_streaming_keeps_app_info_and_enumerations(self):
+        """test_load_schema_streaming_keeps_app_info_and_enumerations"""
+        # Act
+        xml_doc_tree, schema_index, target_ns_prefix = (
+            xsd_refinements._load_schema(
+                '<?xml version="1.0" encoding="UTF-8"?>'
+                '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">'
+                '<xs:element name="a" type="B"><xs:annotation><xs:appinfo>'
+                "<label>Label é</label></xs:appinfo></xs:annotation>"
+                "</xs:element>"
+                '<xs:simpleType name="B"><xs:restriction base="xs:string">'
+                '<xs:enumeration value="x"/></xs:restriction></xs:simpleType>'
+                "</xs:schema>",
+                streaming=True,
+            )
+        )
+        # Assert
+        element = schema_index.get_elements_by_type("B")[0]
+        self.assertEqual(
+            xsd_refinements._get_element_info(
+                element, schema_index, target_ns_prefix
+            ),
+            ("", "Label é"),
+        )
+        self.assertEqual(
+            len(
+                xsd_refinements._get_enumerations(
+                    schema_index.get_simple_type("B")
+                )
+            ),
+            1,
+        )
+
+    @patch.object(xsd_refinements, "ProcessPoolExecutor")
+    def test_loads_refinements_trees_falls_back_to_current_process(
+        self, mock_process_pool_executor
+    ):
+        """test_loads_refinements_trees_falls_back_to_current_process"""
+        # Arrange
+        mock_process_pool_executor.side_effect = AssertionError(
+            "daemonic processes are not allowed to have children"
+        )
+        expected = xsd_refinements.loads_refinements_trees(
+            self.template, workers=0
+        )
+        # Act
+        result = xsd_refinements.loads_refinements_trees(
+            self.template, workers=2
+        )
+        # Assert
+        self.assertTrue(mock_process_pool_executor.called)
+        self.assertEqual(
+            _get_tree_content(result), _get_tree_content(expected)
+        )
+
+
+def _get_tree_content(refinement_tree):
+    """Get the content of a refinement tree.
+
+    Args:
+        refinement_tree:
+
+    Returns:
+
+    """
+    return [
+        (
+            key.title,
+            key.path,
+            key.value,
+            key.has_attributes,
+            _get_tree_content(children),
+        )
+        for key, children in refinement_tree.items()
+    ]
+
+
+class TestCanHaveAttributes(TestCase):
+    """Tests for _can_have_attributes method."""
+
+    def setUp(self):
+        """setUp"""
+        self.xml_doc_tree = XSDTree.build_tree(
+            '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">'
+            '<xs:simpleType name="Status"><xs:restriction base="xs:string">'
+            '<xs:enumeration value="a"/></xs:restriction></xs:simpleType>'
+            '<xs:complexType name="Typed"><xs:simpleContent>'
+            '<xs:extension base="Status">'
+            '<xs:attribute name="lang" type="xs:string"/>'
+            "</xs:extension></xs:simpleContent></xs:complexType>"
+            '<xs:element name="status" type="Status"/>'
+            '<xs:element name="typed" type="Typed"/>'
+            '<xs:element name="text" type="xs:string"/>'
+            "</xs:schema>"
+        )
+        self.schema_index = xsd_refinements.SchemaIndex(self.xml_doc_tree)
+
+    def _get_element(self, name):
+        """Get a global element of the schema by name."""
+        return self.xml_doc_tree.find(
+            "./{0}element[@name='{1}']".format(LXML_SCHEMA_NAMESPACE, name)
+        )
+
+    def test_can_have_attributes_returns_false_for_simple_type(self):
+        """test_can_have_attributes_returns_false_for_simple_type"""
+        self.assertFalse(
+            xsd_refinements._can_have_attributes(
+                self._get_element("status"), self.schema_index, ""
+            )
+        )
+
+    def test_can_have_attributes_returns_false_for_builtin_type(self):
+        """test_can_have_attributes_returns_false_for_builtin_type"""
+        self.assertFalse(
+            xsd_refinements._can_have_attributes(
+                self._get_element("text"), self.schema_index, ""
+            )
+        )
+
+    def test_can_have_attributes_returns_true_for_complex_type(self):
+        """test_can_have_attributes_returns_true_for_complex_type"""
+        self.assertTrue(
+            xsd_refinements._can_have_attributes(
+                self._get_element("typed"), self.schema_index, ""
+            )
+        )
+
+    def test_can_have_attributes_returns_false_for_complex_type_without_attributes(
+        self,
+    ):
+        """test_can_have_attributes_returns_false_for_complex_type_without_attributes"""
+        # Arrange
+        xml_doc_tree = XSDTree.build_tree(
+            '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">'
+            '<xs:element name="untyped"><xs:complexType><xs:simpleContent>'
+            '<xs:extension base="xs:string"/>'
+            "</xs:simpleContent></xs:complexType></xs:element>"
+            "</xs:schema>"
+        )
+        # Act # Assert
+        self.assertFalse(
+            xsd_refinements._can_have_attributes(
+                xml_doc_tree.find(
+                    "./{0}element".format(LXML_SCHEMA_NAMESPACE)
+                ),
+                xsd_refinements.SchemaIndex(xml_doc_tree),
+                "",
+            )
+        )
+
+    def test_get_elements_by_simple_type_returns_simple_content_elements(
+        self,
+    ):
+        """test_get_elements_by_simple_type_returns_simple_content_elements"""
+        # Arrange
+        xml_doc_tree = XSDTree.build_tree(
+            '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">'
+            '<xs:simpleType name="Status"><xs:restriction base="xs:string">'
+            '<xs:enumeration value="a"/></xs:restriction></xs:simpleType>'
+            '<xs:complexType name="Other"><xs:complexContent>'
+            '<xs:extension base="Status"/>'
+            "</xs:complexContent></xs:complexType>"
+            '<xs:element name="inline"><xs:complexType><xs:simpleContent>'
+            '<xs:extension base="Status"><xs:anyAttribute/></xs:extension>'
+            "</xs:simpleContent></xs:complexType></xs:element>"
+            '<xs:element name="any"/>'
+            '<xs:element name="restricted"><xs:simpleType>'
+            '<xs:restriction base="Status"/></xs:simpleType></xs:element>'
+            "</xs:schema>"
+        )
+        schema_index = xsd_refinements.SchemaIndex(xml_doc_tree)
+        # Act
+        result = xsd_refinements._get_elements_by_simple_type(
+            xsd_refinements._get_simple_types(xml_doc_tree)[0],
+            schema_index,
+            "",
+        )
+        # Assert
+        self.assertEqual(
+            [element.attrib["name"] for element in result], ["inline"]
+        )
+        self.assertEqual(
+            [
+                xsd_refinements._can_have_attributes(element, schema_index, "")
+                for element in xml_doc_tree.findall(
+                    "./{0}element".format(LXML_SCHEMA_NAMESPACE)
+                )
+            ],
+            [True, True, False],
+        )
+
+    def test_get_simple_type_info_of_simple_content_has_attributes(self):
+        """test_get_simple_type_info_of_simple_content_has_attributes"""
+        for streaming in (False, True):
+            with self.subTest(streaming=streaming):
+                # Arrange
+                xml_doc_tree, schema_index, target_ns_prefix = (
+                    xsd_refinements._load_schema(
+                        '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">'
+                        '<xs:simpleType name="Status">'
+                        '<xs:restriction base="xs:string">'
+                        '<xs:enumeration value="a"/></xs:restriction>'
+                        "</xs:simpleType>"
+                        '<xs:complexType name="Typed"><xs:simpleContent>'
+                        '<xs:extension base="Status">'
+                        '<xs:attribute name="lang" type="xs:string"/>'
+                        "</xs:extension></xs:simpleContent></xs:complexType>"
+                        '<xs:complexType name="ResourceType"><xs:sequence>'
+                        '<xs:element name="typed" type="Typed"/>'
+                        "</xs:sequence></xs:complexType>"
+                        '<xs:element name="Resource" type="ResourceType"/>'
+                        "</xs:schema>",
+                        streaming=streaming,
+                    )
+                )
+                # Act
+                result = xsd_refinements._get_simple_type_info(
+                    xsd_refinements._get_simple_types(xml_doc_tree)[0],
+                    schema_index,
+                    target_ns_prefix,
+                )
+                # Assert
+                self.assertEqual(result[2:], ("Resource.typed", True))
@@ -0,0 +1,317 @@
+"""Unit tests for the refinement signals"""
+
+from unittest.mock import patch, MagicMock, call
+
+from django.test import SimpleTestCase
+
+from core_main_app.components.data.models import Data
+from core_main_app.components.template.models import Template
+from core_main_registry_app.utils.refinement import watch
+
+
+class TestInit(SimpleTestCase):
+    """Test Init"""
+
+    @patch("core_main_registry_app.utils.refinement.watch.post_delete")
+    @patch("core_main_registry_app.utils.refinement.watch.post_save")
+    @patch(
+        "core_main_registry_app.utils.refinement.watch.ENABLE_CATEGORY_BITMAPS",
+        False,
+    )
+    @patch(
+        "core_main_registry_app.utils.refinement.watch.ENABLE_DATA_FACETS",
+        False,
+    )
+    def test_init_connects_template_only(
+        self, mock_post_save, mock_post_delete
+    ):
+        """test_init_connects_template_only"""
+        # Act
+        watch.init()
+        # Assert
+        mock_post_save.connect.assert_called_once_with(
+            watch.post_save_template, sender=Template
+        )
+        mock_post_delete.connect.assert_not_called()
+
+    @patch("core_main_registry_app.utils.refinement.watch.post_delete")
+    @patch("core_main_registry_app.utils.refinement.watch.post_save")
+    @patch(
+        "core_main_registry_app.utils.refinement.watch.ENABLE_CATEGORY_BITMAPS",
+        False,
+    )
+    @patch(
+        "core_main_registry_app.utils.refinement.watch.ENABLE_DATA_FACETS",
+        True,
+    )
+    def test_init_with_data_facets_connects_data(
+        self, mock_post_save, mock_post_delete
+    ):
+        """test_init_with_data_facets_connects_data"""
+        # Act
+        watch.init()
+        # Assert
+        self.assertEqual(
+            mock_post_save.connect.call_args_list,
+            [
+                call(watch.post_save_template, sender=Template),
+                call(watch.post_save_data, sender=Data),
+            ],
+        )
+        mock_post_delete.connect.assert_not_called()
+
+    @patch("core_main_registry_app.utils.refinement.watch.post_delete")
+    @patch("core_main_registry_app.utils.refinement.watch.post_save")
+    @patch(
+        "core_main_registry_app.utils.refinement.watch.ENABLE_CATEGORY_BITMAPS",
+        True,
+    )
+    @patch(
+        "core_main_registry_app.utils.refinement.watch.ENABLE_DATA_FACETS",
+        False,
+    )
+    def test_init_with_category_bitmaps_connects_data(
+        self, mock_post_save, mock_post_delete
+    ):
+        """test_init_with_category_bitmaps_connects_data"""
+        # Act
+        watch.init()
+        # Assert
+        self.assertEqual(
+            mock_post_save.connect.call_args_list,
+            [
+                call(watch.post_save_template, sender=Template),
+                call(watch.post_save_data_bitmaps, sender=Data),
+            ],
+        )
+        mock_post_delete.connect.assert_called_once_with(
+            watch.post_delete_data_bitmaps, sender=Data
+        )
+
+
+class TestPostSaveData(SimpleTestCase):
+    """Test Post Save Data"""
+
+    @patch("core_main_registry_app.utils.refinement.watch.data_facet_api")
+    def test_post_save_data_upserts_facet_values(self, mock_data_facet_api):
+        """test_post_save_data_upserts_facet_values"""
+        # Arrange
+        data = MagicMock()
+        # Act
+        watch.post_save_data(Data, data, created=True)
+        # Assert
+        mock_data_facet_api.upsert_data_facet_values.assert_called_once_with(
+            data
+        )
+
+    @patch("core_main_registry_app.utils.refinement.watch.logger")
+    @patch("core_main_registry_app.utils.refinement.watch.data_facet_api")
+    def test_post_save_data_logs_error(self, mock_data_facet_api, mock_logger):
+        """test_post_save_data_logs_error"""
+        # Arrange
+        mock_data_facet_api.upsert_data_facet_values.side_effect = Exception(
+            "error"
+        )
+        # Act
+        watch.post_save_data(Data, MagicMock(), created=True)
+        # Assert
+        mock_logger.error.assert_called_once()
+
+
+class TestPostSaveDataBitmaps(SimpleTestCase):
+    """Test Post Save Data Bitmaps"""
+
+    @patch("core_main_registry_app.utils.refinement.watch.category_bitmap_api")
+    def test_post_save_data_bitmaps_updates_bitmaps(
+        self, mock_category_bitmap_api
+    ):
+        """test_post_save_data_bitmaps_updates_bitmaps"""
+        # Arrange
+        data = MagicMock()
+        # Act
+        watch.post_save_data_bitmaps(Data, data, created=True)
+        # Assert
+        mock_category_bitmap_api.update_data_bitmaps.assert_called_once_with(
+            data
+        )
+
+    @patch("core_main_registry_app.utils.refinement.watch.logger")
+    @patch("core_main_registry_app.utils.refinement.watch.category_bitmap_api")
+    def test_post_save_data_bitmaps_logs_error(
+        self, mock_category_bitmap_api, mock_logger
+    ):
+        """test_post_save_data_bitmaps_logs_error"""
+        # Arrange
+        mock_category_bitmap_api.update_data_bitmaps.side_effect = Exception(
+            "error"
+        )
+        # Act
+        watch.post_save_data_bitmaps(Data, MagicMock(), created=True)
+        # Assert
+        mock_logger.error.assert_called_once()
+
+
+class TestPostDeleteDataBitmaps(SimpleTestCase):
+    """Test Post Delete Data Bitmaps"""
+
+    @patch("core_main_registry_app.utils.refinement.watch.category_bitmap_api")
+    def test_post_delete_data_bitmaps_deletes_data_bits(
+        self, mock_category_bitmap_api
+    ):
+        """test_post_delete_data_bitmaps_deletes_data_bits"""
+        # Arrange
+        data = MagicMock()
+        # Act
+        watch.post_delete_data_bitmaps(Data, data)
+        # Assert
+        mock_category_bitmap_api.delete_data_bitmaps.assert_called_once_with(
+            data
+        )
+
+    @patch("core_main_registry_app.utils.refinement.watch.logger")
+    @patch("core_main_registry_app.utils.refinement.watch.category_bitmap_api")
+    def test_post_delete_data_bitmaps_logs_error(
+        self, mock_category_bitmap_api, mock_logger
+    ):
+        """test_post_delete_data_bitmaps_logs_error"""
+        # Arrange
+        mock_category_bitmap_api.delete_data_bitmaps.side_effect = Exception(
+            "error"
+        )
+        # Act
+        watch.post_delete_data_bitmaps(Data, MagicMock())
+        # Assert
+        mock_logger.error.assert_called_once()
+
+
+class TestPostSaveTemplate(SimpleTestCase):
+    """Test Post Save Template"""
+
+    @patch(
+        "core_main_registry_app.utils.refinement.watch.init_refinement_task"
+    )
+    @patch(
+        "core_main_registry_app.utils.refinement.watch.refinement_generation_api"
+    )
+    def test_post_save_template_sends_task_when_enqueued(
+        self, mock_refinement_generation_api, mock_init_refinement_task
+    ):
+        """test_post_save_template_sends_task_when_enqueued"""
+        # Arrange
+        template = MagicMock(id=1, hash="hash")
+        mock_refinement_generation_api.enqueue.return_value = True
+        # Act
+        watch.post_save_template(Template, template, created=True)
+        # Assert
+        task_id = mock_refinement_generation_api.enqueue.call_args.args[1]
+        mock_init_refinement_task.apply_async.assert_called_once_with(
+            args=("1",), task_id=task_id
+        )
+
+    @patch(
+        "core_main_registry_app.utils.refinement.watch.init_refinement_task"
+    )
+    @patch(
+        "core_main_registry_app.utils.refinement.watch.refinement_generation_api"
+    )
+    def test_post_save_template_does_not_send_task_when_already_enqueued(
+        self, mock_refinement_generation_api, mock_init_refinement_task
+    ):
+        """test_post_save_template_does_not_send_task_when_already_enqueued"""
+        # Arrange
+        mock_refinement_generation_api.enqueue.return_value = False
+        # Act
+        watch.post_save_template(
+            Template, MagicMock(id=1, hash="hash"), created=True
+        )
+        # Assert
+        mock_init_refinement_task.apply_async.assert_not_called()
+
+    @patch(
+        "core_main_registry_app.utils.refinement.watch.init_refinement_task"
+    )
+    @patch(
+        "core_main_registry_app.utils.refinement.watch.refinement_generation_api"
+    )
+    def test_post_save_template_without_hash_sends_task(
+        self, mock_refinement_generation_api, mock_init_refinement_task
+    ):
+        """test_post_save_template_without_hash_sends_task"""
+        # Act
+        watch.post_save_template(
+            Template, MagicMock(id=1, hash=""), created=True
+        )
+        # Assert
+        mock_refinement_generation_api.enqueue.assert_not_called()
+        mock_init_refinement_task.apply_async.assert_called_once()
+
+    @patch(
+        "core_main_registry_app.utils.refinement.watch.init_refinement_task"
+    )
+    @patch(
+        "core_main_registry_app.utils.refinement.watch.refinement_generation_api"
+    )
+    def test_post_save_template_does_not_send_task_when_updated(
+        self, mock_refinement_generation_api, mock_init_refinement_task
+    ):
+        """test_post_save_template_does_not_send_task_when_updated"""
+        # Act
+        watch.post_save_template(
+            Template, MagicMock(id=1, hash="hash"), created=False
+        )
+        # Assert
+        mock_refinement_generation_api.enqueue.assert_not_called()
+        mock_init_refinement_task.apply_async.assert_not_called()
+
+    @patch("core_main_registry_app.utils.refinement.watch.logger")
+    @patch(
+        "core_main_registry_app.utils.refinement.watch.init_refinement_task"
+    )
+    @patch(
+        "core_main_registry_app.utils.refinement.watch.refinement_generation_api"
+    )
+    def test_post_save_template_finishes_generation_when_task_not_sent(
+        self,
+        mock_refinement_generation_api,
+        mock_init_refinement_task,
+        mock_logger,
+    ):
+        """test_post_save_template_finishes_generation_when_task_not_sent"""
+        # Arrange
+        mock_refinement_generation_api.enqueue.return_value = True
+        mock_init_refinement_task.apply_async.side_effect = Exception("error")
+        # Act
+        watch.post_save_template(
+            Template, MagicMock(id=1, hash="hash"), created=True
+        )
+        # Assert
+        mock_refinement_generation_api.finish.assert_called_once_with(
+            "hash", success=False
+        )
+        mock_logger.error.assert_called_once()
+
+    @patch("core_main_registry_app.utils.refinement.watch.logger")
+    @patch(
+        "core_main_registry_app.utils.refinement.watch.init_refinement_task"
+    )
+    @patch(
+        "core_main_registry_app.utils.refinement.watch.refinement_generation_api"
+    )
+    def test_post_save_template_without_hash_logs_task_error(
+        self,
+        mock_refinement_generation_api,
+        mock_init_refinement_task,
+        mock_logger,
+    ):
+        """test_post_save_template_without_hash_logs_task_error"""
+        # Arrange
+        mock_init_refinement_task.apply_async.side_effect = TimeoutError(
+            "timeout"
+        )
+        # Act
+        watch.post_save_template(
+            Template, MagicMock(id=1, hash=""), created=True
+        )
+        # Assert
+        mock_refinement_generation_api.finish.assert_not_called()
+        mock_logger.error.assert_called_once()